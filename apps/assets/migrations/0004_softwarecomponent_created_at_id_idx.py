@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without blocking writes to a large table.
+    atomic = False
+
+    dependencies = [
+        ("assets", "0003_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="softwarecomponent",
+            index=models.Index(
+                fields=["created_at", "id"], name="software_co_created_e8a8fc_idx"
+            ),
+        ),
+    ]
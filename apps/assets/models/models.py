@@ -1,6 +1,7 @@
 from django.db import models
 from apps.integrations.models.models import DataSource, GitRepository
 from apps.products.models.models import ProductCatalog
+from backend.invalidation import InvalidatingQuerySet
 
 class SoftwareComponent(models.Model):
     """
@@ -45,6 +46,8 @@ class SoftwareComponent(models.Model):
     is_ai_generated = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = InvalidatingQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.name} ({self.type})"
@@ -54,7 +57,8 @@ class SoftwareComponent(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['data_source', 'type']),
-            models.Index(fields=['repository', 'path'])
+            models.Index(fields=['repository', 'path']),
+            models.Index(fields=['created_at', 'id'])
         ]
         verbose_name = 'Software Component'
         verbose_name_plural = 'Software Components'
@@ -129,6 +133,8 @@ class Dependency(models.Model):
                               help_text="Additional metadata about the dependency")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = InvalidatingQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.source_component.name} → {self.target_component.name} ({self.dependency_type})"
@@ -0,0 +1,77 @@
+from rest_framework import serializers
+
+from apps.integrations.serializers import DataSourceSummarySerializer, GitRepositorySummarySerializer
+from backend.api import SparseFieldsModelSerializer
+from backend.slim import Column, DateTimeColumn, JSONColumn, Nested, SlimSerializer
+from .models.models import Dependency, SoftwareComponent
+
+
+class SoftwareComponentSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SoftwareComponent
+        fields = ['id', 'name', 'type']
+
+
+class SoftwareComponentSerializer(SparseFieldsModelSerializer):
+    data_source = DataSourceSummarySerializer(read_only=True)
+    repository = GitRepositorySummarySerializer(read_only=True)
+
+    class Meta:
+        model = SoftwareComponent
+        fields = [
+            'id', 'name', 'type', 'description', 'resource_id', 'path', 'repository', 'data_source',
+            'metadata', 'discovery_method', 'language', 'version', 'last_updated_in_source',
+            'security_score', 'tags', 'is_active', 'is_ai_generated', 'created_at', 'updated_at',
+        ]
+
+
+class DependencySerializer(SparseFieldsModelSerializer):
+    source_component = SoftwareComponentSummarySerializer(read_only=True)
+    target_component = SoftwareComponentSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Dependency
+        fields = [
+            'id', 'source_component', 'target_component', 'dependency_type', 'criticality',
+            'is_direct', 'description', 'metadata', 'created_at', 'updated_at',
+        ]
+
+
+class SoftwareComponentListSerializer(SlimSerializer):
+    fields = {
+        'id': Column('id'),
+        'name': Column('name'),
+        'type': Column('type'),
+        'description': Column('description'),
+        'resource_id': Column('resource_id'),
+        'path': Column('path'),
+        'repository': Nested('repository', ['id', 'full_name', 'provider']),
+        'data_source': Nested('data_source', ['id', 'name', 'type']),
+        'metadata': JSONColumn('metadata'),
+        'discovery_method': Column('discovery_method'),
+        'language': Column('language'),
+        'version': Column('version'),
+        'last_updated_in_source': DateTimeColumn('last_updated_in_source'),
+        'security_score': Column('security_score'),
+        # A short label list, returned by default.
+        'tags': JSONColumn('tags', heavy=False),
+        'is_active': Column('is_active'),
+        'is_ai_generated': Column('is_ai_generated'),
+        'created_at': DateTimeColumn('created_at'),
+        'updated_at': DateTimeColumn('updated_at'),
+    }
+
+
+class DependencyListSerializer(SlimSerializer):
+    fields = {
+        'id': Column('id'),
+        'source_component': Nested('source_component', ['id', 'name', 'type']),
+        'target_component': Nested('target_component', ['id', 'name', 'type']),
+        'dependency_type': Column('dependency_type'),
+        'criticality': Column('criticality'),
+        'is_direct': Column('is_direct'),
+        'description': Column('description'),
+        'metadata': JSONColumn('metadata'),
+        'created_at': DateTimeColumn('created_at'),
+        'updated_at': DateTimeColumn('updated_at'),
+    }
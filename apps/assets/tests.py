@@ -1,3 +1,105 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.integrations.models.models import DataSource
+from apps.users.models.models import Organization, User
+
+from .models.models import SoftwareComponent
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    # SESSION_CACHE_ALIAS of the cached_db session engine.
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sessions'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ComponentListTests(TestCase):
+    url = '/api/assets/components/'
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+        self.data_source = self.create_data_source('acme/api', self.organization)
+        self.other_source = self.create_data_source('acme/web', self.organization)
+        other_organization = Organization.objects.create(name='Other', slug='other')
+        self.foreign_source = self.create_data_source('other/api', other_organization)
+
+        for data_source in (self.data_source, self.other_source, self.foreign_source):
+            for i in range(4):
+                SoftwareComponent.objects.create(
+                    name=f'{data_source.name}-{i}', type='service', path=f'svc/{i}', data_source=data_source,
+                )
+        # Rows created in the same instant must still page without gaps.
+        SoftwareComponent.objects.filter(data_source=self.data_source).update(created_at=timezone.now())
+
+        user = User.objects.create_user('dev@acme.test', 'secret', organization=self.organization)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def create_data_source(self, name, organization):
+        return DataSource.objects.create(
+            name=name, type='github', credentials='-', organization=organization, connection_status='active',
+        )
+
+    def get(self, url):
+        # List pages are streamed.
+        response = self.client.get(url)
+        if response.streaming:
+            response.data = json.loads(b''.join(response.streaming_content))
+        return response
+
+    def walk(self, url):
+        ids, pages = [], []
+        while url:
+            response = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            ids.extend(row['id'] for row in response.data['data'])
+            url = response.data['next']
+        return ids, pages
+
+    def test_pages_through_the_organization_newest_first(self):
+        ids, pages = self.walk(f'{self.url}?limit=3')
+        expected = list(
+            SoftwareComponent.objects.filter(data_source__organization=self.organization)
+            .order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+        previous = self.get(pages[2]['previous']).data
+        self.assertEqual([row['id'] for row in previous['data']], expected[3:6])
+
+    def test_page_cost_does_not_grow_with_nested_objects(self):
+        with self.assertNumQueries(1):
+            response = self.get(f'{self.url}?limit=8&include=metadata')
+        self.assertEqual(response.data['data'][0]['data_source']['name'], self.data_source.name)
+        self.assertIsNone(response.data['data'][0]['repository'])
+        self.assertEqual(response.data['data'][0]['metadata'], {})
+
+    def test_list_rows_match_the_detail_serializer(self):
+        SoftwareComponent.objects.filter(data_source=self.data_source).update(metadata={'owner': 'payments'})
+        row = self.get(self.url).data['data'][0]
+        self.assertNotIn('metadata', row)
+        detail = self.client.get(f"{self.url}{row['id']}/").json()
+        self.assertEqual(detail['metadata'], {'owner': 'payments'})
+        self.assertEqual(row, {field: value for field, value in detail.items() if field != 'metadata'})
+
+    def test_sparse_fieldsets_and_indexed_filters(self):
+        response = self.get(f'{self.url}?fields=id,name&data_source={self.data_source.pk}')
+        self.assertEqual(len(response.data['data']), 4)
+        self.assertEqual(set(response.data['data'][0]), {'id', 'name'})
+
+        self.assertEqual(self.client.get(f'{self.url}?fields=id,credentials').status_code, 400)
+        self.assertEqual(self.client.get(f'{self.url}?data_source=api').status_code, 400)
+        self.assertEqual(self.client.get(f'{self.url}?cursor=bogus').status_code, 404)
+
+    def test_other_organizations_are_not_visible(self):
+        foreign = SoftwareComponent.objects.filter(data_source=self.foreign_source).first()
+        self.assertEqual(self.client.get(f'{self.url}{foreign.pk}/').status_code, 404)
+        response = self.get(f'{self.url}?data_source={self.foreign_source.pk}')
+        self.assertEqual(response.data['data'], [])
@@ -0,0 +1,9 @@
+from rest_framework.routers import SimpleRouter
+
+from .views.views import DependencyViewSet, SoftwareComponentViewSet
+
+router = SimpleRouter()
+router.register('components', SoftwareComponentViewSet, basename='component')
+router.register('dependencies', DependencyViewSet, basename='dependency')
+
+urlpatterns = router.urls
@@ -1,27 +1,44 @@
-from django.shortcuts import render
-from django.contrib.auth import authenticate
-from django.core.exceptions import ValidationError
-from rest_framework import status, permissions
-from rest_framework.response import Response
-from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
-from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-import requests
-import json
-import logging
-import os
-from django.conf import settings
-import urllib.parse
+from backend.api import OrganizationScopedViewSet
 
-from ..models.models import User
+from ..models.models import Dependency, SoftwareComponent
 from ..serializers import (
-    UserRegistrationSerializer, 
-    UserSerializer,
-    GoogleAuthSerializer,
-    GithubAuthSerializer
+    DependencyListSerializer,
+    DependencySerializer,
+    SoftwareComponentListSerializer,
+    SoftwareComponentSerializer,
 )
 
-logger = logging.getLogger(__name__)
+
+class SoftwareComponentViewSet(OrganizationScopedViewSet):
+    queryset = SoftwareComponent.objects.all()
+    serializer_class = SoftwareComponentSerializer
+    slim_serializer_class = SoftwareComponentListSerializer
+    raw_json_fields = ('metadata',)
+    organization_lookup = 'data_source__organization'
+    select_related_fields = {
+        'data_source': ['data_source'],
+        'repository': ['repository'],
+    }
+    filters = {
+        'data_source': ('data_source_id', int),  # (data_source, type)
+        'type': ('type', str),                   # with data_source
+        'repository': ('repository_id', int),    # (repository, path)
+        'path': ('path', str),                   # with repository
+    }
+
+
+class DependencyViewSet(OrganizationScopedViewSet):
+    queryset = Dependency.objects.all()
+    serializer_class = DependencySerializer
+    slim_serializer_class = DependencyListSerializer
+    raw_json_fields = ('metadata',)
+    organization_lookup = 'source_component__data_source__organization'
+    select_related_fields = {
+        'source_component': ['source_component'],
+        'target_component': ['target_component'],
+    }
+    filters = {
+        'source_component': ('source_component_id', int),  # (source_component)
+        'target_component': ('target_component_id', int),  # (target_component)
+        'dependency_type': ('dependency_type', str),       # (dependency_type)
+    }
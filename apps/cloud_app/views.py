@@ -1,13 +1,24 @@
 from django.shortcuts import render
 from apps.cloud_app.models import Organisation
 from django.http import JsonResponse
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 
-def organisation_list(requests):
-    organisations = Organisation.objects.all()
+from backend.pagination import KeysetPagination
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def organisation_list(request):
+    paginator = KeysetPagination()
+    organisations = paginator.paginate_queryset(Organisation.objects.values(), request)
     data = {
-                "organisations": list(organisations.values())
+                "organisations": organisations,
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
            }
-    return JsonResponse(data)
+    return Response(data)
 
 
 def organisation_detail(requests, organisationId):
@@ -0,0 +1,321 @@
+"""
+Query engine for KnowledgeGraph.
+
+A KnowledgeGraph is compiled once into label and property indexes plus
+adjacency lists, then answers path-pattern queries such as
+
+    graph.match(
+        ("product", {}),
+        ("component", {}),
+        ("cloud_resource", {"severity__gte": "high"}),
+    )
+
+Filters use Django-style lookups (exact, gt, gte, lt, lte, in, contains,
+isnull); values of the severity property compare by rank rather than
+alphabetically. Compiled graphs are cached per graph and version
+(last_updated, which set_graph_data bumps, and updated_at) so a new version
+of a graph is picked up as soon as it is saved.
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+from apps.insights.models.models import KnowledgeGraph
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+RANKED_FIELDS = ("severity",)
+
+LOOKUPS = ("exact", "gt", "gte", "lt", "lte", "in", "contains", "isnull")
+
+CACHE_SIZE = 32
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _rank(value):
+    if isinstance(value, str) and value in SEVERITY_RANK:
+        return SEVERITY_RANK[value]
+    return value
+
+
+def _compare(value, lookup, expected, ranked=False):
+    if lookup == "isnull":
+        return (value is None) == bool(expected)
+    if value is None:
+        return False
+    if lookup == "exact":
+        return value == expected
+    if lookup == "in":
+        return value in expected
+    if lookup == "contains":
+        try:
+            return expected in value
+        except TypeError:
+            return False
+    if ranked:
+        value, expected = _rank(value), _rank(expected)
+    try:
+        if lookup == "gt":
+            return value > expected
+        if lookup == "gte":
+            return value >= expected
+        if lookup == "lt":
+            return value < expected
+        return value <= expected
+    except TypeError:
+        return False
+
+
+def _parse_filters(where):
+    filters = []
+    for key, expected in (where or {}).items():
+        field, _, lookup = key.partition("__")
+        lookup = lookup or "exact"
+        if lookup not in LOOKUPS:
+            raise ValueError(f"Unsupported lookup '{lookup}' in '{key}'")
+        filters.append((field, lookup, expected))
+    return filters
+
+
+class CompiledKnowledgeGraph:
+    """
+    In-memory, indexed form of a KnowledgeGraph's graph data.
+    """
+
+    def __init__(self, compact_graph):
+        graph = compact_graph
+        attrs = graph.attributes
+        node_attrs = attrs.get("nodes") or [None] * graph.node_count
+        edge_attrs = attrs.get("edges") or [None] * graph.edge_count
+
+        self.node_count = graph.node_count
+        self.edge_count = graph.edge_count
+        self.nodes = []
+        self.labels = {}
+        for i in range(graph.node_count):
+            node = {"id": graph.node_id(i)}
+            node_type = graph.string(graph.node_types[i])
+            if node_type is not None:
+                node["type"] = node_type
+            if node_attrs[i]:
+                node.update(node_attrs[i])
+            self.nodes.append(node)
+
+            labels = set()
+            if node_type is not None:
+                labels.add(node_type)
+            extra = node.get("labels") or node.get("label")
+            if isinstance(extra, str):
+                labels.add(extra)
+            elif isinstance(extra, list):
+                labels.update(label for label in extra if isinstance(label, str))
+            for label in labels:
+                self.labels.setdefault(label, []).append(i)
+
+        self.edges = []
+        self.outgoing = [[] for _ in range(graph.node_count)]
+        self.incoming = [[] for _ in range(graph.node_count)]
+        for i in range(graph.edge_count):
+            source, target = graph.edge_sources[i], graph.edge_targets[i]
+            edge_type = graph.string(graph.edge_types[i])
+            if edge_type is None and edge_attrs[i]:
+                # Non-string types are kept with the attributes.
+                edge_type = edge_attrs[i].get("type")
+            self.edges.append((source, target, edge_type, edge_attrs[i]))
+            self.outgoing[source].append(i)
+            self.incoming[target].append(i)
+
+        self.position = {node["id"]: i for i, node in enumerate(self.nodes)}
+        self._property_indexes = {}
+        self._lock = threading.Lock()
+
+    def property_index(self, key):
+        """
+        Map each hashable value of a node property to the node positions holding it.
+        """
+        index = self._property_indexes.get(key)
+        if index is None:
+            with self._lock:
+                index = self._property_indexes.get(key)
+                if index is None:
+                    index = {}
+                    for i, node in enumerate(self.nodes):
+                        value = node.get(key)
+                        try:
+                            index.setdefault(value, []).append(i)
+                        except TypeError:
+                            continue
+                    self._property_indexes[key] = index
+        return index
+
+    def find(self, label=None, where=None):
+        """
+        Return the positions of nodes with the given label matching every filter.
+        """
+        filters = _parse_filters(where)
+        candidates = None
+        if label is not None:
+            candidates = self.labels.get(label, [])
+
+        # Narrow with the property index for equality filters before scanning.
+        for field, lookup, expected in filters:
+            if lookup not in ("exact", "in"):
+                continue
+            index = self.property_index(field)
+            values = expected if lookup == "in" else [expected]
+            matched = set()
+            for value in values:
+                try:
+                    matched.update(index.get(value, ()))
+                except TypeError:
+                    continue
+            candidates = matched if candidates is None else [i for i in candidates if i in matched]
+
+        if candidates is None:
+            candidates = range(self.node_count)
+        return [
+            i for i in candidates
+            if all(
+                _compare(self.nodes[i].get(field), lookup, expected, field in RANKED_FIELDS)
+                for field, lookup, expected in filters
+            )
+        ]
+
+    def match(self, *steps, edge_types=None, limit=1000):
+        """
+        Match directed paths. Each step is a (label, where) pair; edge_types
+        optionally restricts the edge type between consecutive steps (a single
+        type, or one entry per hop with None meaning any). Returns a list of
+        paths, each a list of node dicts.
+        """
+        if not steps:
+            return []
+        hops = len(steps) - 1
+        if edge_types is None or isinstance(edge_types, str):
+            edge_types = [edge_types] * hops
+        if len(edge_types) != hops:
+            raise ValueError("edge_types needs one entry per hop")
+
+        candidates = [set(self.find(label, where)) for label, where in steps]
+
+        # Backward pass: keep only nodes that can still reach the end of the pattern.
+        reachable = [None] * len(steps)
+        reachable[-1] = candidates[-1]
+        for step in range(hops - 1, -1, -1):
+            allowed = edge_types[step]
+            following = reachable[step + 1]
+            reachable[step] = {
+                i for i in candidates[step]
+                if any(
+                    self.edges[e][1] in following and (allowed is None or self.edges[e][2] == allowed)
+                    for e in self.outgoing[i]
+                )
+            }
+
+        paths = []
+
+        def walk(path):
+            if len(paths) >= limit:
+                return
+            step = len(path)
+            if step == len(steps):
+                paths.append([self.nodes[i] for i in path])
+                return
+            allowed = edge_types[step - 1]
+            for e in self.outgoing[path[-1]]:
+                _, target, edge_type, _ = self.edges[e]
+                if target in reachable[step] and (allowed is None or edge_type == allowed):
+                    walk(path + [target])
+
+        for start in sorted(reachable[0]):
+            walk([start])
+            if len(paths) >= limit:
+                break
+        return paths
+
+    def subgraph(self, node_ids, depth=1):
+        """
+        Return the neighbourhood of the given node ids, up to depth hops in
+        either direction, in graph_data shape.
+        """
+        frontier = {self.position[node_id] for node_id in node_ids if node_id in self.position}
+        seen = set(frontier)
+        for _ in range(depth):
+            following = set()
+            for i in frontier:
+                following.update(self.edges[e][1] for e in self.outgoing[i])
+                following.update(self.edges[e][0] for e in self.incoming[i])
+            frontier = following - seen
+            seen |= frontier
+
+        edges = []
+        for source, target, edge_type, attrs in self.edges:
+            if source in seen and target in seen:
+                edge = {"source": self.nodes[source]["id"], "target": self.nodes[target]["id"]}
+                if edge_type is not None:
+                    edge["type"] = edge_type
+                if attrs:
+                    edge.update(attrs)
+                edges.append(edge)
+        return {"nodes": [self.nodes[i] for i in sorted(seen)], "edges": edges}
+
+
+def _cache_key(knowledge_graph):
+    # pk keeps product-scoped graphs of the same type apart.
+    return (
+        knowledge_graph.organization_id, knowledge_graph.graph_type, knowledge_graph.pk,
+        knowledge_graph.last_updated, knowledge_graph.updated_at,
+    )
+
+
+def compile_knowledge_graph(knowledge_graph):
+    """
+    Return the compiled form of a KnowledgeGraph, reusing a cached copy
+    while its last_updated and updated_at timestamps are unchanged.
+    """
+    key = _cache_key(knowledge_graph)
+    with _cache_lock:
+        compiled = _cache.get(key)
+        if compiled is not None:
+            _cache.move_to_end(key)
+            return compiled
+
+    compiled = CompiledKnowledgeGraph(knowledge_graph.load_graph())
+    with _cache_lock:
+        _cache[key] = compiled
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    logger.debug(f"Compiled knowledge graph {knowledge_graph.pk} ({compiled.node_count} nodes, {compiled.edge_count} edges)")
+    return compiled
+
+
+def get_knowledge_graph(organization_id, graph_type, product_id=None):
+    """
+    Compiled form of an organization's most recent KnowledgeGraph of a type,
+    or None. product_id=None selects graphs not scoped to a product.
+
+    Only the cache key columns are read first; the graph payload is fetched
+    from the database when the compiled copy is missing or out of date.
+    """
+    queryset = KnowledgeGraph.objects.filter(organization_id=organization_id, graph_type=graph_type)
+    if product_id is None:
+        queryset = queryset.filter(product__isnull=True)
+    else:
+        queryset = queryset.filter(product_id=product_id)
+    latest = queryset.order_by("-last_updated").only(
+        "id", "organization_id", "graph_type", "last_updated", "updated_at"
+    ).first()
+    if latest is None:
+        return None
+
+    key = _cache_key(latest)
+    with _cache_lock:
+        compiled = _cache.get(key)
+        if compiled is not None:
+            _cache.move_to_end(key)
+            return compiled
+    return compile_knowledge_graph(KnowledgeGraph.objects.get(pk=latest.pk))
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without blocking writes to a large table.
+    atomic = False
+
+    dependencies = [
+        ("insights", "0003_knowledgegraph_graph_blob_alter_knowledgegraph_graph_data"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="insight",
+            index=models.Index(
+                fields=["organization", "created_at", "id"], name="insight_organiz_1f3881_idx"
+            ),
+        ),
+    ]
@@ -4,6 +4,8 @@ from apps.products.models.models import ProductCatalog
 from apps.assets.models.models import SoftwareComponent
 from apps.integrations.models.models import GitRepository, CloudResource
 from apps.policies.models.models import SecurityPolicy, ComplianceResult
+from apps.visualization.codec import CompactGraphDataMixin
+from backend.invalidation import InvalidatingQuerySet
 
 class Insight(models.Model):
     """
@@ -60,6 +62,8 @@ class Insight(models.Model):
     resolved_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = InvalidatingQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.title} ({self.type}, {self.severity})"
@@ -70,7 +74,8 @@ class Insight(models.Model):
         indexes = [
             models.Index(fields=['organization', 'type']),
             models.Index(fields=['product', 'status']),
-            models.Index(fields=['component'])
+            models.Index(fields=['component']),
+            models.Index(fields=['organization', 'created_at', 'id'])
         ]
         verbose_name = 'Insight'
         verbose_name_plural = 'Insights'
@@ -181,7 +186,7 @@ class AIResponse(models.Model):
         verbose_name = 'AI Response'
         verbose_name_plural = 'AI Responses'
 
-class KnowledgeGraph(models.Model):
+class KnowledgeGraph(CompactGraphDataMixin, models.Model):
     """
     Knowledge graph representing software assets and relationships.
     Provides a semantic understanding of the software ecosystem.
@@ -200,7 +205,9 @@ class KnowledgeGraph(models.Model):
     graph_type = models.CharField(max_length=50, choices=GRAPH_TYPE_CHOICES)
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
     product = models.ForeignKey(ProductCatalog, on_delete=models.SET_NULL, null=True, blank=True)
-    graph_data = models.JSONField(help_text="Knowledge graph structure and relationships")
+    graph_data = models.JSONField(null=True, blank=True, help_text="Knowledge graph structure and relationships")
+    graph_blob = models.BinaryField(null=True, blank=True, editable=False,
+                                 help_text="Compact columnar encoding of graph_data")
     metadata = models.JSONField(default=dict, blank=True)
     node_count = models.IntegerField(default=0)
     edge_count = models.IntegerField(default=0)
@@ -0,0 +1,41 @@
+from apps.assets.serializers import SoftwareComponentSummarySerializer
+from apps.products.serializers import ProductSummarySerializer
+from backend.api import SparseFieldsModelSerializer
+from backend.slim import Column, DateTimeColumn, JSONColumn, Nested, SlimSerializer
+from .models.models import Insight
+
+
+class InsightSerializer(SparseFieldsModelSerializer):
+    product = ProductSummarySerializer(read_only=True)
+    component = SoftwareComponentSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Insight
+        fields = [
+            'id', 'title', 'description', 'type', 'severity', 'status', 'product', 'component',
+            'repository', 'cloud_resource', 'data', 'recommendation', 'confidence_score', 'is_resolved',
+            'resolved_by', 'resolved_at', 'created_at', 'updated_at',
+        ]
+
+
+class InsightListSerializer(SlimSerializer):
+    fields = {
+        'id': Column('id'),
+        'title': Column('title'),
+        'description': Column('description'),
+        'type': Column('type'),
+        'severity': Column('severity'),
+        'status': Column('status'),
+        'product': Nested('product', ['id', 'name', 'type']),
+        'component': Nested('component', ['id', 'name', 'type']),
+        'repository': Column('repository'),
+        'cloud_resource': Column('cloud_resource'),
+        'data': JSONColumn('data'),
+        'recommendation': Column('recommendation'),
+        'confidence_score': Column('confidence_score'),
+        'is_resolved': Column('is_resolved'),
+        'resolved_by': Column('resolved_by'),
+        'resolved_at': DateTimeColumn('resolved_at'),
+        'created_at': DateTimeColumn('created_at'),
+        'updated_at': DateTimeColumn('updated_at'),
+    }
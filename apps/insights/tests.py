@@ -1,3 +1,58 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from apps.insights import knowledge_graph
+from apps.insights.knowledge_graph import CompiledKnowledgeGraph, get_knowledge_graph
+from apps.insights.models.models import KnowledgeGraph
+from apps.products.models.models import ProductCatalog
+from apps.users.models.models import Organization
+from apps.visualization.codec import decode, encode
+
+
+class CompiledKnowledgeGraphTests(SimpleTestCase):
+    graph_data = {
+        'nodes': [
+            {'id': 'a', 'type': 'cloud_resource', 'severity': 'critical', 'name': 'low'},
+            {'id': 'b', 'type': 'cloud_resource', 'severity': 'low', 'name': 'high'},
+        ],
+        'edges': [],
+    }
+
+    def setUp(self):
+        self.graph = CompiledKnowledgeGraph(decode(encode(self.graph_data)))
+
+    def test_severity_compares_by_rank(self):
+        self.assertEqual(self.graph.find('cloud_resource', {'severity__gte': 'high'}), [0])
+
+    def test_other_fields_compare_as_stored(self):
+        self.assertEqual(self.graph.find('cloud_resource', {'name__gt': 'critical'}), [0, 1])
+
+
+class KnowledgeGraphCacheTests(TestCase):
+    def setUp(self):
+        knowledge_graph._cache.clear()
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+        self.product = ProductCatalog.objects.create(name='api', organization=self.organization)
+
+    def knowledge_graph(self, node_id, product=None):
+        graph = KnowledgeGraph(name='g', graph_type='security', organization=self.organization, product=product)
+        graph.set_graph_data({'nodes': [{'id': node_id, 'type': 'component'}], 'edges': []})
+        graph.save()
+        return graph
+
+    def test_set_graph_data_replaces_the_cached_graph(self):
+        graph = self.knowledge_graph('before')
+        self.assertEqual(get_knowledge_graph(self.organization.pk, 'security').nodes[0]['id'], 'before')
+
+        graph.set_graph_data({'nodes': [{'id': 'after', 'type': 'component'}], 'edges': []})
+        graph.save(update_fields=['graph_data', 'graph_blob', 'node_count', 'edge_count', 'last_updated'])
+
+        self.assertEqual(get_knowledge_graph(self.organization.pk, 'security').nodes[0]['id'], 'after')
+
+    def test_product_none_selects_organization_wide_graphs(self):
+        self.knowledge_graph('organization')
+        self.knowledge_graph('product', product=self.product)
+
+        self.assertEqual(get_knowledge_graph(self.organization.pk, 'security').nodes[0]['id'], 'organization')
+        self.assertEqual(
+            get_knowledge_graph(self.organization.pk, 'security', product_id=self.product.pk).nodes[0]['id'], 'product'
+        )
@@ -0,0 +1,8 @@
+from rest_framework.routers import SimpleRouter
+
+from .views.views import InsightViewSet
+
+router = SimpleRouter()
+router.register('', InsightViewSet, basename='insight')
+
+urlpatterns = router.urls
@@ -1,27 +1,23 @@
-from django.shortcuts import render
-from django.contrib.auth import authenticate
-from django.core.exceptions import ValidationError
-from rest_framework import status, permissions
-from rest_framework.response import Response
-from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
-from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-import requests
-import json
-import logging
-import os
-from django.conf import settings
-import urllib.parse
+from backend.api import OrganizationScopedViewSet
 
-from ..models.models import User
-from ..serializers import (
-    UserRegistrationSerializer, 
-    UserSerializer,
-    GoogleAuthSerializer,
-    GithubAuthSerializer
-)
+from ..models.models import Insight
+from ..serializers import InsightListSerializer, InsightSerializer
 
-logger = logging.getLogger(__name__)
+
+class InsightViewSet(OrganizationScopedViewSet):
+    queryset = Insight.objects.all()
+    serializer_class = InsightSerializer
+    slim_serializer_class = InsightListSerializer
+    raw_json_fields = ('data',)
+    select_related_fields = {
+        'product': ['product'],
+        'component': ['component'],
+    }
+    filters = {
+        'type': ('type', str),                         # (organization, type)
+        'product': ('product_id', int),                # (product, status)
+        'status': ('status', str),                     # with product
+        'component': ('component_id', int),            # (component)
+        'repository': ('repository_id', int),          # (repository)
+        'cloud_resource': ('cloud_resource_id', int),  # (cloud_resource)
+    }
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("integrations", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datasource",
+            name="next_scan_at",
+            field=models.DateTimeField(
+                blank=True,
+                default=django.utils.timezone.now,
+                help_text="When the scheduler scans this source next; empty to disable",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="datasource",
+            name="scan_failures",
+            field=models.IntegerField(
+                default=0, help_text="Consecutive failed scans or connection checks"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="datasource",
+            index=models.Index(
+                fields=["next_scan_at", "connection_status"], name="data_source_next_sc_1697d0_idx"
+            ),
+        ),
+    ]
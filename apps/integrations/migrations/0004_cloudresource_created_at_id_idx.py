@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without blocking writes to a large table.
+    atomic = False
+
+    dependencies = [
+        ("integrations", "0003_datasource_scan_schedule"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="cloudresource",
+            index=models.Index(
+                fields=["created_at", "id"], name="cloud_resou_created_550695_idx"
+            ),
+        ),
+    ]
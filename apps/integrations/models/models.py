@@ -41,6 +41,9 @@ class DataSource(models.Model):
     connection_status = models.CharField(max_length=20, choices=CONNECTION_STATUS_CHOICES, default="pending")
     last_scan_at = models.DateTimeField(null=True, blank=True)
     scan_frequency = models.IntegerField(default=24, help_text="Scan frequency in hours")
+    next_scan_at = models.DateTimeField(null=True, blank=True, default=timezone.now,
+                                      help_text="When the scheduler scans this source next; empty to disable")
+    scan_failures = models.IntegerField(default=0, help_text="Consecutive failed scans or connection checks")
     integration_data = models.JSONField(default=dict, blank=True,
                                       help_text="Additional integration-specific data")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -54,7 +57,8 @@ class DataSource(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['organization', 'type']),
-            models.Index(fields=['connection_status'])
+            models.Index(fields=['connection_status']),
+            models.Index(fields=['next_scan_at', 'connection_status'])
         ]
         verbose_name = 'Data Source'
         verbose_name_plural = 'Data Sources'
@@ -98,7 +102,8 @@ class CloudResource(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['data_source', 'type']),
-            models.Index(fields=['resource_id'])
+            models.Index(fields=['resource_id']),
+            models.Index(fields=['created_at', 'id'])
         ]
         verbose_name = 'Cloud Resource'
         verbose_name_plural = 'Cloud Resources'
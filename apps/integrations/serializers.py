@@ -0,0 +1,115 @@
+from rest_framework import serializers
+
+from backend.api import SparseFieldsModelSerializer
+from backend.slim import Column, DateTimeColumn, JSONColumn, Nested, SlimSerializer
+from .models.models import CloudResource, DataSource, GitRepository
+
+
+class DataSourceSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataSource
+        fields = ['id', 'name', 'type']
+
+
+class GitRepositorySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GitRepository
+        fields = ['id', 'full_name', 'provider']
+
+
+class DataSourceSerializer(SparseFieldsModelSerializer):
+    # credentials is never serialized.
+    class Meta:
+        model = DataSource
+        fields = [
+            'id', 'name', 'description', 'type', 'credentials_metadata', 'created_by',
+            'connection_status', 'last_scan_at', 'scan_frequency', 'next_scan_at',
+            'integration_data', 'created_at', 'updated_at',
+        ]
+
+
+class CloudResourceSerializer(SparseFieldsModelSerializer):
+    data_source = DataSourceSummarySerializer(read_only=True)
+
+    class Meta:
+        model = CloudResource
+        fields = [
+            'id', 'resource_id', 'name', 'cloud_provider', 'type', 'specific_type', 'location',
+            'status', 'data_source', 'configuration', 'tags', 'security_score', 'last_accessed_at',
+            'created_at', 'updated_at',
+        ]
+
+
+class GitRepositorySerializer(SparseFieldsModelSerializer):
+    data_source = DataSourceSummarySerializer(read_only=True)
+
+    class Meta:
+        model = GitRepository
+        fields = [
+            'id', 'name', 'full_name', 'url', 'clone_url', 'description', 'default_branch',
+            'visibility', 'provider', 'owner', 'last_scanned_at', 'last_commit_at', 'data_source',
+            'security_insights', 'repository_metadata', 'has_security_issues', 'is_archived',
+            'created_at', 'updated_at',
+        ]
+
+
+class DataSourceListSerializer(SlimSerializer):
+    fields = {
+        'id': Column('id'),
+        'name': Column('name'),
+        'description': Column('description'),
+        'type': Column('type'),
+        'credentials_metadata': JSONColumn('credentials_metadata'),
+        'created_by': Column('created_by'),
+        'connection_status': Column('connection_status'),
+        'last_scan_at': DateTimeColumn('last_scan_at'),
+        'scan_frequency': Column('scan_frequency'),
+        'next_scan_at': DateTimeColumn('next_scan_at'),
+        'integration_data': JSONColumn('integration_data'),
+        'created_at': DateTimeColumn('created_at'),
+        'updated_at': DateTimeColumn('updated_at'),
+    }
+
+
+class CloudResourceListSerializer(SlimSerializer):
+    fields = {
+        'id': Column('id'),
+        'resource_id': Column('resource_id'),
+        'name': Column('name'),
+        'cloud_provider': Column('cloud_provider'),
+        'type': Column('type'),
+        'specific_type': Column('specific_type'),
+        'location': Column('location'),
+        'status': Column('status'),
+        'data_source': Nested('data_source', ['id', 'name', 'type']),
+        'configuration': JSONColumn('configuration'),
+        'tags': JSONColumn('tags'),
+        'security_score': Column('security_score'),
+        'last_accessed_at': DateTimeColumn('last_accessed_at'),
+        'created_at': DateTimeColumn('created_at'),
+        'updated_at': DateTimeColumn('updated_at'),
+    }
+
+
+class GitRepositoryListSerializer(SlimSerializer):
+    fields = {
+        'id': Column('id'),
+        'name': Column('name'),
+        'full_name': Column('full_name'),
+        'url': Column('url'),
+        'clone_url': Column('clone_url'),
+        'description': Column('description'),
+        'default_branch': Column('default_branch'),
+        'visibility': Column('visibility'),
+        'provider': Column('provider'),
+        'owner': Column('owner'),
+        'last_scanned_at': DateTimeColumn('last_scanned_at'),
+        'last_commit_at': DateTimeColumn('last_commit_at'),
+        'data_source': Nested('data_source', ['id', 'name', 'type']),
+        'security_insights': JSONColumn('security_insights'),
+        'repository_metadata': JSONColumn('repository_metadata'),
+        'has_security_issues': Column('has_security_issues'),
+        'is_archived': Column('is_archived'),
+        'created_at': DateTimeColumn('created_at'),
+        'updated_at': DateTimeColumn('updated_at'),
+    }
@@ -0,0 +1,10 @@
+from rest_framework.routers import SimpleRouter
+
+from .views.views import CloudResourceViewSet, DataSourceViewSet, GitRepositoryViewSet
+
+router = SimpleRouter()
+router.register('data-sources', DataSourceViewSet, basename='data_source')
+router.register('cloud-resources', CloudResourceViewSet, basename='cloud_resource')
+router.register('repositories', GitRepositoryViewSet, basename='git_repository')
+
+urlpatterns = router.urls
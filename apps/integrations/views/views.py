@@ -1,27 +1,50 @@
-from django.shortcuts import render
-from django.contrib.auth import authenticate
-from django.core.exceptions import ValidationError
-from rest_framework import status, permissions
-from rest_framework.response import Response
-from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
-from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-import requests
-import json
-import logging
-import os
-from django.conf import settings
-import urllib.parse
+from backend.api import OrganizationScopedViewSet
 
-from ..models.models import User
+from ..models.models import CloudResource, DataSource, GitRepository
 from ..serializers import (
-    UserRegistrationSerializer, 
-    UserSerializer,
-    GoogleAuthSerializer,
-    GithubAuthSerializer
+    CloudResourceListSerializer,
+    CloudResourceSerializer,
+    DataSourceListSerializer,
+    DataSourceSerializer,
+    GitRepositoryListSerializer,
+    GitRepositorySerializer,
 )
 
-logger = logging.getLogger(__name__)
+
+class DataSourceViewSet(OrganizationScopedViewSet):
+    queryset = DataSource.objects.all()
+    serializer_class = DataSourceSerializer
+    slim_serializer_class = DataSourceListSerializer
+    raw_json_fields = ('credentials_metadata', 'integration_data')
+    filters = {
+        'type': ('type', str),                           # (organization, type)
+        'connection_status': ('connection_status', str),  # (connection_status)
+    }
+
+
+class CloudResourceViewSet(OrganizationScopedViewSet):
+    queryset = CloudResource.objects.all()
+    serializer_class = CloudResourceSerializer
+    slim_serializer_class = CloudResourceListSerializer
+    raw_json_fields = ('configuration', 'tags')
+    organization_lookup = 'data_source__organization'
+    select_related_fields = {'data_source': ['data_source']}
+    filters = {
+        'data_source': ('data_source_id', int),  # (data_source, type)
+        'type': ('type', str),                   # with data_source
+        'resource_id': ('resource_id', str),     # (resource_id)
+    }
+
+
+class GitRepositoryViewSet(OrganizationScopedViewSet):
+    queryset = GitRepository.objects.all()
+    serializer_class = GitRepositorySerializer
+    slim_serializer_class = GitRepositoryListSerializer
+    raw_json_fields = ('security_insights', 'repository_metadata')
+    organization_lookup = 'data_source__organization'
+    select_related_fields = {'data_source': ['data_source']}
+    filters = {
+        'data_source': ('data_source_id', int),  # (data_source, provider)
+        'provider': ('provider', str),           # with data_source
+        'full_name': ('full_name', str),         # (full_name)
+    }
@@ -0,0 +1,312 @@
+"""
+Compiled PolicyRule evaluation for set-at-a-time compliance scans.
+
+evaluation.py interprets a rule's JSON condition for every component it
+checks. The engine does that work once per rule set instead:
+
+- Each condition is compiled once into a filter over a list of
+  components: a comparison becomes one list comprehension over the batch,
+  "all" narrows the batch part by part, "any" and "not" work on the
+  complement. Field paths are split, operators looked up and regexes
+  compiled ahead of time. Components a condition cannot be evaluated on
+  (malformed condition, a value the operator cannot take) are reported as
+  'error', exactly where evaluate() would report them.
+- Rules are indexed by target_component_type ('' and '*' apply to every
+  type) and grouped by target_resource_pattern, compiled to a regex. A
+  component is only matched once per pattern and only evaluated against
+  the rules for its type.
+- evaluate() groups a batch of components by type and runs each rule's
+  filter over the whole group at once.
+
+rule_set() compiles an organization's active rules and keeps the result
+in a process-local cache, validated per call with one aggregate query.
+On PostgreSQL, rules pushdown.translate() can express in SQL are set
+aside in RuleSet.pushed: scans evaluate them in the database, once per
+job, and evaluate() only runs the others.
+Results are the same as evaluation.evaluate() for every rule and
+component; only their order differs.
+"""
+import fnmatch
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.db.models import Count, Max
+
+from . import pushdown
+from .evaluation import _MISSING, OPERATORS
+from .models.models import PolicyRule
+
+RULE_SET_CACHE_SIZE = 64
+
+
+def _raiser(message):
+    def condition_filter(components, errors):
+        for component in components:
+            errors[id(component)] = (component, message)
+        return []
+    return condition_filter
+
+
+def _getter(field):
+    parts = field.split('.')
+
+    def get(component):
+        value = component
+        for part in parts:
+            if isinstance(value, dict) and part in value:
+                value = value[part]
+            else:
+                return _MISSING
+        return value
+    return get
+
+
+def _compile_leaf(condition, rule_type):
+    try:
+        field = condition['field']
+    except (KeyError, TypeError):
+        return _raiser(f"Condition without a field: {condition!r}")
+    get = _getter(field)
+    # Top-level columns are read with dict.get, inline in the loops below.
+    name = None if '.' in field else field
+    op = condition.get('op')
+
+    if op is None:
+        if rule_type == 'existence':
+            op = 'missing'
+        else:
+            return _raiser(f"Condition on {field} without an op")
+    if op == 'exists':
+        expected = bool(condition.get('value', True))
+        return lambda components, errors: [
+            component for component in components if (get(component) is not _MISSING) == expected
+        ]
+    if op == 'missing':
+        if name is not None:
+            return lambda components, errors: [
+                component for component in components if component.get(name) is None
+            ]
+        return lambda components, errors: [
+            component for component in components if get(component) in (_MISSING, None)
+        ]
+    if op not in OPERATORS:
+        return _raiser(f"Unknown op {op!r}")
+
+    compare = OPERATORS[op]
+    expected = condition.get('value')
+    if op == 'matches' and isinstance(expected, str):
+        try:
+            pattern = re.compile(expected)
+        except re.error:
+            # Reported by re.search for each row with a value, as evaluate() does.
+            pass
+        else:
+            compare, expected = (lambda actual, pattern: pattern.search(str(actual)) is not None), pattern
+    # Only an explicit comparison with null can match a missing field.
+    null_match = op == 'eq' and expected is None
+
+    def test(component):
+        actual = get(component)
+        if actual is _MISSING or actual is None:
+            return null_match
+        return compare(actual, expected)
+
+    if null_match:
+        fast = None
+    elif name is not None:
+        def fast(components):
+            return [
+                component for component in components
+                if (actual := component.get(name)) is not None and compare(actual, expected)
+            ]
+    else:
+        def fast(components):
+            return [component for component in components if test(component)]
+
+    def condition_filter(components, errors):
+        if fast is not None:
+            try:
+                return fast(components)
+            except (TypeError, re.error):
+                # Some row has a value the operator cannot take.
+                pass
+        matched = []
+        for component in components:
+            try:
+                if test(component):
+                    matched.append(component)
+            except (TypeError, re.error) as e:
+                errors[id(component)] = (component, f"Cannot apply {op} to {field}: {e}")
+        return matched
+    return condition_filter
+
+
+def _all(parts):
+    def condition_filter(components, errors):
+        # Each part only sees the rows every earlier part matched.
+        for part in parts:
+            if not components:
+                break
+            components = part(components, errors)
+        return components
+    return condition_filter
+
+
+def _any(parts):
+    def condition_filter(components, errors):
+        matched = set()
+        remaining = components
+        for part in parts:
+            if not remaining:
+                break
+            matched.update(id(component) for component in part(remaining, errors))
+            remaining = [
+                component for component in remaining if id(component) not in matched and id(component) not in errors
+            ]
+        return [component for component in components if id(component) in matched]
+    return condition_filter
+
+
+def _not(part):
+    def condition_filter(components, errors):
+        matched = {id(component) for component in part(components, errors)}
+        return [
+            component for component in components if id(component) not in matched and id(component) not in errors
+        ]
+    return condition_filter
+
+
+def compile_condition(condition, rule_type='condition'):
+    """
+    Compile a rule condition into a filter(components, errors) returning
+    the components that violate it, in order. A component the condition
+    cannot be evaluated on is left out and recorded as
+    errors[id(component)] = (component, message).
+    """
+    if not isinstance(condition, dict):
+        return _raiser(f"Condition without a field: {condition!r}")
+    if 'all' in condition:
+        return _all([compile_condition(part, rule_type) for part in condition['all']])
+    if 'any' in condition:
+        return _any([compile_condition(part, rule_type) for part in condition['any']])
+    if 'not' in condition:
+        return _not(compile_condition(condition['not'], rule_type))
+    return _compile_leaf(condition, rule_type)
+
+
+class CompiledRule:
+    __slots__ = ('rule', 'filter', 'details')
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.filter = compile_condition(rule.condition, rule.rule_type)
+        self.details = {'rule': rule.name, 'condition': rule.condition}
+
+    def violations(self, components):
+        """
+        Yield (component, status, details) for the components this rule
+        flags.
+        """
+        errors = {}
+        for component in self.filter(components, errors):
+            yield component, 'non_compliant', self.details
+        for component, message in errors.values():
+            yield component, 'error', {'rule': self.rule.name, 'error': message}
+
+
+def _pattern_matcher(pattern):
+    match = re.compile(fnmatch.translate(pattern)).match
+    return lambda component: match(component.get('path') or '') is not None or match(component['name']) is not None
+
+
+class RuleSet:
+    def __init__(self, rules, pushed=()):
+        self.any_type = []
+        self.by_type = defaultdict(list)
+        for rule in rules:
+            compiled = CompiledRule(rule)
+            target_type = rule.target_component_type
+            if not target_type or target_type == '*':
+                self.any_type.append(compiled)
+            else:
+                self.by_type[target_type].append(compiled)
+        self.pushed = list(pushed)
+        self._plans = {}
+
+    def __len__(self):
+        # The rules evaluate() runs; pushed rules are not counted.
+        return len(self.any_type) + sum(len(rules) for rules in self.by_type.values())
+
+    def plan(self, component_type):
+        """
+        [(matcher or None, [CompiledRule])] for components of a type.
+        """
+        plan = self._plans.get(component_type)
+        if plan is None:
+            by_pattern = {}
+            for compiled in self.any_type + self.by_type.get(component_type, []):
+                by_pattern.setdefault(compiled.rule.target_resource_pattern or '', []).append(compiled)
+            plan = self._plans[component_type] = [
+                (_pattern_matcher(pattern) if pattern else None, rules) for pattern, rules in by_pattern.items()
+            ]
+        return plan
+
+    def evaluate(self, components):
+        """
+        Yield (component, rule, status, details) for every violation and
+        evaluation error in a batch of component rows.
+        """
+        by_type = defaultdict(list)
+        for component in components:
+            by_type[component['type']].append(component)
+        for component_type, batch in by_type.items():
+            for matcher, rules in self.plan(component_type):
+                targets = batch if matcher is None else [component for component in batch if matcher(component)]
+                if not targets:
+                    continue
+                for compiled in rules:
+                    for component, status, details in compiled.violations(targets):
+                        yield component, compiled.rule, status, details
+
+
+def active_rules(organization_id):
+    return PolicyRule.objects.filter(
+        is_active=True, policy__is_active=True, policy__organization_id=organization_id,
+    )
+
+
+_rule_sets = OrderedDict()
+_rule_sets_lock = threading.Lock()
+
+
+def rule_set(organization_id):
+    """
+    The compiled active rules of an organization. Recompiled when a rule
+    or policy was added, removed or saved since.
+    """
+    rules = active_rules(organization_id)
+    use_pushdown = pushdown.enabled()
+    fingerprint = (use_pushdown,) + tuple(rules.aggregate(
+        count=Count('pk'), rules=Max('updated_at'), policies=Max('policy__updated_at'),
+    ).values())
+    with _rule_sets_lock:
+        cached = _rule_sets.get(organization_id)
+        if cached is not None and cached[0] == fingerprint:
+            _rule_sets.move_to_end(organization_id)
+            return cached[1]
+
+    evaluated, pushed = [], []
+    for rule in rules:
+        translation = pushdown.translate(rule) if use_pushdown else None
+        if translation is None:
+            evaluated.append(rule)
+        else:
+            pushed.append(translation)
+    compiled = RuleSet(evaluated, pushed)
+    with _rule_sets_lock:
+        _rule_sets[organization_id] = (fingerprint, compiled)
+        _rule_sets.move_to_end(organization_id)
+        while len(_rule_sets) > RULE_SET_CACHE_SIZE:
+            _rule_sets.popitem(last=False)
+    return compiled
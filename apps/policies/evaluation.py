@@ -0,0 +1,108 @@
+"""
+PolicyRule evaluation against software components.
+
+A rule applies to a component when target_component_type is empty, "*"
+or the component's type, and target_resource_pattern (a glob, matched
+against the component path or name) is empty or matches. Its condition
+describes a violation:
+
+    {"field": "security_score", "op": "lt", "value": 50}
+    {"field": "metadata.encryption", "op": "eq", "value": false}
+    {"field": "tags", "op": "lacks", "value": "owner"}
+    {"all": [...]} / {"any": [...]} / {"not": {...}}
+
+Fields are dotted paths into the component row; JSON columns can be
+walked into. A component that satisfies the condition is non-compliant.
+Existence rules without an "op" flag a missing field.
+
+This is the reference interpreter, one rule and one component at a time.
+Scans use the compiled engine in engine.py, which gives the same results.
+"""
+import fnmatch
+import operator
+import re
+
+_MISSING = object()
+
+OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'in': lambda actual, expected: actual in expected,
+    'not_in': lambda actual, expected: actual not in expected,
+    'contains': lambda actual, expected: expected in actual,
+    'lacks': lambda actual, expected: expected not in actual,
+    'matches': lambda actual, expected: re.search(expected, str(actual)) is not None,
+}
+
+
+class RuleError(ValueError):
+    pass
+
+
+def resolve(row, path):
+    value = row
+    for part in path.split('.'):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def rule_applies(rule, component):
+    target_type = rule.target_component_type
+    if target_type and target_type != '*' and target_type != component['type']:
+        return False
+    pattern = rule.target_resource_pattern
+    if pattern:
+        return fnmatch.fnmatch(component.get('path') or '', pattern) or fnmatch.fnmatch(component['name'], pattern)
+    return True
+
+
+def violates(condition, component, rule_type='condition'):
+    if 'all' in condition:
+        return all(violates(part, component, rule_type) for part in condition['all'])
+    if 'any' in condition:
+        return any(violates(part, component, rule_type) for part in condition['any'])
+    if 'not' in condition:
+        return not violates(condition['not'], component, rule_type)
+
+    try:
+        field = condition['field']
+    except (KeyError, TypeError):
+        raise RuleError(f"Condition without a field: {condition!r}")
+    actual = resolve(component, field)
+    op = condition.get('op')
+    if op is None:
+        if rule_type == 'existence':
+            return actual is _MISSING or actual is None
+        raise RuleError(f"Condition on {field} without an op")
+    if op == 'exists':
+        return (actual is not _MISSING) == bool(condition.get('value', True))
+    if op == 'missing':
+        return actual is _MISSING or actual is None
+    if op not in OPERATORS:
+        raise RuleError(f"Unknown op {op!r}")
+    if actual is _MISSING or actual is None:
+        # Only an explicit comparison with null can match a missing field.
+        return op == 'eq' and condition.get('value') is None
+    try:
+        return OPERATORS[op](actual, condition.get('value'))
+    except (TypeError, re.error) as e:
+        raise RuleError(f"Cannot apply {op} to {field}: {e}")
+
+
+def evaluate(rule, component):
+    """
+    Return (status, details) for one rule and one component.
+    """
+    try:
+        if violates(rule.condition, component, rule.rule_type):
+            return 'non_compliant', {'rule': rule.name, 'condition': rule.condition}
+        return 'compliant', {}
+    except RuleError as e:
+        return 'error', {'rule': rule.name, 'error': str(e)}
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("policies", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scanjob",
+            name="items_total",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scanjob",
+            name="chunks_total",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scanjob",
+            name="chunks_completed",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scanjob",
+            name="commit_sha",
+            field=models.CharField(blank=True, help_text="Source revision scanned, if any", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="scanjob",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True,
+                help_text="Derived from (data source, commit, scan type)",
+                max_length=64,
+                null=True,
+                unique=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("policies", "0004_complianceresult_created_at_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="scanjob",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("idempotency_key__isnull", True), ("status__in", ["pending", "running"])
+                ),
+                fields=("data_source", "scan_type"),
+                name="scan_job_one_active_without_commit",
+            ),
+        ),
+    ]
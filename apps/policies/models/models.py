@@ -3,6 +3,7 @@ from apps.users.models.models import Organization, User
 from apps.integrations.models.models import DataSource
 from apps.assets.models.models import SoftwareComponent
 from apps.products.models.models import ProductCatalog
+from backend.invalidation import InvalidatingQuerySet
 
 class SecurityPolicy(models.Model):
     """
@@ -138,6 +139,12 @@ class ScanJob(models.Model):
     scheduled = models.BooleanField(default=False, help_text="Is this a scheduled scan")
     items_scanned = models.IntegerField(default=0)
     issues_found = models.IntegerField(default=0)
+    items_total = models.IntegerField(default=0)
+    chunks_total = models.IntegerField(default=0)
+    chunks_completed = models.IntegerField(default=0)
+    commit_sha = models.CharField(max_length=64, blank=True, help_text="Source revision scanned, if any")
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True,
+                                       help_text="Derived from (data source, commit, scan type)")
     started_at = models.DateTimeField()
     completed_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(blank=True)
@@ -154,6 +161,15 @@ class ScanJob(models.Model):
             models.Index(fields=['data_source', 'status']),
             models.Index(fields=['scan_type'])
         ]
+        constraints = [
+            # Scans without a commit have no idempotency key: at most one
+            # of them is pending or running per data source and type.
+            models.UniqueConstraint(
+                fields=['data_source', 'scan_type'],
+                condition=models.Q(idempotency_key__isnull=True, status__in=['pending', 'running']),
+                name='scan_job_one_active_without_commit',
+            ),
+        ]
         verbose_name = 'Scan Job'
         verbose_name_plural = 'Scan Jobs'
 
@@ -197,6 +213,8 @@ class ComplianceResult(models.Model):
     checked_at = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = InvalidatingQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.component.name} - {self.policy.name}: {self.status}"
@@ -207,7 +225,8 @@ class ComplianceResult(models.Model):
         indexes = [
             models.Index(fields=['component', 'status']),
             models.Index(fields=['policy']),
-            models.Index(fields=['scan_job'])
+            models.Index(fields=['scan_job']),
+            models.Index(fields=['created_at', 'id'])
         ]
         verbose_name = 'Compliance Result'
         verbose_name_plural = 'Compliance Results' 
\ No newline at end of file
@@ -0,0 +1,347 @@
+"""
+SQL push-down of PolicyRule conditions.
+
+Most rule conditions are plain comparisons on component columns and JSON
+keys ("security_score < 50", "metadata.encryption == false", "tags lacks
+owner"). translate() turns such a rule into SQL over software_component,
+and insert_violations() evaluates it for a whole scan job inside
+PostgreSQL, with one INSERT ... SELECT into compliance_result, without
+reading the components into Python.
+
+A translation has a predicate and a guard:
+- the predicate is true exactly for the rows evaluation.evaluate() flags
+  as non-compliant, wherever the guard is true;
+- the guard leaves out the rows Python could not compare (e.g. a JSON
+  value "high" against < 50, which evaluate() reports as an 'error').
+  The scan evaluates those few rows with the compiled engine, see
+  scanning.run_pushdown(). Conditions on typed columns need no guard.
+Both are two-valued (never NULL), so they compose with AND, OR and NOT
+exactly like all/any/not in Python.
+
+Comparisons follow Python's semantics: True == 1, strings are ordered by
+code point (COLLATE "C"), only an explicit comparison with null matches
+a missing value. Anything else (regex matches, comparisons with lists or
+objects, unknown fields or ops, bracket globs) is not translated and the
+rule is evaluated in Python.
+
+CloudResource rows are not scanned: ComplianceResult belongs to a
+SoftwareComponent.
+"""
+import json
+import math
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from apps.assets.models.models import SoftwareComponent
+from backend.invalidation import invalidate
+
+from .models.models import ComplianceResult
+
+# Typed columns of the scanned component rows (scanning.COMPONENT_FIELDS).
+COLUMNS = {
+    'id': 'number',
+    'security_score': 'number',
+    'repository_id': 'number',
+    'name': 'text',
+    'type': 'text',
+    'path': 'text',
+    'resource_id': 'text',
+    'language': 'text',
+    'version': 'text',
+    'is_ai_generated': 'bool',
+}
+JSON_COLUMNS = ('metadata', 'tags')
+ORDER_OPS = {'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>='}
+
+TRUE = ('TRUE', [])
+FALSE = ('FALSE', [])
+
+
+def enabled():
+    return getattr(settings, 'SCAN_SQL_PUSHDOWN', True) and connection.vendor == 'postgresql'
+
+
+def _q(template, *args):
+    """
+    Fill the {} slots of template with SQL fragments (sql, params) or
+    values, which become %s parameters.
+    """
+    sql, params = [], []
+    for arg in args:
+        if isinstance(arg, tuple):
+            sql.append(arg[0])
+            params.extend(arg[1])
+        else:
+            sql.append('%s')
+            params.append(arg)
+    return template.format(*sql), params
+
+
+def _join(operator, fragments, empty):
+    if not fragments:
+        return empty
+    if len(fragments) == 1:
+        return fragments[0]
+    return _q('(' + f' {operator} '.join(['{}'] * len(fragments)) + ')', *fragments)
+
+
+def _values(values):
+    return ', '.join(['%s'] * len(values)), list(values)
+
+
+def _column(name):
+    return f'c."{name}"', []
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _column_values(kind, values):
+    # The values a column of this kind can be equal to in Python.
+    if kind == 'number':
+        return [int(v) if isinstance(v, bool) else v for v in values if isinstance(v, bool) or _is_number(v)]
+    if kind == 'text':
+        return [v for v in values if isinstance(v, str)]
+    return [bool(v) for v in values if (isinstance(v, bool) or _is_number(v)) and v in (0, 1)]
+
+
+def _column_leaf(name, kind, op, condition):
+    column = _column(name)
+    expected = condition.get('value')
+    if op == 'exists':
+        # Every scanned row has its columns, possibly null.
+        return TRUE if bool(condition.get('value', True)) else FALSE
+    if op == 'missing' or (op == 'eq' and expected is None):
+        return _q('{} IS NULL', column)
+    if op in ('eq', 'ne', 'in', 'not_in'):
+        if op in ('in', 'not_in') and not isinstance(expected, list):
+            # Substring or key membership.
+            return None
+        values = _column_values(kind, [expected] if op in ('eq', 'ne') else expected)
+        if op in ('eq', 'in'):
+            return _q('COALESCE({} IN ({}), FALSE)', column, _values(values)) if values else FALSE
+        if not values:
+            return _q('{} IS NOT NULL', column)
+        return _q('COALESCE({} NOT IN ({}), FALSE)', column, _values(values))
+    if op in ORDER_OPS:
+        operator = ORDER_OPS[op]
+        if kind == 'text' and isinstance(expected, str):
+            return _q('COALESCE({} COLLATE "C" ' + operator + ' {}, FALSE)', column, expected)
+        if kind != 'text' and (isinstance(expected, bool) or _is_number(expected)):
+            expected = int(expected) if isinstance(expected, bool) else expected
+            cast = '::int' if kind == 'bool' else ''
+            return _q('COALESCE({}' + cast + ' ' + operator + ' {}, FALSE)', column, expected)
+        return None
+    if op in ('contains', 'lacks') and kind == 'text' and isinstance(expected, str):
+        test = '> 0' if op == 'contains' else '= 0'
+        return _q('COALESCE(strpos({}, {}) ' + test + ', FALSE)', column, expected)
+    return None
+
+
+def _json_values(values):
+    # The JSON values equal to these in Python, or None if one is a list
+    # or object (compared element by element).
+    literals = []
+    for value in values:
+        if isinstance(value, (list, dict)):
+            return None
+        if isinstance(value, bool):
+            literals += [json.dumps(value), json.dumps(int(value))]
+        elif _is_number(value):
+            literals.append(json.dumps(value))
+            if value in (0, 1):
+                literals.append(json.dumps(value == 1))
+        elif isinstance(value, str):
+            literals.append(json.dumps(value))
+    return literals
+
+
+def _json_in(value, literals):
+    if not literals:
+        return FALSE
+    return _q('COALESCE({} IN ({}), FALSE)', value, (', '.join(['%s::jsonb'] * len(literals)), literals))
+
+
+def _json_typed(value, types):
+    return _q("({} IS NULL OR jsonb_typeof({}) IN (" + ', '.join(f"'{t}'" for t in types + ('null',)) + "))",
+              value, value)
+
+
+def _json_leaf(value, op, condition):
+    """
+    (guard or None, predicate) for a condition on a JSON value.
+    """
+    expected = condition.get('value')
+    nullish = _q("({} IS NULL OR {} = 'null'::jsonb)", value, value)
+    if op == 'exists':
+        return None, _q('{} IS NOT NULL' if bool(condition.get('value', True)) else '{} IS NULL', value)
+    if op == 'missing' or (op == 'eq' and expected is None):
+        return None, nullish
+    if op in ('eq', 'ne', 'in', 'not_in'):
+        if op in ('in', 'not_in') and not isinstance(expected, list):
+            return None
+        literals = _json_values([expected] if op in ('eq', 'ne') else expected)
+        if literals is None:
+            return None
+        matches = _json_in(value, literals)
+        if op in ('eq', 'in'):
+            return None, matches
+        return None, _q('(NOT {} AND NOT {})', nullish, matches)
+    if op in ORDER_OPS:
+        operator = ORDER_OPS[op]
+        if isinstance(expected, bool) or _is_number(expected):
+            expected = int(expected) if isinstance(expected, bool) else expected
+            return _json_typed(value, ('number', 'boolean')), _q(
+                "COALESCE(CASE jsonb_typeof({}) WHEN 'number' THEN ({})::float8 " + operator + " {} "
+                "WHEN 'boolean' THEN ({})::boolean::int " + operator + " {} ELSE FALSE END, FALSE)",
+                value, value, expected, value, expected,
+            )
+        if isinstance(expected, str):
+            return _json_typed(value, ('string',)), _q(
+                "COALESCE(jsonb_typeof({}) = 'string' AND ({} #>> '{{}}') COLLATE \"C\" " + operator + " {}, FALSE)",
+                value, value, expected,
+            )
+        return None
+    if op in ('contains', 'lacks') and isinstance(expected, str):
+        # Substring of a string, element of an array, key of an object.
+        if op == 'contains':
+            template = ("COALESCE(CASE jsonb_typeof({}) WHEN 'string' THEN strpos({} #>> '{{}}', {}) > 0 "
+                        "WHEN 'array' THEN {} ? {} WHEN 'object' THEN {} ? {} ELSE FALSE END, FALSE)")
+        else:
+            template = ("COALESCE(CASE jsonb_typeof({}) WHEN 'string' THEN strpos({} #>> '{{}}', {}) = 0 "
+                        "WHEN 'array' THEN NOT {} ? {} WHEN 'object' THEN NOT {} ? {} ELSE FALSE END, FALSE)")
+        return _json_typed(value, ('string', 'array', 'object')), _q(
+            template, value, value, expected, value, expected, value, expected,
+        )
+    return None
+
+
+def _json_value(column, path):
+    if not path:
+        return _column(column)
+    if any(re.fullmatch(r'\s*[-+]?\d+\s*', part) for part in path):
+        # #> would index into arrays, which field paths never do.
+        return None
+    return _q('({} #> {}::text[])', _column(column), path)
+
+
+def _leaf(condition, rule_type):
+    field = condition.get('field')
+    if not isinstance(field, str):
+        return None
+    op = condition.get('op')
+    if op is None:
+        if rule_type != 'existence':
+            return None
+        op = 'missing'
+    column, *path = field.split('.')
+    if column in JSON_COLUMNS:
+        value = _json_value(column, path)
+        return None if value is None else _json_leaf(value, op, condition)
+    if column in COLUMNS and not path:
+        predicate = _column_leaf(column, COLUMNS[column], op, condition)
+        return None if predicate is None else (None, predicate)
+    return None
+
+
+def _translate(condition, rule_type):
+    """
+    (guard or None, predicate) for a condition, or None.
+    """
+    if not isinstance(condition, dict):
+        return None
+    for key, operator, empty in (('all', 'AND', TRUE), ('any', 'OR', FALSE)):
+        if key in condition:
+            if not isinstance(condition[key], list):
+                return None
+            parts = [_translate(part, rule_type) for part in condition[key]]
+            if any(part is None for part in parts):
+                return None
+            guards = [guard for guard, _ in parts if guard is not None]
+            return _join('AND', guards, None), _join(operator, [predicate for _, predicate in parts], empty)
+    if 'not' in condition:
+        part = _translate(condition['not'], rule_type)
+        return None if part is None else (part[0], _q('NOT {}', part[1]))
+    return _leaf(condition, rule_type)
+
+
+def _applies(rule):
+    fragments = []
+    target_type = rule.target_component_type
+    if target_type and target_type != '*':
+        fragments.append(_q('c."type" = {}', target_type))
+    pattern = rule.target_resource_pattern
+    if pattern:
+        if '[' in pattern:
+            return None
+        like = pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        like = like.replace('*', '%').replace('?', '_')
+        fragments.append(_q('(c."path" LIKE {} OR c."name" LIKE {})', like, like))
+    return _join('AND', fragments, TRUE)
+
+
+class Translation:
+    __slots__ = ('rule', 'applies', 'guard', 'predicate')
+
+    def __init__(self, rule, applies, guard, predicate):
+        self.rule = rule
+        self.applies = applies
+        self.guard = guard
+        self.predicate = predicate
+
+
+def translate(rule):
+    """
+    The SQL form of a rule, or None if it has to be evaluated in Python.
+    """
+    applies = _applies(rule)
+    condition = _translate(rule.condition, rule.rule_type)
+    if applies is None or condition is None:
+        return None
+    return Translation(rule, applies, *condition)
+
+
+def _scope(job, translation):
+    return _q('c."data_source_id" = {} AND c."is_active" AND {}', job.data_source_id, translation.applies)
+
+
+def insert_violations(job, translation, checked_at):
+    """
+    Store a ComplianceResult for every active component of the job's data
+    source the rule flags, within its guard, in one statement. Returns the
+    number of results.
+    """
+    rule = translation.rule
+    where = _join('AND', [_scope(job, translation), translation.guard or TRUE, translation.predicate], TRUE)
+    now = timezone.now()
+    sql, params = _q(
+        'INSERT INTO ' + ComplianceResult._meta.db_table + ' (component_id, policy_id, rule_id, scan_job_id, '
+        'status, severity, details, evidence, remediation_steps, is_fixed, checked_at, created_at, updated_at) '
+        "SELECT c.id, {}, {}, {}, 'non_compliant', {}, {}::jsonb, '', {}, FALSE, {}, {}, {} "
+        'FROM ' + SoftwareComponent._meta.db_table + ' c WHERE {}',
+        rule.policy_id, rule.pk, job.pk, rule.severity, json.dumps({'rule': rule.name, 'condition': rule.condition}),
+        rule.remediation, checked_at, now, now, where,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        inserted = cursor.rowcount
+    if inserted:
+        # Every inserted row has the same tags.
+        invalidate(ComplianceResult, [{'policy_id': rule.policy_id, 'product_id': None, 'scan_job_id': job.pk}])
+    return inserted
+
+
+def outside_guard(job, translation):
+    """
+    Subquery of the component ids in scope the guard leaves to Python.
+    """
+    sql, params = _q(
+        'SELECT c.id FROM ' + SoftwareComponent._meta.db_table + ' c WHERE {} AND NOT {}',
+        _scope(job, translation), translation.guard,
+    )
+    return RawSQL(sql, params)
@@ -0,0 +1,262 @@
+"""
+Compliance scan orchestration used by apps/policies/tasks.py.
+
+A scan of a data source is one ScanJob. Its active components are split
+into chunks of SCAN_CHUNK_SIZE ids. Each chunk is evaluated by a
+scan_chunk task (fan-out), and finalize_scans runs once all chunks of
+all jobs are done (fan-in, a Celery chord). Organization scans put the
+chunks of every data source in one chord, so the post-scan work (graph
+refresh) runs once per organization.
+
+Idempotency:
+- A job is keyed by (data source, commit, scan type). Requesting the same
+  scan again returns the existing job unless it failed or was cancelled.
+  Scans without a commit are deduplicated against a pending or running
+  job of the same data source and type, enforced by a partial unique
+  constraint so concurrent requests cannot both create one.
+- A chunk replaces the results it wrote before, so a redelivered chunk
+  (acks_late) does not duplicate ComplianceResult rows.
+
+Rules are evaluated by the compiled engine (engine.py): an organization's
+rule set is compiled once per worker process and each chunk is checked
+set-at-a-time, only against the rules that apply to each component type.
+Rules the engine pushed down to SQL (pushdown.py) are not part of the
+chunks: a scan_pushdown task evaluates them for the whole job in the
+database, one INSERT ... SELECT per rule, and replaces its own results
+when redelivered. Chunks only replace the results of the other rules.
+
+Progress is written once per chunk with a single F() update, and
+recomputed from the stored results when the scan is finalized.
+Only violations and evaluation errors are stored as ComplianceResults.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from apps.assets.models.models import SoftwareComponent
+from apps.integrations.models.models import DataSource
+from apps.visualization.services import refresh_organization_graphs
+
+from . import pushdown
+from .engine import CompiledRule, rule_set
+from .models.models import ComplianceResult, ScanJob
+from .scheduling import record_scan_results
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('pending', 'running')
+RETRYABLE_STATUSES = ('failed', 'cancelled')
+COMPONENT_FIELDS = (
+    'id', 'name', 'type', 'path', 'resource_id', 'metadata', 'language', 'version',
+    'security_score', 'tags', 'is_ai_generated', 'repository_id',
+)
+
+
+def idempotency_key(data_source_id, commit_sha, scan_type):
+    if not commit_sha:
+        return None
+    return hashlib.sha256(f'{data_source_id}:{commit_sha}:{scan_type}'.encode()).hexdigest()
+
+
+def chunk_size():
+    return getattr(settings, 'SCAN_CHUNK_SIZE', 500)
+
+
+def prepare_job(data_source, scan_type='compliance', commit_sha='', initiated_by_id=None, scheduled=False):
+    """
+    Return (job, created). created is False when an equivalent scan exists
+    and nothing needs to be dispatched.
+    """
+    key = idempotency_key(data_source.pk, commit_sha, scan_type)
+    if key is None:
+        existing = _active_job(data_source, scan_type)
+    else:
+        existing = ScanJob.objects.filter(idempotency_key=key).first()
+    if existing is not None:
+        if existing.status not in RETRYABLE_STATUSES:
+            return existing, False
+        # Retry of a failed scan of the same revision reuses its job. The
+        # status filter makes concurrent retries race on the update: only
+        # the one that changed the row dispatches.
+        retried = ScanJob.objects.filter(pk=existing.pk, status__in=RETRYABLE_STATUSES).update(
+            status='pending', error_message='', items_scanned=0, issues_found=0,
+            chunks_completed=0, started_at=timezone.now(), completed_at=None,
+        )
+        existing.refresh_from_db()
+        return existing, retried == 1
+
+    try:
+        with transaction.atomic():
+            job = ScanJob.objects.create(
+                name=f'{data_source.name} {scan_type} scan',
+                scan_type=scan_type,
+                data_source=data_source,
+                commit_sha=commit_sha or '',
+                idempotency_key=key,
+                initiated_by_id=initiated_by_id,
+                scheduled=scheduled,
+                started_at=timezone.now(),
+            )
+    except IntegrityError:
+        # A concurrent request created the same scan: the idempotency key,
+        # or scan_job_one_active_without_commit for scans without a commit.
+        if key is None:
+            existing = _active_job(data_source, scan_type)
+        else:
+            existing = ScanJob.objects.filter(idempotency_key=key).first()
+        if existing is None:
+            raise
+        return existing, False
+    return job, True
+
+
+def _active_job(data_source, scan_type):
+    return ScanJob.objects.filter(
+        data_source=data_source, scan_type=scan_type, idempotency_key__isnull=True, status__in=ACTIVE_STATUSES
+    ).first()
+
+
+def plan_chunks(job):
+    """
+    Split the job's components into chunks and mark it running.
+    """
+    ids = list(
+        SoftwareComponent.objects.filter(data_source_id=job.data_source_id, is_active=True)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    size = chunk_size()
+    chunks = [ids[i:i + size] for i in range(0, len(ids), size)]
+    ScanJob.objects.filter(pk=job.pk).update(
+        status='running', items_total=len(ids), chunks_total=len(chunks), updated_at=timezone.now(),
+    )
+    return chunks
+
+
+def _result(job_id, component, rule, status, details, checked_at):
+    return ComplianceResult(
+        component_id=component['id'],
+        policy_id=rule.policy_id,
+        rule_id=rule.pk,
+        scan_job_id=job_id,
+        status=status,
+        severity=rule.severity,
+        details=details,
+        remediation_steps=rule.remediation,
+        checked_at=checked_at,
+    )
+
+
+def run_chunk(job_id, component_ids):
+    """
+    Evaluate one chunk of a job; returns (items scanned, issues found).
+    """
+    job = ScanJob.objects.select_related('data_source').get(pk=job_id)
+    if job.status not in ACTIVE_STATUSES:
+        return 0, 0
+
+    rules = rule_set(job.data_source.organization_id)
+    # No rows to read when every rule was pushed down to SQL.
+    components = []
+    if len(rules):
+        components = list(SoftwareComponent.objects.filter(pk__in=component_ids).values(*COMPONENT_FIELDS))
+    checked_at = timezone.now()
+    results = [
+        _result(job_id, component, rule, status, details, checked_at)
+        for component, rule, status, details in rules.evaluate(components)
+    ]
+
+    with transaction.atomic():
+        ComplianceResult.objects.filter(scan_job_id=job_id, component_id__in=component_ids).exclude(
+            rule_id__in=[translation.rule.pk for translation in rules.pushed],
+        ).delete()
+        ComplianceResult.objects.bulk_create(results, batch_size=1000)
+        ScanJob.objects.filter(pk=job_id).update(
+            items_scanned=F('items_scanned') + len(component_ids),
+            issues_found=F('issues_found') + len(results),
+            chunks_completed=F('chunks_completed') + 1,
+            updated_at=timezone.now(),
+        )
+    return len(component_ids), len(results)
+
+
+def run_pushdown(job_id):
+    """
+    Evaluate the job's pushed-down rules in the database; returns issues
+    found. The components a rule's guard leaves out are evaluated here
+    with the compiled rule.
+    """
+    job = ScanJob.objects.select_related('data_source').get(pk=job_id)
+    if job.status not in ACTIVE_STATUSES:
+        return 0
+
+    checked_at = timezone.now()
+    issues = 0
+    for translation in rule_set(job.data_source.organization_id).pushed:
+        rule = translation.rule
+        with transaction.atomic():
+            ComplianceResult.objects.filter(scan_job_id=job_id, rule_id=rule.pk).delete()
+            issues += pushdown.insert_violations(job, translation, checked_at)
+            if translation.guard is None:
+                continue
+            components = list(
+                SoftwareComponent.objects.filter(pk__in=pushdown.outside_guard(job, translation))
+                .values(*COMPONENT_FIELDS)
+            )
+            results = [
+                _result(job_id, component, rule, status, details, checked_at)
+                for component, status, details in CompiledRule(rule).violations(components)
+            ]
+            ComplianceResult.objects.bulk_create(results, batch_size=1000)
+            issues += len(results)
+
+    ScanJob.objects.filter(pk=job_id).update(issues_found=F('issues_found') + issues, updated_at=timezone.now())
+    return issues
+
+
+def finalize_jobs(job_ids):
+    """
+    Fan-in: settle counts and status of finished jobs, then refresh each
+    affected organization's graphs once.
+    """
+    now = timezone.now()
+    organizations = set()
+    data_sources = []
+    for job in ScanJob.objects.filter(pk__in=job_ids).select_related('data_source'):
+        if job.status not in ACTIVE_STATUSES:
+            continue
+        by_severity = dict(
+            ComplianceResult.objects.filter(scan_job_id=job.pk)
+            .values_list('severity').annotate(count=Count('pk')).order_by()
+        )
+        ScanJob.objects.filter(pk=job.pk).update(
+            status='completed',
+            completed_at=now,
+            items_scanned=job.items_total,
+            issues_found=sum(by_severity.values()),
+            chunks_completed=job.chunks_total,
+            result={'issues_by_severity': by_severity},
+            updated_at=now,
+        )
+        DataSource.objects.filter(pk=job.data_source_id).update(last_scan_at=now)
+        data_sources.append(job.data_source_id)
+        organizations.add(job.data_source.organization_id)
+    record_scan_results(completed=data_sources, now=now)
+
+    for organization_id in organizations:
+        try:
+            refresh_organization_graphs(organization_id)
+        except Exception as e:
+            logger.error(f"Graph refresh after scan failed for organization {organization_id}: {str(e)}")
+    return sorted(organizations)
+
+
+def fail_jobs(job_ids, error):
+    now = timezone.now()
+    jobs = ScanJob.objects.filter(pk__in=job_ids, status__in=ACTIVE_STATUSES)
+    data_sources = list(jobs.values_list('data_source_id', flat=True))
+    jobs.update(status='failed', error_message=str(error)[:2000], completed_at=now, updated_at=now)
+    record_scan_results(failed=data_sources, now=now)
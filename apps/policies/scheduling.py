@@ -0,0 +1,235 @@
+"""
+Periodic scans driven by DataSource.scan_frequency.
+
+Beat runs schedule_scans (apps/policies/tasks.py) every few minutes. Each
+run selects the due data sources on the (next_scan_at, connection_status)
+index, the most overdue first, and:
+
+- dispatches a scan for each active source, unless the organization or
+  the whole deployment already runs its maximum of concurrent scans. A
+  source over a cap stays due and is picked up by a later run. A batch
+  takes at most MAX_CONCURRENT_SCANS_PER_ORGANIZATION sources of an
+  organization and none of one already at its cap, so a tenant with many
+  overdue sources cannot crowd the others out of it.
+- re-checks the connection of failed and disconnected sources with the
+  check registered for their type (register_connection_check). A source
+  that connects again becomes active and due; otherwise it is checked
+  again after an exponential backoff (BACKOFF_BASE_HOURS doubling per
+  consecutive failure, up to BACKOFF_MAX_HOURS). A failed scan backs its
+  source off the same way; a completed one resets the count.
+
+No check is registered yet: DataSource.credentials are stored encrypted
+and nothing in this tree decrypts them, so no type can be probed. Failed
+and disconnected sources of a type without a check are left out of the
+batches (no check task, no backoff bookkeeping) and wait until they are
+reconnected by hand; being overdue, they are scanned on the next run.
+
+Load is spread in two ways. A dispatched scan starts after a random
+countdown of up to DISPATCH_SPREAD_SECONDS (keep it below the beat
+interval), so a run does not start every scan at once. The next scan is
+then planned scan_frequency hours later, moved by a random JITTER
+fraction of it, so tenants that connected at the same time drift apart
+instead of scanning on the same hour forever.
+
+A source with next_scan_at empty or a scan_frequency of 0 is only
+scanned on request.
+"""
+import logging
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from apps.integrations.models.models import DataSource
+
+from .models.models import ScanJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 200,
+    'MAX_CONCURRENT_SCANS': 20,
+    'MAX_CONCURRENT_SCANS_PER_ORGANIZATION': 3,
+    'JITTER': 0.1,
+    'DISPATCH_SPREAD_SECONDS': 240,
+    'BACKOFF_BASE_HOURS': 1,
+    'BACKOFF_MAX_HOURS': 48,
+    'STALE_SCAN_HOURS': 6,
+}
+
+SCANNABLE_STATUSES = ('active',)
+BACKOFF_STATUSES = ('failed', 'disconnected')
+
+
+def _config(name):
+    return getattr(settings, 'SCAN_SCHEDULER', {}).get(name, DEFAULTS[name])
+
+
+# DataSource.type -> check(data_source) returning whether it connects.
+connection_checks = {}
+
+
+def register_connection_check(source_type):
+    def decorator(check):
+        connection_checks[source_type] = check
+        return check
+    return decorator
+
+
+def next_scan_time(scan_frequency, now):
+    if scan_frequency <= 0:
+        return None
+    interval = timedelta(hours=scan_frequency)
+    return now + interval * (1 + random.uniform(-1, 1) * _config('JITTER'))
+
+
+def backoff_delay(failures):
+    hours = _config('BACKOFF_BASE_HOURS') * 2 ** max(failures - 1, 0)
+    return timedelta(hours=min(hours, _config('BACKOFF_MAX_HOURS')))
+
+
+def running_scans(now):
+    """
+    Return (total, {organization_id: count}) of pending and running scans.
+    Scans that stopped making progress for STALE_SCAN_HOURS are not
+    counted, so a lost job cannot hold a slot forever.
+    """
+    rows = (
+        ScanJob.objects.filter(
+            status__in=('pending', 'running'),
+            updated_at__gte=now - timedelta(hours=_config('STALE_SCAN_HOURS')),
+        )
+        .values_list('data_source__organization_id')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    by_organization = Counter(dict(rows))
+    return sum(by_organization.values()), by_organization
+
+
+def _due(now):
+    """
+    Sources due now: active ones, and backed-off ones whose type has a
+    connection check.
+    """
+    return Q(next_scan_at__lte=now) & (
+        Q(connection_status__in=SCANNABLE_STATUSES)
+        | Q(connection_status__in=BACKOFF_STATUSES, type__in=list(connection_checks))
+    )
+
+
+def _due_ids(now, organization_cap, full_organizations):
+    """
+    Ids of a batch of due sources, the most overdue first. Per organization
+    at most organization_cap active sources are taken, none from the
+    organizations already at their cap.
+    """
+    position = Window(
+        RowNumber(), partition_by=[F('organization_id'), F('connection_status')], order_by=F('next_scan_at').asc(),
+    )
+    return list(
+        DataSource.objects.filter(_due(now))
+        .exclude(connection_status__in=SCANNABLE_STATUSES, organization_id__in=full_organizations)
+        .annotate(position=position)
+        .filter(position__lte=organization_cap)
+        .order_by('next_scan_at')
+        .values_list('pk', flat=True)[:_config('BATCH_SIZE')]
+    )
+
+
+def claim_due_scans(now=None):
+    """
+    Claim the data sources due for a scan or a connection check and move
+    their next_scan_at. Returns ([(data_source_id, countdown seconds)] to
+    scan, [data_source_id] to check).
+
+    Rows are locked with SKIP LOCKED, so overlapping scheduler runs do
+    not claim the same source twice.
+    """
+    now = now or timezone.now()
+    total, by_organization = running_scans(now)
+    global_cap = _config('MAX_CONCURRENT_SCANS')
+    organization_cap = _config('MAX_CONCURRENT_SCANS_PER_ORGANIZATION')
+    spread = _config('DISPATCH_SPREAD_SECONDS')
+    claimed = []
+    checks = []
+
+    full_organizations = [pk for pk, count in by_organization.items() if count >= organization_cap]
+    ids = _due_ids(now, organization_cap, full_organizations)
+    if not ids:
+        return claimed, checks
+
+    with transaction.atomic():
+        # Window functions cannot be combined with FOR UPDATE: lock the
+        # picked rows in a second query, re-checking that they are due.
+        due = (
+            DataSource.objects.select_for_update(skip_locked=True)
+            .filter(_due(now), pk__in=ids)
+            .order_by('next_scan_at')
+            .only('pk', 'organization', 'connection_status', 'scan_frequency', 'scan_failures')
+        )
+        for data_source in due:
+            if data_source.connection_status in BACKOFF_STATUSES:
+                # Planned as failing; a successful check makes it due again.
+                failures = data_source.scan_failures + 1
+                DataSource.objects.filter(pk=data_source.pk).update(
+                    scan_failures=failures, next_scan_at=now + backoff_delay(failures),
+                )
+                checks.append(data_source.pk)
+                continue
+            if total >= global_cap or by_organization[data_source.organization_id] >= organization_cap:
+                continue
+            total += 1
+            by_organization[data_source.organization_id] += 1
+            DataSource.objects.filter(pk=data_source.pk).update(
+                next_scan_at=next_scan_time(data_source.scan_frequency, now),
+            )
+            claimed.append((data_source.pk, random.uniform(0, spread)))
+    return claimed, checks
+
+
+def check_connection(data_source_id, now=None):
+    """
+    Run the connection check of a backed-off data source. Returns True when
+    it connected again: it is then active and due for a scan.
+    """
+    data_source = DataSource.objects.filter(pk=data_source_id, connection_status__in=BACKOFF_STATUSES).first()
+    if data_source is None:
+        return False
+    check = connection_checks.get(data_source.type)
+    if check is None:
+        logger.info(f"check_connection: no connection check for {data_source.type} data source {data_source_id}")
+        return False
+    try:
+        connected = check(data_source)
+    except Exception as e:
+        logger.warning(f"check_connection: data source {data_source_id} check failed: {str(e)}")
+        connected = False
+    if not connected:
+        return False
+    DataSource.objects.filter(pk=data_source_id, connection_status__in=BACKOFF_STATUSES).update(
+        connection_status='active', scan_failures=0, next_scan_at=now or timezone.now(),
+    )
+    return True
+
+
+def record_scan_results(completed=(), failed=(), now=None):
+    """
+    Reset the failure count of data sources whose scan completed and back
+    off those whose scan failed.
+    """
+    now = now or timezone.now()
+    if completed:
+        DataSource.objects.filter(pk__in=completed, scan_failures__gt=0).update(scan_failures=0)
+    for data_source in DataSource.objects.filter(pk__in=failed).only('pk', 'scan_failures', 'next_scan_at'):
+        failures = data_source.scan_failures + 1
+        retry_at = now + backoff_delay(failures)
+        updates = {'scan_failures': failures}
+        if data_source.next_scan_at is not None:
+            updates['next_scan_at'] = max(retry_at, data_source.next_scan_at)
+        DataSource.objects.filter(pk=data_source.pk).update(**updates)
@@ -0,0 +1,105 @@
+from rest_framework import serializers
+
+from apps.assets.serializers import SoftwareComponentSummarySerializer
+from apps.integrations.serializers import DataSourceSummarySerializer
+from backend.api import SparseFieldsModelSerializer
+from backend.slim import Column, DateTimeColumn, JSONColumn, Nested, SlimSerializer
+from .models.models import ComplianceResult, PolicyRule, ScanJob, SecurityPolicy
+
+
+class SecurityPolicySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SecurityPolicy
+        fields = ['id', 'name', 'policy_type']
+
+
+class PolicyRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PolicyRule
+        fields = [
+            'id', 'name', 'description', 'rule_type', 'target_component_type', 'target_resource_pattern',
+            'severity', 'condition', 'remediation', 'is_active', 'is_blocking', 'created_at', 'updated_at',
+        ]
+
+
+class SecurityPolicySerializer(SparseFieldsModelSerializer):
+    rules = PolicyRuleSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = SecurityPolicy
+        fields = [
+            'id', 'name', 'description', 'policy_type', 'severity', 'standard_reference', 'policy_content',
+            'created_by', 'is_active', 'is_system', 'tags', 'products', 'rules', 'created_at', 'updated_at',
+        ]
+
+
+class ScanJobSerializer(SparseFieldsModelSerializer):
+    data_source = DataSourceSummarySerializer(read_only=True)
+
+    class Meta:
+        model = ScanJob
+        fields = [
+            'id', 'name', 'scan_type', 'data_source', 'status', 'configuration', 'result', 'initiated_by',
+            'scheduled', 'items_scanned', 'issues_found', 'items_total', 'chunks_total', 'chunks_completed',
+            'commit_sha', 'started_at', 'completed_at', 'error_message', 'created_at', 'updated_at',
+        ]
+
+
+class ComplianceResultSerializer(SparseFieldsModelSerializer):
+    component = SoftwareComponentSummarySerializer(read_only=True)
+    policy = SecurityPolicySummarySerializer(read_only=True)
+
+    class Meta:
+        model = ComplianceResult
+        fields = [
+            'id', 'component', 'product', 'policy', 'rule', 'scan_job', 'status', 'severity', 'details',
+            'evidence', 'remediation_steps', 'is_fixed', 'fixed_by', 'fixed_at', 'checked_at',
+            'created_at', 'updated_at',
+        ]
+
+
+class ScanJobListSerializer(SlimSerializer):
+    fields = {
+        'id': Column('id'),
+        'name': Column('name'),
+        'scan_type': Column('scan_type'),
+        'data_source': Nested('data_source', ['id', 'name', 'type']),
+        'status': Column('status'),
+        'configuration': JSONColumn('configuration'),
+        'result': JSONColumn('result'),
+        'initiated_by': Column('initiated_by'),
+        'scheduled': Column('scheduled'),
+        'items_scanned': Column('items_scanned'),
+        'issues_found': Column('issues_found'),
+        'items_total': Column('items_total'),
+        'chunks_total': Column('chunks_total'),
+        'chunks_completed': Column('chunks_completed'),
+        'commit_sha': Column('commit_sha'),
+        'started_at': DateTimeColumn('started_at'),
+        'completed_at': DateTimeColumn('completed_at'),
+        'error_message': Column('error_message'),
+        'created_at': DateTimeColumn('created_at'),
+        'updated_at': DateTimeColumn('updated_at'),
+    }
+
+
+class ComplianceResultListSerializer(SlimSerializer):
+    fields = {
+        'id': Column('id'),
+        'component': Nested('component', ['id', 'name', 'type']),
+        'product': Column('product'),
+        'policy': Nested('policy', ['id', 'name', 'policy_type']),
+        'rule': Column('rule'),
+        'scan_job': Column('scan_job'),
+        'status': Column('status'),
+        'severity': Column('severity'),
+        'details': JSONColumn('details'),
+        'evidence': Column('evidence'),
+        'remediation_steps': Column('remediation_steps'),
+        'is_fixed': Column('is_fixed'),
+        'fixed_by': Column('fixed_by'),
+        'fixed_at': DateTimeColumn('fixed_at'),
+        'checked_at': DateTimeColumn('checked_at'),
+        'created_at': DateTimeColumn('created_at'),
+        'updated_at': DateTimeColumn('updated_at'),
+    }
@@ -0,0 +1,111 @@
+import logging
+
+from celery import chord, shared_task
+from django.db import OperationalError
+
+from apps.integrations.models.models import DataSource
+
+from . import pushdown, scanning, scheduling
+
+logger = logging.getLogger(__name__)
+
+# Redis transport: lower numbers are delivered first.
+USER_PRIORITY = 2
+SCHEDULED_PRIORITY = 6
+
+
+def _dispatch(jobs, priority):
+    """
+    Fan out the chunks of freshly prepared jobs, and their pushed-down
+    rules, and fan in on finalize_scans once all of them are done.
+    """
+    if not jobs:
+        return []
+    job_ids = [job.pk for job in jobs]
+    header = [
+        scan_chunk.s(job.pk, chunk).set(priority=priority)
+        for job in jobs
+        for chunk in scanning.plan_chunks(job)
+    ]
+    if pushdown.enabled():
+        header += [scan_pushdown.s(job.pk).set(priority=priority) for job in jobs]
+    body = finalize_scans.si(job_ids).set(priority=priority)
+    if not header:
+        body.delay()
+        return job_ids
+    body.link_error(fail_scans.si(job_ids).set(priority=priority))
+    chord(header)(body)
+    return job_ids
+
+
+@shared_task
+def scan_data_source(data_source_id, scan_type='compliance', commit_sha='', initiated_by_id=None):
+    data_source = DataSource.objects.get(pk=data_source_id)
+    job, created = scanning.prepare_job(
+        data_source, scan_type=scan_type, commit_sha=commit_sha,
+        initiated_by_id=initiated_by_id, scheduled=initiated_by_id is None,
+    )
+    if created:
+        _dispatch([job], USER_PRIORITY if initiated_by_id else SCHEDULED_PRIORITY)
+    else:
+        logger.info(f"scan_data_source: reusing scan job {job.pk} for data source {data_source_id}")
+    return {'job_id': job.pk, 'created': created}
+
+
+@shared_task
+def scan_organization(organization_id, scan_type='compliance', initiated_by_id=None):
+    jobs = []
+    data_sources = DataSource.objects.filter(organization_id=organization_id, connection_status='active')
+    for data_source in data_sources:
+        job, created = scanning.prepare_job(
+            data_source, scan_type=scan_type, initiated_by_id=initiated_by_id,
+            scheduled=initiated_by_id is None,
+        )
+        if created:
+            jobs.append(job)
+    job_ids = _dispatch(jobs, USER_PRIORITY if initiated_by_id else SCHEDULED_PRIORITY)
+    return {'job_ids': job_ids}
+
+
+@shared_task(
+    autoretry_for=(OperationalError,), retry_backoff=True, retry_backoff_max=300, max_retries=5,
+)
+def scan_chunk(job_id, component_ids):
+    items, issues = scanning.run_chunk(job_id, component_ids)
+    return {'items': items, 'issues': issues}
+
+
+@shared_task(
+    autoretry_for=(OperationalError,), retry_backoff=True, retry_backoff_max=300, max_retries=5,
+)
+def scan_pushdown(job_id):
+    issues = scanning.run_pushdown(job_id)
+    return {'issues': issues}
+
+
+@shared_task
+def finalize_scans(job_ids):
+    organizations = scanning.finalize_jobs(job_ids)
+    logger.info(f"finalize_scans: completed jobs {job_ids} for organizations {organizations}")
+    return {'job_ids': job_ids, 'organizations': organizations}
+
+
+@shared_task
+def fail_scans(job_ids):
+    scanning.fail_jobs(job_ids, 'A scan chunk failed')
+    logger.error(f"fail_scans: scan jobs {job_ids} failed")
+
+
+@shared_task
+def check_data_source_connection(data_source_id):
+    return {'connected': scheduling.check_connection(data_source_id)}
+
+
+@shared_task
+def schedule_scans():
+    claimed, checks = scheduling.claim_due_scans()
+    for data_source_id, countdown in claimed:
+        scan_data_source.apply_async((data_source_id,), countdown=countdown, priority=SCHEDULED_PRIORITY)
+    for data_source_id in checks:
+        check_data_source_connection.apply_async((data_source_id,), priority=SCHEDULED_PRIORITY)
+    return {'dispatched': len(claimed), 'checked': len(checks)}
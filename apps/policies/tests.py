@@ -1,3 +1,394 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
 
-# Create your tests here.
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.assets.models.models import SoftwareComponent
+from apps.integrations.models.models import DataSource
+from apps.users.models.models import Organization
+from backend.celery import app as celery_app
+from backend.invalidation import org_tag
+
+from . import engine, evaluation, pushdown, scanning, scheduling, tasks
+from .models.models import ComplianceResult, PolicyRule, ScanJob, SecurityPolicy
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SCAN_CHUNK_SIZE=2)
+class ScanTaskTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+
+    @classmethod
+    def tearDownClass(cls):
+        celery_app.conf.task_always_eager = cls._eager
+        super().tearDownClass()
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+        self.data_source = DataSource.objects.create(
+            name='acme/api', type='github', credentials='-', organization=self.organization,
+            connection_status='active',
+        )
+        for i, score in enumerate([10, 40, 70, 90, 20]):
+            SoftwareComponent.objects.create(
+                name=f'svc-{i}', type='service', path=f'services/svc-{i}', data_source=self.data_source,
+                security_score=score, metadata={},
+            )
+        policy = SecurityPolicy.objects.create(
+            name='Baseline', description='', policy_type='security', policy_content={},
+            organization=self.organization,
+        )
+        PolicyRule.objects.create(
+            policy=policy, name='Low score', description='', rule_type='threshold',
+            target_component_type='service', severity='high',
+            condition={'field': 'security_score', 'op': 'lt', 'value': 50},
+        )
+
+    def test_organization_scan_fans_out_and_in(self):
+        result = tasks.scan_organization.delay(self.organization.pk).get()
+        job = ScanJob.objects.get(pk__in=result['job_ids'])
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.chunks_total, 3)
+        self.assertEqual(job.items_scanned, 5)
+        self.assertEqual(job.issues_found, 3)
+        self.assertEqual(job.result, {'issues_by_severity': {'high': 3}})
+        self.assertEqual(ComplianceResult.objects.filter(scan_job=job, status='non_compliant').count(), 3)
+        self.data_source.refresh_from_db()
+        self.assertIsNotNone(self.data_source.last_scan_at)
+
+    def test_same_commit_is_scanned_once(self):
+        first = tasks.scan_data_source.delay(self.data_source.pk, commit_sha='abc123').get()
+        second = tasks.scan_data_source.delay(self.data_source.pk, commit_sha='abc123').get()
+        self.assertTrue(first['created'])
+        self.assertFalse(second['created'])
+        self.assertEqual(first['job_id'], second['job_id'])
+        self.assertEqual(ComplianceResult.objects.filter(scan_job_id=first['job_id']).count(), 3)
+
+    def test_concurrent_scans_without_a_commit_create_one_job(self):
+        first, created = scanning.prepare_job(self.data_source)
+        # The second request looked for an active job before the first one
+        # created it.
+        lookups = iter([lambda *args: None, scanning._active_job])
+        with mock.patch.object(scanning, '_active_job', side_effect=lambda *args: next(lookups)(*args)):
+            second, second_created = scanning.prepare_job(self.data_source)
+        self.assertEqual((created, second_created), (True, False))
+        self.assertEqual(second.pk, first.pk)
+
+    def test_failed_scan_is_retried_once(self):
+        job, _ = scanning.prepare_job(self.data_source, commit_sha='fed321')
+        ScanJob.objects.filter(pk=job.pk).update(status='failed')
+        retried, created = scanning.prepare_job(self.data_source, commit_sha='fed321')
+        again, created_again = scanning.prepare_job(self.data_source, commit_sha='fed321')
+        self.assertEqual((created, created_again), (True, False))
+        self.assertEqual((retried.pk, retried.status), (job.pk, 'pending'))
+
+    @override_settings(SCAN_SQL_PUSHDOWN=False)
+    def test_redelivered_chunk_does_not_duplicate_results(self):
+        job, _ = scanning.prepare_job(self.data_source, commit_sha='def456')
+        chunks = scanning.plan_chunks(job)
+        scanning.run_chunk(job.pk, chunks[0])
+        scanning.run_chunk(job.pk, chunks[0])
+        expected = SoftwareComponent.objects.filter(pk__in=chunks[0], security_score__lt=50).count()
+        self.assertEqual(ComplianceResult.objects.filter(scan_job=job).count(), expected)
+
+    @override_settings(SCAN_SQL_PUSHDOWN=False)
+    def test_rule_set_is_compiled_once_until_rules_change(self):
+        first = engine.rule_set(self.organization.pk)
+        self.assertIs(engine.rule_set(self.organization.pk), first)
+        rule = PolicyRule.objects.get()
+        rule.condition = {'field': 'security_score', 'op': 'lt', 'value': 30}
+        rule.save()
+        second = engine.rule_set(self.organization.pk)
+        self.assertIsNot(second, first)
+        components = list(SoftwareComponent.objects.values(*scanning.COMPONENT_FIELDS))
+        self.assertEqual(len(list(second.evaluate(components))), 2)
+
+    def scan_results(self):
+        job_id, = tasks.scan_organization.delay(self.organization.pk).get()['job_ids']
+        return {
+            (result.component_id, result.rule_id, result.status, json.dumps(result.details, sort_keys=True))
+            for result in ComplianceResult.objects.filter(scan_job_id=job_id)
+        }
+
+    @skipUnless(connection.vendor == 'postgresql', 'push-down evaluates rules in PostgreSQL')
+    def test_pushed_down_rules_match_python_evaluation(self):
+        for name, values in {
+            'svc-0': {'metadata': {'encryption': False, 'level': 'high'}, 'tags': ['internal'], 'language': 'php'},
+            'svc-1': {'metadata': {'encryption': 0, 'level': 2, 'owner': None}, 'tags': ['owner']},
+            'svc-2': {'metadata': {'encryption': True, 'level': True, 'owner': 'payments'}, 'tags': {'owner': 'x'},
+                      'version': '1.10'},
+            'svc-3': {'metadata': {'level': 5}, 'tags': 'co-owner', 'version': '1.9', 'is_ai_generated': True},
+        }.items():
+            SoftwareComponent.objects.filter(name=name).update(**values)
+        policy = SecurityPolicy.objects.get()
+        for i, condition in enumerate([
+            {'field': 'metadata.encryption', 'op': 'eq', 'value': False},
+            {'field': 'tags', 'op': 'lacks', 'value': 'owner'},
+            {'field': 'metadata.level', 'op': 'lt', 'value': 3},
+            {'all': [
+                {'field': 'version', 'op': 'gt', 'value': '1.2'},
+                {'not': {'field': 'metadata.owner', 'op': 'missing'}},
+            ]},
+            {'any': [
+                {'field': 'language', 'op': 'in', 'value': ['php']},
+                {'field': 'metadata.owner', 'op': 'ne', 'value': 'payments'},
+            ]},
+            {'field': 'is_ai_generated', 'op': 'eq', 'value': 0},
+        ]):
+            PolicyRule.objects.create(
+                policy=policy, name=f'rule-{i}', description='', rule_type='condition', condition=condition,
+                target_resource_pattern='services/*' if i % 2 else '',
+            )
+        PolicyRule.objects.create(
+            policy=policy, name='Owner', description='', rule_type='existence', condition={'field': 'metadata.owner'},
+            target_component_type='service', target_resource_pattern='svc-?',
+        )
+
+        rules = engine.rule_set(self.organization.pk)
+        self.assertEqual((len(rules.pushed), len(rules)), (8, 0))
+        in_sql = self.scan_results()
+        with self.settings(SCAN_SQL_PUSHDOWN=False):
+            in_python = self.scan_results()
+        self.assertEqual(in_sql, in_python)
+        # metadata.level "high" < 3 is left to Python by the guard.
+        self.assertIn('error', {status for _, _, status, _ in in_sql})
+
+    def test_scan_results_bump_group_tags_only(self):
+        with mock.patch('backend.invalidation.bump_tags') as bump:
+            for _ in range(2):
+                tasks.scan_data_source.delay(self.data_source.pk).get()
+        tags = set().union(*(call.args[0] for call in bump.call_args_list))
+        self.assertIn(org_tag(self.organization.pk, 'compliance'), tags)
+        self.assertFalse([tag for tag in tags if tag.startswith('component:')])
+        # Result deletes stay set-based.
+        self.assertFalse(post_delete.has_listeners(ComplianceResult))
+
+    @skipUnless(connection.vendor == 'postgresql', 'push-down evaluates rules in PostgreSQL')
+    def test_redelivered_pushdown_does_not_duplicate_results(self):
+        job, _ = scanning.prepare_job(self.data_source, commit_sha='ghi789')
+        scanning.plan_chunks(job)
+        self.assertEqual(scanning.run_pushdown(job.pk), 3)
+        scanning.run_pushdown(job.pk)
+        self.assertEqual(ComplianceResult.objects.filter(scan_job=job).count(), 3)
+
+
+class PolicyEngineTests(SimpleTestCase):
+    def rule(self, pk, condition, rule_type='condition', target_type='', pattern=''):
+        return PolicyRule(
+            pk=pk, name=f'rule-{pk}', rule_type=rule_type, condition=condition,
+            target_component_type=target_type, target_resource_pattern=pattern, severity='high',
+        )
+
+    def component(self, pk, type='service', path='', **values):
+        return {'id': pk, 'name': f'svc-{pk}', 'type': type, 'path': path, 'metadata': {}, 'tags': [], **values}
+
+    def interpreted(self, rules, components):
+        results = set()
+        for component in components:
+            for rule in rules:
+                if evaluation.rule_applies(rule, component):
+                    status, details = evaluation.evaluate(rule, component)
+                    if status != 'compliant':
+                        results.add((component['id'], rule.pk, status, str(details)))
+        return results
+
+    def compiled(self, rules, components):
+        return {
+            (component['id'], rule.pk, status, str(details))
+            for component, rule, status, details in engine.RuleSet(rules).evaluate(components)
+        }
+
+    def test_matches_the_interpreter(self):
+        rules = [
+            self.rule(1, {'field': 'security_score', 'op': 'lt', 'value': 50}, target_type='service'),
+            self.rule(2, {'all': [
+                {'field': 'metadata.encryption', 'op': 'eq', 'value': False},
+                {'not': {'field': 'tags', 'op': 'contains', 'value': 'internal'}},
+            ]}),
+            self.rule(3, {'any': [
+                {'field': 'language', 'op': 'in', 'value': ['php', 'perl']},
+                {'field': 'name', 'op': 'matches', 'value': '-[13]$'},
+            ]}, target_type='*', pattern='services/*'),
+            self.rule(4, {'field': 'metadata.owner'}, rule_type='existence', target_type='library'),
+            self.rule(5, {'field': 'version', 'op': 'bogus'}, target_type='library'),
+            self.rule(6, {'field': 'metadata.owner', 'op': 'eq', 'value': None}, pattern='svc-2'),
+        ]
+        components = [
+            self.component(1, path='services/svc-1', security_score=10, language='php',
+                           metadata={'encryption': False}),
+            self.component(2, path='services/svc-2', security_score=80, tags=['internal'],
+                           metadata={'encryption': False, 'owner': 'payments'}),
+            self.component(3, type='library', path='lib/svc-3', language='python'),
+            self.component(4, type='library', path='lib/svc-4', metadata={'owner': 'platform'}),
+            self.component(5, path='services/svc-5', security_score=None, language='perl'),
+        ]
+        expected = self.interpreted(rules, components)
+        self.assertEqual(self.compiled(rules, components), expected)
+        self.assertIn((3, 4, 'non_compliant', str({'rule': 'rule-4', 'condition': {'field': 'metadata.owner'}})), expected)
+
+    def test_values_an_operator_cannot_take_are_errors_for_that_component_only(self):
+        rules = [self.rule(1, {'field': 'security_score', 'op': 'lt', 'value': 50})]
+        components = [self.component(1, security_score=10), self.component(2, security_score='high'),
+                      self.component(3, security_score=90)]
+        results = self.compiled(rules, components)
+        self.assertEqual(results, self.interpreted(rules, components))
+        self.assertEqual({(pk, status) for pk, _, status, _ in results}, {(1, 'non_compliant'), (2, 'error')})
+
+    def test_components_are_only_checked_against_their_type_and_pattern(self):
+        rule_set = engine.RuleSet([
+            self.rule(1, {'field': 'name', 'op': 'exists'}, target_type='service'),
+            self.rule(2, {'field': 'name', 'op': 'exists'}, target_type='library', pattern='lib/*'),
+            self.rule(3, {'field': 'name', 'op': 'exists'}),
+        ])
+        self.assertEqual(len(rule_set), 3)
+        self.assertEqual([len(rules) for _, rules in rule_set.plan('service')], [2])
+        self.assertEqual(sorted(len(rules) for _, rules in rule_set.plan('library')), [1, 1])
+        components = [self.component(1, type='library', path='vendor/x'), self.component(2, type='library', path='lib/y')]
+        flagged = {(component['id'], rule.pk) for component, rule, _, _ in rule_set.evaluate(components)}
+        self.assertEqual(flagged, {(1, 3), (2, 2), (2, 3)})
+
+    def test_simple_conditions_are_pushed_down_to_sql(self):
+        for condition in [
+            {'field': 'security_score', 'op': 'lt', 'value': 50},
+            {'field': 'metadata.encryption', 'op': 'eq', 'value': False},
+            {'all': [{'field': 'tags', 'op': 'lacks', 'value': 'owner'}, {'not': {'field': 'name', 'op': 'exists'}}]},
+            {'any': [{'field': 'language', 'op': 'not_in', 'value': ['go']}, {'field': 'metadata.a.b', 'op': 'gte', 'value': 1}]},
+        ]:
+            translation = pushdown.translate(self.rule(1, condition, pattern='services/*'))
+            self.assertIsNotNone(translation, condition)
+            sql, params = translation.predicate
+            self.assertEqual(sql.count('%s'), len(params))
+
+    def test_other_conditions_stay_in_python(self):
+        for condition, pattern in [
+            ({'field': 'version', 'op': 'matches', 'value': r'^0\.'}, ''),
+            ({'field': 'security_score', 'op': 'lt', 'value': 'high'}, ''),
+            ({'field': 'metadata.ports', 'op': 'contains', 'value': 22}, ''),
+            ({'field': 'metadata.0', 'op': 'eq', 'value': 1}, ''),
+            ({'field': 'description', 'op': 'eq', 'value': ''}, ''),
+            ({'all': [{'field': 'name', 'op': 'exists'}, {'field': 'version', 'op': 'bogus'}]}, ''),
+            ({'field': 'name', 'op': 'exists'}, 'svc-[12]'),
+        ]:
+            self.assertIsNone(pushdown.translate(self.rule(1, condition, pattern=pattern)), condition)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SCAN_SCHEDULER={
+    'MAX_CONCURRENT_SCANS': 3, 'MAX_CONCURRENT_SCANS_PER_ORGANIZATION': 2, 'JITTER': 0.1,
+})
+class ScanSchedulerTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+
+    def data_source(self, name, organization=None, status='active', due=True, **kwargs):
+        return DataSource.objects.create(
+            name=name, type='github', credentials='-', organization=organization or self.organization,
+            connection_status=status,
+            next_scan_at=self.now - timedelta(minutes=1) if due else self.now + timedelta(hours=1),
+            **kwargs
+        )
+
+    def test_claims_due_active_sources_and_plans_next_scan_with_jitter(self):
+        due = self.data_source('due', scan_frequency=10)
+        self.data_source('later', due=False)
+        self.data_source('pending', status='pending')
+
+        claimed, checks = scheduling.claim_due_scans(self.now)
+
+        self.assertEqual([data_source_id for data_source_id, _ in claimed], [due.pk])
+        self.assertEqual(checks, [])
+        self.assertLessEqual(claimed[0][1], scheduling.DEFAULTS['DISPATCH_SPREAD_SECONDS'])
+        due.refresh_from_db()
+        self.assertGreaterEqual(due.next_scan_at, self.now + timedelta(hours=9))
+        self.assertLessEqual(due.next_scan_at, self.now + timedelta(hours=11))
+        self.assertEqual(scheduling.claim_due_scans(self.now), ([], []))
+
+    def test_caps_concurrent_scans_per_organization_and_globally(self):
+        other = Organization.objects.create(name='Other', slug='other')
+        running = self.data_source('running', due=False)
+        ScanJob.objects.create(name='running', scan_type='compliance', data_source=running,
+                               status='running', started_at=self.now)
+        acme = [self.data_source(f'acme-{i}') for i in range(3)]
+        others = [self.data_source(f'other-{i}', organization=other) for i in range(3)]
+        # Most overdue first: acme's sources are considered before the others.
+        DataSource.objects.filter(pk__in=[ds.pk for ds in acme]).update(next_scan_at=self.now - timedelta(hours=1))
+
+        claimed = {data_source_id for data_source_id, _ in scheduling.claim_due_scans(self.now)[0]}
+
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(len(claimed & {ds.pk for ds in acme}), 1)
+        self.assertEqual(len(claimed & {ds.pk for ds in others}), 1)
+        # Sources over a cap stay due for the next run.
+        self.assertEqual(DataSource.objects.filter(next_scan_at__lte=self.now).count(), 4)
+
+    @override_settings(SCAN_SCHEDULER={
+        'BATCH_SIZE': 3, 'MAX_CONCURRENT_SCANS': 10, 'MAX_CONCURRENT_SCANS_PER_ORGANIZATION': 2,
+    })
+    def test_overdue_organization_does_not_fill_the_batch(self):
+        other = Organization.objects.create(name='Other', slug='other')
+        acme = [self.data_source(f'acme-{i}') for i in range(5)]
+        DataSource.objects.filter(pk__in=[ds.pk for ds in acme]).update(next_scan_at=self.now - timedelta(days=1))
+        late = self.data_source('other', organization=other)
+
+        claimed = {data_source_id for data_source_id, _ in scheduling.claim_due_scans(self.now)[0]}
+
+        self.assertEqual(len(claimed), 3)
+        self.assertIn(late.pk, claimed)
+
+    def test_backs_off_failed_and_disconnected_sources(self):
+        failed = self.data_source('failed', status='failed', scan_failures=2)
+        disconnected = self.data_source('disconnected', status='disconnected')
+
+        with mock.patch.dict(scheduling.connection_checks, {'github': lambda data_source: False}):
+            claimed, checks = scheduling.claim_due_scans(self.now)
+
+        self.assertEqual(claimed, [])
+        self.assertEqual(set(checks), {failed.pk, disconnected.pk})
+        failed.refresh_from_db()
+        self.assertEqual(failed.scan_failures, 3)
+        self.assertEqual(failed.next_scan_at, self.now + timedelta(hours=4))
+
+    def test_sources_without_a_connection_check_are_left_alone(self):
+        failed = self.data_source('failed', status='failed', scan_failures=2)
+
+        self.assertEqual(scheduling.claim_due_scans(self.now), ([], []))
+
+        failed.refresh_from_db()
+        self.assertEqual((failed.scan_failures, failed.next_scan_at), (2, self.now - timedelta(minutes=1)))
+
+    def test_backed_off_sources_that_connect_again_become_due(self):
+        failed = self.data_source('failed', status='failed', scan_failures=2, due=False)
+        unreachable = self.data_source('unreachable', status='disconnected', due=False)
+        checks = {'github': lambda data_source: data_source.pk == failed.pk}
+
+        self.assertFalse(scheduling.check_connection(failed.pk, now=self.now))
+        with mock.patch.dict(scheduling.connection_checks, checks):
+            self.assertTrue(scheduling.check_connection(failed.pk, now=self.now))
+            self.assertFalse(scheduling.check_connection(unreachable.pk, now=self.now))
+
+        failed.refresh_from_db()
+        self.assertEqual((failed.connection_status, failed.scan_failures, failed.next_scan_at), ('active', 0, self.now))
+        unreachable.refresh_from_db()
+        self.assertEqual(unreachable.connection_status, 'disconnected')
+
+    def test_scan_results_reset_or_back_off(self):
+        completed = self.data_source('completed', scan_failures=3)
+        failed = self.data_source('failed', due=False)
+
+        scheduling.record_scan_results(completed=[completed.pk], failed=[failed.pk], now=self.now)
+
+        completed.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertEqual(completed.scan_failures, 0)
+        self.assertEqual(failed.scan_failures, 1)
+        self.assertEqual(failed.next_scan_at, self.now + timedelta(hours=1))
@@ -0,0 +1,10 @@
+from rest_framework.routers import SimpleRouter
+
+from .views.views import ComplianceResultViewSet, ScanJobViewSet, SecurityPolicyViewSet
+
+router = SimpleRouter()
+router.register('policies', SecurityPolicyViewSet, basename='security_policy')
+router.register('scan-jobs', ScanJobViewSet, basename='scan_job')
+router.register('compliance-results', ComplianceResultViewSet, basename='compliance_result')
+
+urlpatterns = router.urls
@@ -1,27 +1,57 @@
-from django.shortcuts import render
-from django.contrib.auth import authenticate
-from django.core.exceptions import ValidationError
-from rest_framework import status, permissions
-from rest_framework.response import Response
-from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
-from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-import requests
-import json
-import logging
-import os
-from django.conf import settings
-import urllib.parse
+from backend.api import OrganizationScopedViewSet, parse_bool
 
-from ..models.models import User
+from ..models.models import ComplianceResult, ScanJob, SecurityPolicy
 from ..serializers import (
-    UserRegistrationSerializer, 
-    UserSerializer,
-    GoogleAuthSerializer,
-    GithubAuthSerializer
+    ComplianceResultListSerializer,
+    ComplianceResultSerializer,
+    ScanJobListSerializer,
+    ScanJobSerializer,
+    SecurityPolicySerializer,
 )
 
-logger = logging.getLogger(__name__)
+
+class SecurityPolicyViewSet(OrganizationScopedViewSet):
+    queryset = SecurityPolicy.objects.all()
+    serializer_class = SecurityPolicySerializer
+    raw_json_fields = ('policy_content',)
+    prefetch_related_fields = {
+        'rules': ['rules'],
+        'products': ['products'],
+    }
+    filters = {
+        'policy_type': ('policy_type', str),       # (organization, policy_type)
+        'is_active': ('is_active', parse_bool),     # (is_active)
+    }
+
+
+class ScanJobViewSet(OrganizationScopedViewSet):
+    queryset = ScanJob.objects.all()
+    serializer_class = ScanJobSerializer
+    slim_serializer_class = ScanJobListSerializer
+    raw_json_fields = ('configuration', 'result')
+    organization_lookup = 'data_source__organization'
+    select_related_fields = {'data_source': ['data_source']}
+    filters = {
+        'data_source': ('data_source_id', int),  # (data_source, status)
+        'status': ('status', str),               # with data_source
+        'scan_type': ('scan_type', str),         # (scan_type)
+    }
+
+
+class ComplianceResultViewSet(OrganizationScopedViewSet):
+    queryset = ComplianceResult.objects.all()
+    serializer_class = ComplianceResultSerializer
+    slim_serializer_class = ComplianceResultListSerializer
+    raw_json_fields = ('details',)
+    organization_lookup = 'policy__organization'
+    select_related_fields = {
+        'component': ['component'],
+        'policy': ['policy'],
+    }
+    filters = {
+        'component': ('component_id', int),  # (component, status)
+        'status': ('status', str),           # with component
+        'policy': ('policy_id', int),        # (policy)
+        'scan_job': ('scan_job_id', int),    # (scan_job)
+        'product': ('product_id', int),      # (product)
+    }
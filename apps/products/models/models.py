@@ -7,6 +7,7 @@ from django.contrib.auth.hashers import make_password, check_password
 
 from apps.users.managers import UserManager
 from apps.users.models.models import Organization, User
+from backend.invalidation import InvalidatingQuerySet
 
 class ProductCatalog(models.Model):
     """
@@ -47,6 +48,8 @@ class ProductCatalog(models.Model):
                                     help_text="Indicates if this is a business-critical product")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = InvalidatingQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.name} ({self.type})"
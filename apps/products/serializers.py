@@ -0,0 +1,40 @@
+from rest_framework import serializers
+
+from backend.api import SparseFieldsModelSerializer
+from backend.slim import Column, DateTimeColumn, JSONColumn, Nested, SlimSerializer
+from .models.models import ProductCatalog
+
+
+class ProductSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductCatalog
+        fields = ['id', 'name', 'type']
+
+
+class ProductCatalogSerializer(SparseFieldsModelSerializer):
+    parent = ProductSummarySerializer(read_only=True)
+
+    class Meta:
+        model = ProductCatalog
+        fields = [
+            'id', 'name', 'description', 'type', 'parent', 'status', 'owner', 'tags', 'risk_level',
+            'metadata', 'is_critical', 'created_at', 'updated_at',
+        ]
+
+
+class ProductCatalogListSerializer(SlimSerializer):
+    fields = {
+        'id': Column('id'),
+        'name': Column('name'),
+        'description': Column('description'),
+        'type': Column('type'),
+        'parent': Nested('parent', ['id', 'name', 'type']),
+        'status': Column('status'),
+        'owner': Column('owner'),
+        'tags': JSONColumn('tags', heavy=False),
+        'risk_level': Column('risk_level'),
+        'metadata': JSONColumn('metadata'),
+        'is_critical': Column('is_critical'),
+        'created_at': DateTimeColumn('created_at'),
+        'updated_at': DateTimeColumn('updated_at'),
+    }
@@ -0,0 +1,8 @@
+from rest_framework.routers import SimpleRouter
+
+from .views.views import ProductCatalogViewSet
+
+router = SimpleRouter()
+router.register('', ProductCatalogViewSet, basename='product')
+
+urlpatterns = router.urls
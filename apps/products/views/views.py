@@ -1,27 +1,18 @@
-from django.shortcuts import render
-from django.contrib.auth import authenticate
-from django.core.exceptions import ValidationError
-from rest_framework import status, permissions
-from rest_framework.response import Response
-from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
-from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-import requests
-import json
-import logging
-import os
-from django.conf import settings
-import urllib.parse
+from backend.api import OrganizationScopedViewSet
 
-from ..models.models import User
-from ..serializers import (
-    UserRegistrationSerializer, 
-    UserSerializer,
-    GoogleAuthSerializer,
-    GithubAuthSerializer
-)
+from ..models.models import ProductCatalog
+from ..serializers import ProductCatalogListSerializer, ProductCatalogSerializer
 
-logger = logging.getLogger(__name__)
+
+class ProductCatalogViewSet(OrganizationScopedViewSet):
+    queryset = ProductCatalog.objects.all()
+    serializer_class = ProductCatalogSerializer
+    slim_serializer_class = ProductCatalogListSerializer
+    raw_json_fields = ('metadata', 'tags')
+    select_related_fields = {'parent': ['parent']}
+    filters = {
+        'type': ('type', str),          # (organization, type)
+        'name': ('name', str),          # (name)
+        'parent': ('parent_id', int),   # (parent)
+        'owner': ('owner_id', int),     # (owner)
+    }
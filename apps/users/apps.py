@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.users"
+
+    def ready(self):
+        from backend import invalidation
+        from backend.db import metrics  # noqa: F401
+
+        from . import signals  # noqa: F401
+
+        invalidation.connect_signals()
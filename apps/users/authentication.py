@@ -0,0 +1,142 @@
+"""
+Stateless JWT authentication.
+
+simplejwt's JWTAuthentication loads the full User row on every request.
+StatelessJWTAuthentication instead builds a lightweight TokenPrincipal from
+signed claims (user id, organization, role, active/staff flags) that are
+added to the tokens when they are issued. Code that needs the full row gets
+it through TokenPrincipal.user (or any attribute the principal does not
+carry), which is served from a short-TTL cache invalidated on User.save.
+
+Deactivation takes effect immediately: saving an inactive user leaves a
+marker in the cache that is checked on every request. Refreshing re-reads
+the user (FastBlacklistTokenRefreshSerializer), so changed claims reach
+new tokens within one access token lifetime and inactive users cannot
+refresh at all.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models.models import User
+
+ORGANIZATION_CLAIM = 'org_id'
+ROLE_CLAIM = 'role'
+ACTIVE_CLAIM = 'is_active'
+STAFF_CLAIM = 'is_staff'
+
+
+def _user_cache_ttl():
+    return getattr(settings, 'USER_CACHE_TTL', 60)
+
+
+def _user_cache_key(user_id):
+    return f'users:user:{user_id}'
+
+
+def _inactive_marker_key(user_id):
+    return f'users:inactive:{user_id}'
+
+
+def add_principal_claims(token, user):
+    """
+    Embed the claims TokenPrincipal is built from into a (refresh) token;
+    access tokens derived from it inherit them.
+    """
+    token[ORGANIZATION_CLAIM] = user.organization_id
+    token[ROLE_CLAIM] = user.user_type
+    token[ACTIVE_CLAIM] = user.is_active
+    token[STAFF_CLAIM] = user.is_staff
+    return token
+
+
+def get_cached_user(user_id):
+    """
+    Full User row through the short-TTL user cache; None if it does not exist.
+    """
+    key = _user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).select_related('organization').first()
+        if user is not None:
+            cache.set(key, user, _user_cache_ttl())
+    return user
+
+
+def invalidate_cached_user(user):
+    cache.delete(_user_cache_key(user.pk))
+    if user.is_active:
+        cache.delete(_inactive_marker_key(user.pk))
+    else:
+        # Outstanding tokens still say is_active=True until they expire.
+        lifetime = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+        cache.set(_inactive_marker_key(user.pk), True, int(lifetime))
+
+
+class TokenPrincipal:
+    """
+    Authenticated principal built from access token claims. Attributes not
+    carried by the token fall through to the cached User row.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        self.token = token
+        self.id = self.pk = token[api_settings.USER_ID_CLAIM]
+        self.organization_id = token.get(ORGANIZATION_CLAIM)
+        self.role = self.user_type = token.get(ROLE_CLAIM)
+        self.is_active = token.get(ACTIVE_CLAIM, True)
+        self.is_staff = token.get(STAFF_CLAIM, False)
+
+    @cached_property
+    def user(self):
+        user = get_cached_user(self.id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        return user
+
+    def __getattr__(self, name):
+        # Only reached for attributes the principal does not define itself.
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __str__(self):
+        return f'TokenPrincipal {self.id}'
+
+    def __eq__(self, other):
+        if isinstance(other, (TokenPrincipal, User)):
+            return self.id == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Authenticates from the access token alone, without a database lookup.
+    Tokens issued before the principal claims existed fall back to the
+    cached User row.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        principal = TokenPrincipal(validated_token)
+        if ORGANIZATION_CLAIM not in validated_token:
+            user = principal.user
+            principal.organization_id = user.organization_id
+            principal.role = principal.user_type = user.user_type
+            principal.is_active = user.is_active
+            principal.is_staff = user.is_staff
+
+        if not principal.is_active or cache.get(_inactive_marker_key(principal.id)):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return principal
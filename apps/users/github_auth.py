@@ -0,0 +1,64 @@
+"""
+Helpers for the GitHub OAuth login flow.
+
+After the code exchange the login view requests the profile (/user) and
+the email addresses (/user/emails) at once, so a first login waits for
+one round trip rather than two. The resolved identity (GitHub id ->
+primary email) is cached briefly; when the profile's GitHub id hits that
+cache the email response is not waited for, and the call is cancelled
+if it is still in flight.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .http_client import async_http_client
+
+GITHUB_API_URL = 'https://api.github.com'
+
+
+def github_api_headers(access_token):
+    return {
+        'Authorization': f'token {access_token}',
+        'Accept': 'application/json'
+    }
+
+
+def _api_url():
+    return getattr(settings, 'GITHUB_API_URL', GITHUB_API_URL)
+
+
+async def afetch_profile(access_token):
+    return await async_http_client.get(f'{_api_url()}/user', headers=github_api_headers(access_token))
+
+
+async def afetch_emails(access_token):
+    return await async_http_client.get(f'{_api_url()}/user/emails', headers=github_api_headers(access_token))
+
+
+def _identity_cache_key(github_id):
+    return f'github_identity:{github_id}'
+
+
+async def aget_cached_identity(github_id):
+    if github_id is None:
+        return None
+    return await cache.aget(_identity_cache_key(github_id))
+
+
+async def acache_identity(github_id, primary_email):
+    if github_id is None:
+        return
+    await cache.aset(
+        _identity_cache_key(github_id),
+        {'email': primary_email},
+        getattr(settings, 'GITHUB_IDENTITY_CACHE_TTL', 300),
+    )
+
+
+def discard_task(task):
+    """
+    Cancel a task whose result is no longer needed, or retrieve the
+    outcome of one that already finished so its error is not logged.
+    """
+    if not task.cancel() and not task.cancelled():
+        task.exception()
@@ -0,0 +1,174 @@
+"""
+Local verification of Google ID tokens.
+
+Instead of calling the tokeninfo endpoint on every login, ID tokens are
+verified against Google's published signing keys (JWKS). The keys are kept
+in a process-wide cache that honours the Cache-Control max-age Google sends,
+is refreshed in the background shortly before it expires, and is only
+fetched synchronously on a cold start or when a token carries an unknown
+key id (key rotation).
+"""
+import json
+import logging
+import re
+import threading
+import time
+
+import jwt
+import requests
+from jwt.algorithms import RSAAlgorithm
+
+from .http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v3/certs'
+GOOGLE_TOKEN_URL = 'https://oauth2.googleapis.com/token'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+DEFAULT_MAX_AGE = 3600
+# Refresh in the background once this fraction of max-age has elapsed.
+REFRESH_AHEAD = 0.9
+# How long past max-age a cached key may still be served while refreshing.
+STALE_GRACE = 1.0
+# Minimum interval between synchronous fetches triggered by unknown key ids.
+MIN_FORCED_REFRESH_INTERVAL = 30
+CLOCK_SKEW_LEEWAY = 60
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+class GoogleTokenError(Exception):
+    pass
+
+
+class GoogleAudienceError(GoogleTokenError):
+    pass
+
+
+class GoogleKeysUnavailable(GoogleTokenError):
+    pass
+
+
+def _parse_max_age(cache_control):
+    match = _MAX_AGE_RE.search(cache_control or '')
+    return int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+
+class GoogleKeyCache:
+    def __init__(self, url=GOOGLE_CERTS_URL):
+        self.url = url
+        self._keys = {}
+        self._fetched_at = 0.0
+        self._max_age = 0
+        self._last_forced = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def fetch(self):
+        """
+        Download the JWKS; returns ({kid: public_key}, max_age).
+        """
+        response = http_client.get(self.url)
+        response.raise_for_status()
+        keys = {}
+        for jwk in response.json().get('keys', []):
+            if jwk.get('kty') != 'RSA' or 'kid' not in jwk:
+                continue
+            keys[jwk['kid']] = RSAAlgorithm.from_jwk(json.dumps(jwk))
+        return keys, _parse_max_age(response.headers.get('Cache-Control'))
+
+    def set_keys(self, keys, max_age=DEFAULT_MAX_AGE):
+        with self._lock:
+            self._keys = dict(keys)
+            self._fetched_at = time.monotonic()
+            self._max_age = max_age
+
+    def refresh(self):
+        try:
+            keys, max_age = self.fetch()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"GoogleKeyCache: failed to fetch Google signing keys: {str(e)}")
+            raise GoogleKeysUnavailable("Could not fetch Google signing keys") from e
+        self.set_keys(keys, max_age)
+        logger.debug(f"GoogleKeyCache: loaded {len(keys)} keys, max-age {max_age}s")
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except GoogleKeysUnavailable:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='google-jwks-refresh', daemon=True).start()
+
+    def get_key(self, kid):
+        age = time.monotonic() - self._fetched_at
+        key = self._keys.get(kid)
+
+        if key is not None and age < self._max_age:
+            if age > self._max_age * REFRESH_AHEAD:
+                self._refresh_in_background()
+            return key
+
+        if not self._keys or age >= self._max_age:
+            # Cold or expired cache: a stale key is still better than failing
+            # the login, so serve it while a background fetch catches up.
+            if key is not None and age < self._max_age * (1 + STALE_GRACE):
+                self._refresh_in_background()
+                return key
+            self.refresh()
+        elif time.monotonic() - self._last_forced > MIN_FORCED_REFRESH_INTERVAL:
+            # Unknown kid on a fresh cache usually means Google rotated keys.
+            self._last_forced = time.monotonic()
+            self.refresh()
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise GoogleTokenError(f"Unknown signing key id {kid!r}")
+        return key
+
+
+google_key_cache = GoogleKeyCache()
+
+
+def verify_google_id_token(token, audience, key_cache=None):
+    """
+    Verify a Google ID token's signature, audience, issuer and expiry
+    locally and return its claims.
+    """
+    key_cache = key_cache or google_key_cache
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError as e:
+        raise GoogleTokenError(f"Malformed ID token: {str(e)}") from e
+
+    if header.get('alg') != 'RS256':
+        raise GoogleTokenError(f"Unexpected token algorithm {header.get('alg')!r}")
+
+    key = key_cache.get_key(header.get('kid'))
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=['RS256'],
+            audience=audience,
+            leeway=CLOCK_SKEW_LEEWAY,
+            options={'require': ['exp', 'iat', 'aud', 'iss', 'sub']},
+        )
+    except jwt.InvalidAudienceError as e:
+        raise GoogleAudienceError(str(e)) from e
+    except jwt.PyJWTError as e:
+        raise GoogleTokenError(str(e)) from e
+
+    if claims.get('iss') not in GOOGLE_ISSUERS:
+        raise GoogleTokenError(f"Invalid issuer {claims.get('iss')!r}")
+    return claims
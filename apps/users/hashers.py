@@ -0,0 +1,126 @@
+"""
+Password hashers with costs taken from settings.PASSWORD_HASHING, and
+out-of-band rehashing of outdated hashes.
+
+The profile (argon2, scrypt or pbkdf2) only decides which hasher new
+passwords get; every profile keeps the others in PASSWORD_HASHERS so
+existing hashes still verify. When a login verifies against a hash made by
+another hasher or with other cost parameters, the password is rehashed on
+a background thread instead of on the request. The raw password never
+leaves the process: it is not handed to Celery or any broker, and at most
+MAX_PENDING_REHASHES of them wait in memory. Logins past that bound skip
+the upgrade; the hash is still outdated, so a later login retries it.
+
+Use the benchmark_password_hashing management command to pick costs.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+    make_password,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ARGON2': {'TIME_COST': 2, 'MEMORY_COST': 19456, 'PARALLELISM': 1},
+    'SCRYPT': {'WORK_FACTOR': 2 ** 15, 'BLOCK_SIZE': 8, 'PARALLELISM': 1},
+    'PBKDF2': {'ITERATIONS': 600000},
+    'ASYNC_REHASH': True,
+    'MAX_PENDING_REHASHES': 100,
+}
+
+rehash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='password-rehash')
+_pending_rehashes = 0
+_pending_lock = threading.Lock()
+
+
+def _config(section, name=None):
+    value = getattr(settings, 'PASSWORD_HASHING', {}).get(section, DEFAULTS[section])
+    if name is None:
+        return value
+    return value.get(name, DEFAULTS[section][name])
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return _config('ARGON2', 'TIME_COST')
+
+    @property
+    def memory_cost(self):
+        return _config('ARGON2', 'MEMORY_COST')
+
+    @property
+    def parallelism(self):
+        return _config('ARGON2', 'PARALLELISM')
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return _config('SCRYPT', 'WORK_FACTOR')
+
+    @property
+    def block_size(self):
+        return _config('SCRYPT', 'BLOCK_SIZE')
+
+    @property
+    def parallelism(self):
+        return _config('SCRYPT', 'PARALLELISM')
+
+    @property
+    def maxmem(self):
+        # scrypt needs 128 * n * r * p bytes; OpenSSL's default cap (32 MiB)
+        # rejects work factors from 2 ** 15 up.
+        return max(64 * 2 ** 20, 2 * 128 * self.work_factor * self.block_size * self.parallelism)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return _config('PBKDF2', 'ITERATIONS')
+
+
+def _rehash(user_id, raw_password, old_encoded):
+    from .authentication import invalidate_cached_user
+    from .models.models import User
+
+    try:
+        # Only replace the hash we verified against, never a password that
+        # was changed in the meantime.
+        updated = User.objects.filter(pk=user_id, password=old_encoded).update(
+            password=make_password(raw_password)
+        )
+        if updated:
+            invalidate_cached_user(User.objects.only('pk', 'is_active').get(pk=user_id))
+            logger.info(f"Upgraded password hash for user {user_id}")
+    except Exception as e:
+        logger.error(f"Password rehash failed for user {user_id}: {str(e)}")
+
+
+def _rehash_done(future):
+    global _pending_rehashes
+    with _pending_lock:
+        _pending_rehashes -= 1
+
+
+def schedule_rehash(user, raw_password):
+    """
+    Setter for django.contrib.auth.hashers.check_password: called once a
+    password verified against an outdated hash.
+    """
+    global _pending_rehashes
+    if not _config('ASYNC_REHASH'):
+        _rehash(user.pk, raw_password, user.password)
+        return
+    with _pending_lock:
+        if _pending_rehashes >= _config('MAX_PENDING_REHASHES'):
+            return
+        _pending_rehashes += 1
+    rehash_executor.submit(_rehash, user.pk, raw_password, user.password).add_done_callback(_rehash_done)
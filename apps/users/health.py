@@ -0,0 +1,209 @@
+"""
+Readiness probes for /api/users/status/.
+
+Each dependency is probed with a bounded timeout on a small thread pool:
+- database round trip (SELECT 1) and, on Postgres, connection saturation
+  (backends in use against max_connections) and, with DB_POOL=psycopg,
+  requests queued for a pooled connection
+- Redis PING on the sessions cache
+- Celery broker queue depth
+- GitHub API rate-limit headroom (its own, longer cache; /rate_limit does
+  not count against the limit)
+
+The combined report is cached in-process for HEALTH_CHECK['CACHE_SECONDS']
+and concurrent probes wait for the one in flight, so load balancer checks
+never multiply into database load. Only the database is critical: it makes
+the instance unready when it is down, slower than DB_LATENCY_FAIL_MS or
+close to saturation. The other checks degrade the report without failing
+it.
+
+The endpoint is public so load balancers can reach it, but they only need
+the status code: anonymous callers get up/down, and the per-check details
+(connection counts, queue depths, rate limits) are shown to staff users or
+to probes sending HEALTH_CHECK['PROBE_TOKEN'] in the X-Health-Token header.
+"""
+import hmac
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import redis
+from django.conf import settings
+from django.db import connection
+from django_redis import get_redis_connection
+
+from backend.db.metrics import pool_stats
+
+from .http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CACHE_SECONDS': 5,
+    'PROBE_TIMEOUT': 2.0,
+    'DB_LATENCY_WARN_MS': 100,
+    'DB_LATENCY_FAIL_MS': 500,
+    'DB_SATURATION_WARN': 0.8,
+    'DB_SATURATION_FAIL': 0.95,
+    'REDIS_CACHE_ALIAS': 'sessions',
+    'CELERY_QUEUES': ['interactive', 'scan', 'ingest', 'analytics'],
+    'CELERY_QUEUE_WARN': 1000,
+    'GITHUB_CACHE_SECONDS': 60,
+    'GITHUB_MIN_REMAINING_RATIO': 0.1,
+    'PROBE_TOKEN': None,
+}
+
+OK = 'ok'
+DEGRADED = 'degraded'
+DOWN = 'down'
+SKIPPED = 'skipped'
+
+probe_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='health-probe')
+
+
+def _config(name):
+    return getattr(settings, 'HEALTH_CHECK', {}).get(name, DEFAULTS[name])
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def check_database():
+    # Probe threads are long-lived, so their connection is reused between
+    # probes; drop it if the server closed it.
+    connection.close_if_unusable_or_obsolete()
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    result = {'latency_ms': _elapsed_ms(started)}
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*), current_setting('max_connections')::int FROM pg_stat_activity"
+            )
+            in_use, max_connections = cursor.fetchone()
+        result.update(connections=in_use, max_connections=max_connections,
+                      saturation=round(in_use / max_connections, 3))
+
+    pool = pool_stats(connection.alias)
+    if pool is not None:
+        result['pool'] = pool
+
+    saturation = result.get('saturation', 0)
+    if result['latency_ms'] >= _config('DB_LATENCY_FAIL_MS') or saturation >= _config('DB_SATURATION_FAIL'):
+        result['status'] = DOWN
+    elif (result['latency_ms'] >= _config('DB_LATENCY_WARN_MS') or saturation >= _config('DB_SATURATION_WARN')
+          or (pool or {}).get('requests_waiting', 0) > 0):
+        result['status'] = DEGRADED
+    else:
+        result['status'] = OK
+    return result
+
+
+def check_redis():
+    client = get_redis_connection(_config('REDIS_CACHE_ALIAS'))
+    started = time.perf_counter()
+    client.ping()
+    return {'status': OK, 'latency_ms': _elapsed_ms(started)}
+
+
+def check_celery():
+    broker_url = getattr(settings, 'CELERY_BROKER_URL', None)
+    if not broker_url or not broker_url.startswith('redis'):
+        return {'status': SKIPPED, 'reason': 'no redis broker configured'}
+    client = redis.Redis.from_url(broker_url, socket_timeout=_config('PROBE_TIMEOUT'))
+    pipe = client.pipeline(transaction=False)
+    queues = _config('CELERY_QUEUES')
+    for queue in queues:
+        pipe.llen(queue)
+    depths = dict(zip(queues, pipe.execute()))
+    status = DEGRADED if max(depths.values(), default=0) >= _config('CELERY_QUEUE_WARN') else OK
+    return {'status': status, 'queues': depths}
+
+
+_github_cache = {'result': None, 'expires': 0.0}
+
+
+def check_github():
+    if time.monotonic() < _github_cache['expires']:
+        return _github_cache['result']
+    api_url = getattr(settings, 'GITHUB_API_URL', 'https://api.github.com')
+    response = http_client.get(f'{api_url}/rate_limit', headers={'Accept': 'application/json'}, max_retries=0)
+    response.raise_for_status()
+    core = response.json().get('resources', {}).get('core', {})
+    limit, remaining = core.get('limit') or 0, core.get('remaining') or 0
+    ratio = remaining / limit if limit else 0
+    result = {
+        'status': OK if ratio >= _config('GITHUB_MIN_REMAINING_RATIO') else DEGRADED,
+        'limit': limit,
+        'remaining': remaining,
+        'reset': core.get('reset'),
+    }
+    _github_cache.update(result=result, expires=time.monotonic() + _config('GITHUB_CACHE_SECONDS'))
+    return result
+
+
+CHECKS = {
+    'database': check_database,
+    'redis': check_redis,
+    'celery': check_celery,
+    'github': check_github,
+}
+CRITICAL = ('database',)
+
+
+def run_checks():
+    futures = {name: probe_executor.submit(check) for name, check in CHECKS.items()}
+    timeout = _config('PROBE_TIMEOUT')
+    deadline = time.monotonic() + timeout
+    checks = {}
+    for name, future in futures.items():
+        try:
+            checks[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except TimeoutError:
+            checks[name] = {'status': DOWN, 'error': f'timed out after {timeout}s'}
+        except Exception as e:
+            logger.warning(f"Health check {name} failed: {str(e)}")
+            # The exception text can carry hosts or credentials: log it only.
+            checks[name] = {'status': DOWN, 'error': type(e).__name__}
+
+    if any(checks[name]['status'] == DOWN for name in CRITICAL):
+        overall = DOWN
+    elif any(check['status'] in (DOWN, DEGRADED) for check in checks.values()):
+        overall = DEGRADED
+    else:
+        overall = OK
+    return {'status': overall, 'checked_at': time.time(), 'checks': checks}
+
+
+def can_view_details(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+    token = _config('PROBE_TOKEN')
+    supplied = request.META.get('HTTP_X_HEALTH_TOKEN')
+    return bool(token and supplied) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+class CachedReadiness:
+    def __init__(self):
+        self._report = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._report is not None and time.monotonic() < self._expires:
+            return self._report
+        with self._lock:
+            # Another request may have refreshed it while we waited.
+            if self._report is None or time.monotonic() >= self._expires:
+                self._report = run_checks()
+                self._expires = time.monotonic() + _config('CACHE_SECONDS')
+            return self._report
+
+
+readiness = CachedReadiness()
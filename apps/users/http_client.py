@@ -0,0 +1,397 @@
+"""
+Shared outbound HTTP layer for calls to identity providers.
+
+Every upstream host gets one pooled keep-alive requests.Session. Calls carry
+connect/read timeouts, bounded retries with jittered exponential backoff,
+a per-host circuit breaker and latency metrics. Settings come from
+OUTBOUND_HTTP in the Django settings, falling back to DEFAULTS.
+
+Retries are only attempted when they are safe: connect timeouts (the
+request never reached the server) for any method; other connection errors,
+read timeouts and 429/5xx responses only for idempotent methods. OAuth code
+exchanges are POSTs with single-use codes and must not be replayed once the
+server may have seen them.
+
+async_http_client is the same client for async views: it shares each
+host's circuit breaker, metrics and listeners with http_client, so an
+outage seen by either opens the breaker for both. It uses an httpx
+AsyncClient per host when httpx is installed, holding any number of slow
+upstream calls on the event loop; without httpx each call runs the
+blocking client on a worker thread. Transport errors are raised as the
+matching requests exceptions either way, so callers handle one set of
+errors.
+
+httpx clients belong to the event loop that opened them. Under ASGI that
+loop lives as long as the process; under WSGI, async_to_sync runs each
+request on a loop of its own, so views using async_http_client list it in
+AsyncAPIView.loop_resources and it is closed when the request ends.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # httpx is optional, async calls then use a worker thread
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10,
+    'POOL_CONNECTIONS': 4,
+    'POOL_MAXSIZE': 20,
+    'MAX_RETRIES': 2,
+    'BACKOFF_BASE': 0.2,
+    'BACKOFF_MAX': 2.0,
+    'RETRY_STATUSES': (429, 502, 503, 504),
+    'BREAKER_FAILURE_THRESHOLD': 5,
+    'BREAKER_RESET_TIMEOUT': 30,
+    'LATENCY_SAMPLES': 500,
+}
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+def _config(name):
+    return getattr(settings, 'OUTBOUND_HTTP', {}).get(name, DEFAULTS[name])
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised without calling upstream while a host's circuit is open. It is a
+    RequestException so existing error handling treats it as an outage.
+    """
+
+
+def _retryable(error, idempotent):
+    if idempotent:
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+    return isinstance(error, requests.exceptions.ConnectTimeout)
+
+
+def _backoff_delay(attempt):
+    ceiling = min(_config('BACKOFF_MAX'), _config('BACKOFF_BASE') * (2 ** attempt))
+    # Full jitter spreads retries from many workers hitting the same outage.
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let a single trial call through.
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class HostMetrics:
+    def __init__(self, samples):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.latencies = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms, error=False):
+        with self._lock:
+            self.calls += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self.latencies.append(elapsed_ms)
+            if error:
+                self.errors += 1
+
+    def increment(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            calls = self.calls
+
+            def percentile(p):
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2)
+
+            return {
+                'calls': calls,
+                'errors': self.errors,
+                'retries': self.retries,
+                'short_circuited': self.short_circuited,
+                'avg_ms': round(self.total_ms / calls, 2) if calls else None,
+                'p50_ms': percentile(0.50),
+                'p95_ms': percentile(0.95),
+                'p99_ms': percentile(0.99),
+                'max_ms': round(self.max_ms, 2),
+            }
+
+
+class _Call:
+    """
+    Retry state of one outbound call, shared by the sync and async clients:
+    they only differ in how they send an attempt and wait between attempts.
+    """
+
+    def __init__(self, client, name, method, url, kwargs):
+        self.client = client
+        self.name = name
+        self.method = method.upper()
+        self.url = url
+        self.host = urlsplit(url).netloc
+        self.breaker, self.metrics = client._host_guards(self.host)
+        kwargs.setdefault('timeout', (_config('CONNECT_TIMEOUT'), _config('READ_TIMEOUT')))
+        self.max_retries = kwargs.pop('max_retries', _config('MAX_RETRIES'))
+        self.kwargs = kwargs
+        self.idempotent = self.method in IDEMPOTENT_METHODS
+        self.attempt = 0
+
+    def check_breaker(self):
+        if not self.breaker.allow():
+            self.metrics.increment('short_circuited')
+            logger.warning(f"{self.name}: circuit open for {self.host}, skipping {self.method} {self.url}")
+            raise CircuitOpenError(f"Circuit open for {self.host}")
+
+    def _record(self, started, error):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.metrics.record(elapsed_ms, error=error)
+        self.client._notify(self.host, self.method, elapsed_ms, error)
+        if error:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return elapsed_ms
+
+    def failed(self, error, started):
+        """
+        Record a transport error; re-raises it unless the call is retried.
+        """
+        elapsed_ms = self._record(started, True)
+        logger.warning(f"{self.name}: {self.method} {self.host} failed after {elapsed_ms:.0f}ms: {str(error)}")
+        if not _retryable(error, self.idempotent) or self.attempt >= self.max_retries:
+            raise error
+
+    def responded(self, response, started):
+        """
+        Record a response; True when it is final, False to retry.
+        """
+        elapsed_ms = self._record(started, response.status_code >= 500)
+        logger.debug(f"{self.name}: {self.method} {self.host} -> {response.status_code} in {elapsed_ms:.0f}ms")
+        retry = self.idempotent and response.status_code in _config('RETRY_STATUSES')
+        return not retry or self.attempt >= self.max_retries
+
+    def next_delay(self):
+        self.attempt += 1
+        self.metrics.increment('retries')
+        return _backoff_delay(self.attempt)
+
+
+class OutboundHttpClient:
+    def __init__(self):
+        self._sessions = {}
+        self._breakers = {}
+        self._metrics = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """
+        Register listener(host, method, elapsed_ms, error), called after
+        every attempt on the calling thread.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, host, method, elapsed_ms, error):
+        for listener in self._listeners:
+            try:
+                listener(host, method, elapsed_ms, error)
+            except Exception as e:
+                logger.error(f"OutboundHttpClient: listener failed: {str(e)}")
+
+    def _host_state(self, host):
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=_config('POOL_CONNECTIONS'),
+                        pool_maxsize=_config('POOL_MAXSIZE'),
+                        max_retries=0,
+                    )
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._breakers[host] = CircuitBreaker(
+                        _config('BREAKER_FAILURE_THRESHOLD'), _config('BREAKER_RESET_TIMEOUT')
+                    )
+                    self._metrics[host] = HostMetrics(_config('LATENCY_SAMPLES'))
+                    self._sessions[host] = session
+        return session, self._breakers[host], self._metrics[host]
+
+    def _host_guards(self, host):
+        _, breaker, metrics = self._host_state(host)
+        return breaker, metrics
+
+    def request(self, method, url, **kwargs):
+        session, _, _ = self._host_state(urlsplit(url).netloc)
+        call = _Call(self, 'OutboundHttpClient', method, url, kwargs)
+        while True:
+            call.check_breaker()
+            started = time.perf_counter()
+            try:
+                response = session.request(call.method, url, **call.kwargs)
+            except requests.exceptions.RequestException as e:
+                call.failed(e, started)
+            else:
+                if call.responded(response, started):
+                    return response
+                response.close()
+            time.sleep(call.next_delay())
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def metrics(self):
+        return {host: metrics.snapshot() for host, metrics in list(self._metrics.items())}
+
+    def breaker_states(self):
+        return {host: breaker.state for host, breaker in list(self._breakers.items())}
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._breakers.clear()
+            self._metrics.clear()
+
+
+def _requests_error(error):
+    """
+    The requests exception matching an httpx transport error.
+    """
+    if isinstance(error, httpx.ConnectTimeout):
+        return requests.exceptions.ConnectTimeout(str(error))
+    if isinstance(error, httpx.TimeoutException):
+        return requests.exceptions.ReadTimeout(str(error))
+    if isinstance(error, httpx.TransportError):
+        return requests.exceptions.ConnectionError(str(error))
+    return requests.exceptions.RequestException(str(error))
+
+
+def _httpx_timeout(timeout):
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class AsyncOutboundHttpClient:
+    """
+    Awaitable counterpart of OutboundHttpClient, with the same retry rules,
+    sharing its breakers, metrics and listeners.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        # httpx clients are bound to the event loop that opened their
+        # connections: one set per loop.
+        self._loop_clients = weakref.WeakKeyDictionary()
+
+    def _httpx_client(self, host):
+        loop = asyncio.get_running_loop()
+        clients = self._loop_clients.setdefault(loop, {})
+        client = clients.get(host)
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=_config('POOL_MAXSIZE'), max_keepalive_connections=_config('POOL_MAXSIZE'),
+            )
+            client = clients[host] = httpx.AsyncClient(limits=limits)
+        return client
+
+    async def _send(self, method, url, host, kwargs):
+        kwargs = dict(kwargs, timeout=_httpx_timeout(kwargs['timeout']))
+        try:
+            return await self._httpx_client(host).request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            raise _requests_error(e) from e
+
+    async def request(self, method, url, **kwargs):
+        if httpx is None:
+            # Same call on the blocking client, off the event loop.
+            return await sync_to_async(self.client.request, thread_sensitive=False)(method, url, **kwargs)
+
+        call = _Call(self.client, 'AsyncOutboundHttpClient', method, url, kwargs)
+        while True:
+            call.check_breaker()
+            started = time.perf_counter()
+            try:
+                response = await self._send(call.method, url, call.host, call.kwargs)
+            except requests.exceptions.RequestException as e:
+                call.failed(e, started)
+            else:
+                if call.responded(response, started):
+                    return response
+            await asyncio.sleep(call.next_delay())
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def aclose(self):
+        clients = self._loop_clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.aclose()
+
+
+http_client = OutboundHttpClient()
+async_http_client = AsyncOutboundHttpClient(http_client)
@@ -0,0 +1,321 @@
+"""
+Load-test harness for the users app's auth endpoints.
+
+AuthLoadTest serves the Django app on a local threaded WSGI server and
+points the Google and GitHub OAuth flows at StubIdentityProvider, a local
+HTTP server that signs ID tokens and answers the token, profile and email
+calls. Concurrent workers then drive register, email login, Google login
+(code flow), GitHub login, token refresh and logout, and the results are
+reported per scenario: throughput, latency percentiles, database queries
+per request (counted on the server thread) and outbound identity-provider
+calls per request (counted by the stub).
+
+Run it through the loadtest_auth management command, which creates and
+destroys a test database so no real data is touched.
+"""
+import hashlib
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs
+
+import jwt
+import requests
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from jwt.algorithms import RSAAlgorithm
+
+from .google_auth import google_key_cache
+
+STUB_CLIENT_ID = 'loadtest-client.apps.googleusercontent.com'
+PASSWORD = 'Loadtest-Passw0rd!'
+SCENARIOS = ('register', 'login', 'login_google', 'login_github', 'refresh', 'logout')
+SCENARIO_HEADER = 'X-Loadtest-Scenario'
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class StubIdentityProvider:
+    """
+    Minimal Google and GitHub OAuth endpoints. Authorization codes double as
+    the identity: code "abc" logs in abc@google.loadtest.example or
+    abc@github.loadtest.example.
+    """
+    KID = 'loadtest'
+
+    def __init__(self):
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                provider.handle(self)
+
+            def do_POST(self):
+                provider.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='loadtest-idp', daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+    def id_token(self, subject):
+        now = int(time.time())
+        claims = {
+            'iss': 'https://accounts.google.com',
+            'aud': STUB_CLIENT_ID,
+            'sub': subject,
+            'email': f'{subject}@google.loadtest.example',
+            'email_verified': True,
+            'given_name': 'Load',
+            'family_name': 'Test',
+            'iat': now,
+            'exp': now + 3600,
+        }
+        return jwt.encode(claims, self.private_key, algorithm='RS256', headers={'kid': self.KID})
+
+    def jwks(self):
+        jwk = json.loads(RSAAlgorithm.to_jwk(self.private_key.public_key()))
+        jwk.update({'kid': self.KID, 'alg': 'RS256', 'use': 'sig'})
+        return {'keys': [jwk]}
+
+    def handle(self, request):
+        path = request.path.split('?', 1)[0]
+        with self._lock:
+            self.calls[path] += 1
+        length = int(request.headers.get('Content-Length') or 0)
+        form = {key: values[0] for key, values in parse_qs(request.rfile.read(length).decode()).items()}
+        access_token = (request.headers.get('Authorization') or '').split(' ')[-1]
+        status, headers = 200, {}
+
+        if path == '/google/certs':
+            payload = self.jwks()
+            headers['Cache-Control'] = 'public, max-age=3600'
+        elif path == '/google/token':
+            payload = {'access_token': 'stub', 'id_token': self.id_token(form.get('code', 'anonymous'))}
+        elif path == '/github/token':
+            payload = {'access_token': form.get('code', 'anonymous'), 'token_type': 'bearer'}
+        elif path == '/github/user':
+            github_id = int(hashlib.sha1(access_token.encode()).hexdigest()[:12], 16)
+            payload = {'id': github_id, 'login': access_token, 'name': 'Load Test'}
+        elif path == '/github/user/emails':
+            payload = [{'email': f'{access_token}@github.loadtest.example', 'primary': True, 'verified': True}]
+        else:
+            status, payload = 404, {'error': 'not_found'}
+
+        body = json.dumps(payload).encode()
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class AppServer:
+    """
+    Serves the Django app on a threaded WSGI server and counts the database
+    queries each request runs, keyed by the scenario header.
+    """
+
+    def __init__(self):
+        self.queries = {}
+        self._lock = threading.Lock()
+        handler = WSGIHandler()
+
+        def app(environ, start_response):
+            executed = [0]
+
+            def count(execute, sql, params, many, context):
+                executed[0] += 1
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count):
+                response = handler(environ, start_response)
+            scenario = environ.get('HTTP_' + SCENARIO_HEADER.upper().replace('-', '_'))
+            with self._lock:
+                self.queries.setdefault(scenario, []).append(executed[0])
+            return response
+
+        self.httpd = ThreadedWSGIServer(('127.0.0.1', 0), QuietWSGIRequestHandler, allow_reuse_address=False)
+        self.httpd.set_app(app)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name='loadtest-app', daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class AuthLoadTest:
+    def __init__(self, requests_per_scenario=100, concurrency=10, scenarios=SCENARIOS):
+        self.requests_per_scenario = requests_per_scenario
+        self.concurrency = concurrency
+        self.scenarios = [name for name in SCENARIOS if name in scenarios]
+        self.run_id = uuid.uuid4().hex[:8]
+        self.tokens = {}
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _email(self, i):
+        return f'user-{self.run_id}-{i}@loadtest.example'
+
+    def _request(self, scenario, i):
+        """
+        Build (path, json body, headers) for request i of a scenario.
+        """
+        if scenario == 'register':
+            return 'register/', {
+                'email': self._email(i), 'password': PASSWORD, 'confirm_password': PASSWORD,
+                'first_name': 'Load', 'last_name': 'Test', 'company_name': 'Loadtest',
+            }, {}
+        if scenario == 'login':
+            return 'login/', {'email': self._email(i), 'password': PASSWORD}, {}
+        if scenario == 'login_google':
+            return 'login/google/', {
+                'token': f'g-{self.run_id}-{i}', 'is_auth_code': True, 'redirect_uri': 'http://localhost/callback',
+            }, {}
+        if scenario == 'login_github':
+            return 'login/github/', {'code': f'gh-{self.run_id}-{i}'}, {}
+        tokens = self.tokens.get(i) or {}
+        if scenario == 'refresh':
+            return 'refresh-token/', {'refresh': tokens.get('refresh')}, {}
+        return 'logout/', {'refresh': tokens.get('refresh')}, {'Authorization': f"Bearer {tokens.get('access')}"}
+
+    def _call(self, base_url, scenario, i):
+        path, body, headers = self._request(scenario, i)
+        headers[SCENARIO_HEADER] = scenario
+        started = time.perf_counter()
+        try:
+            response = self._session().post(f'{base_url}{path}', json=body, headers=headers, timeout=60)
+        except requests.exceptions.RequestException:
+            return (time.perf_counter() - started) * 1000, 'error'
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if response.ok:
+            data = response.json()
+            if scenario in ('register', 'login'):
+                self.tokens[i] = (data.get('data') or {}).get('tokens') or {}
+            elif scenario == 'refresh':
+                previous = self.tokens.get(i) or {}
+                self.tokens[i] = {'access': data.get('access'), 'refresh': data.get('refresh') or previous.get('refresh')}
+        return elapsed_ms, response.status_code
+
+    def _run_scenario(self, app, provider, scenario):
+        app.queries.pop(scenario, None)
+        outbound_before = provider.total_calls()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='loadtest') as pool:
+            results = list(pool.map(
+                lambda i: self._call(f'{app.url}/api/users/', scenario, i), range(self.requests_per_scenario)
+            ))
+        duration = time.perf_counter() - started
+        outbound = provider.total_calls() - outbound_before
+
+        latencies = [elapsed for elapsed, _ in results]
+        statuses = Counter(str(code) for _, code in results)
+        queries = app.queries.get(scenario) or [0]
+        count = len(results)
+        return {
+            'requests': count,
+            'errors': sum(n for code, n in statuses.items() if not code.startswith('2')),
+            'status_codes': dict(statuses),
+            'duration_s': round(duration, 3),
+            'throughput_rps': round(count / duration, 2) if duration else None,
+            'latency_ms': {
+                'mean': round(statistics.mean(latencies), 2),
+                'p50': round(_percentile(latencies, 0.50), 2),
+                'p90': round(_percentile(latencies, 0.90), 2),
+                'p99': round(_percentile(latencies, 0.99), 2),
+                'max': round(max(latencies), 2),
+            },
+            'db_queries_per_request': {
+                'mean': round(statistics.mean(queries), 2),
+                'max': max(queries),
+            },
+            'outbound_calls_per_request': round(outbound / count, 2),
+        }
+
+    def run(self):
+        provider = StubIdentityProvider()
+        app = AppServer()
+        provider.start()
+        app.start()
+        env = {
+            'NEXT_PUBLIC_GOOGLE_CLIENT_ID': STUB_CLIENT_ID,
+            'GOOGLE_CLIENT_SECRET': 'loadtest',
+            'NEXT_PUBLIC_GOOGLE_REDIRECT_URI': 'http://localhost/callback',
+            'GITHUB_CLIENT_ID': 'loadtest',
+            'GITHUB_CLIENT_SECRET': 'loadtest',
+            'GITHUB_REDIRECT_URI': 'http://localhost/callback',
+        }
+        try:
+            with mock.patch.dict(os.environ, env), \
+                    mock.patch.object(google_key_cache, 'url', f'{provider.url}/google/certs'), \
+                    override_settings(
+                        ALLOWED_HOSTS=['127.0.0.1', 'localhost'],
+                        GOOGLE_TOKEN_URL=f'{provider.url}/google/token',
+                        GITHUB_TOKEN_URL=f'{provider.url}/github/token',
+                        GITHUB_API_URL=f'{provider.url}/github',
+                    ):
+                # Steady state: signing keys are already cached.
+                google_key_cache.refresh()
+                report = {}
+                needs_users = {'login', 'refresh', 'logout'} & set(self.scenarios)
+                if needs_users and 'register' not in self.scenarios:
+                    self._run_scenario(app, provider, 'register')
+                for scenario in self.scenarios:
+                    report[scenario] = self._run_scenario(app, provider, scenario)
+        finally:
+            app.stop()
+            provider.stop()
+
+        return {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'requests_per_scenario': self.requests_per_scenario,
+            'concurrency': self.concurrency,
+            'scenarios': report,
+        }
@@ -0,0 +1,144 @@
+import copy
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, load_backend
+from django.db.backends.signals import connection_created
+
+from backend.db.config import configure_database
+from backend.db.metrics import POOL_ENGINE
+
+MODES = ('no_reuse', 'persistent', 'psycopg', 'pgbouncer')
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request database latency with and without connection reuse. Each simulated request "
+        "runs Django's request_started/request_finished connection handling around a few queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="Alias whose settings to start from")
+        parser.add_argument('--host', help="Override HOST, e.g. a local Postgres")
+        parser.add_argument('--port', help="Override PORT")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per mode")
+        parser.add_argument('--threads', type=int, default=4, help="Concurrent request threads")
+        parser.add_argument('--queries', type=int, default=3, help="Queries per request")
+        parser.add_argument('--mode', choices=MODES, action='append',
+                            help="Only benchmark these modes (repeatable); pgbouncer needs --pgbouncer-host")
+        parser.add_argument('--pgbouncer-host')
+        parser.add_argument('--pgbouncer-port')
+        parser.add_argument('--json', action='store_true', help="Print a machine-readable report")
+
+    def _settings_for(self, base, mode, options):
+        if mode == 'no_reuse':
+            return {**base, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}
+        if mode == 'pgbouncer':
+            return configure_database(base, mode='pgbouncer', pgbouncer_host=options['pgbouncer_host'],
+                                      pgbouncer_port=options['pgbouncer_port'], conn_max_age=600)
+        return configure_database(base, mode=mode, workers=1, threads=options['threads'],
+                                  max_connections=options['threads'] * 2, conn_max_age=600)
+
+    def _run(self, alias, settings_dict, options):
+        backend = load_backend(settings_dict['ENGINE'])
+        local = threading.local()
+        wrappers, opened = [], []
+        lock = threading.Lock()
+
+        def count(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with lock:
+                    opened.append(1)
+
+        def request(_):
+            # Database wrappers are thread-bound, like django.db.connection.
+            wrapper = getattr(local, 'wrapper', None)
+            if wrapper is None:
+                wrapper = local.wrapper = backend.DatabaseWrapper(copy.deepcopy(settings_dict), alias)
+                with lock:
+                    wrappers.append(wrapper)
+            started = time.perf_counter()
+            wrapper.close_if_unusable_or_obsolete()
+            with wrapper.cursor() as cursor:
+                for _ in range(options['queries']):
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            wrapper.close_if_unusable_or_obsolete()
+            return (time.perf_counter() - started) * 1000
+
+        connection_created.connect(count, weak=False)
+        try:
+            with ThreadPoolExecutor(max_workers=options['threads'], thread_name_prefix='db-benchmark') as pool:
+                # Warm up: open the pool or the first persistent connections.
+                list(pool.map(request, range(options['threads'])))
+                warmup_opened = len(opened)
+                started = time.perf_counter()
+                latencies = list(pool.map(request, range(options['requests'])))
+                duration = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(count)
+            for wrapper in wrappers:
+                # The request threads are gone; close from here.
+                wrapper.inc_thread_sharing()
+                wrapper.close()
+            if settings_dict['ENGINE'] == POOL_ENGINE:
+                backend.DatabaseWrapper.close_pool(alias)
+
+        return {
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / duration, 2),
+            'latency_ms': {
+                'p50': round(_percentile(latencies, 0.50), 2),
+                'p99': round(_percentile(latencies, 0.99), 2),
+                'mean': round(statistics.mean(latencies), 2),
+            },
+            'connections_opened': len(opened) - warmup_opened,
+        }
+
+    def handle(self, *args, **options):
+        base = copy.deepcopy(connections[options['database']].settings_dict)
+        if base['ENGINE'] not in ('django.db.backends.postgresql', POOL_ENGINE):
+            raise CommandError("benchmark_db_connections needs a PostgreSQL database")
+        base['ENGINE'] = 'django.db.backends.postgresql'
+        base['OPTIONS'].pop('pool', None)
+        if options['host']:
+            base['HOST'] = options['host']
+        if options['port']:
+            base['PORT'] = options['port']
+
+        modes = options['mode'] or [mode for mode in MODES if mode != 'pgbouncer' or options['pgbouncer_host']]
+        if 'pgbouncer' in modes and not options['pgbouncer_host']:
+            raise CommandError("--mode pgbouncer needs --pgbouncer-host")
+
+        results = {}
+        for mode in modes:
+            try:
+                results[mode] = self._run(f'benchmark_{mode}', self._settings_for(base, mode, options), options)
+            except Exception as e:
+                # e.g. psycopg-pool not installed
+                self.stderr.write(f"{mode}: skipped ({e})")
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'host': base['HOST'],
+                'threads': options['threads'],
+                'queries_per_request': options['queries'],
+                'results': results,
+            }, indent=2))
+            return
+
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:<11} p50 {result['latency_ms']['p50']:>8.2f}ms  p99 {result['latency_ms']['p99']:>8.2f}ms  "
+                f"mean {result['latency_ms']['mean']:>8.2f}ms  {result['throughput_rps']:>8.1f} req/s  "
+                f"{result['connections_opened']:>5} connections opened"
+            )
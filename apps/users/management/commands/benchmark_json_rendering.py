@@ -0,0 +1,163 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from backend import renderers
+from backend.renderers import ORJSONRenderer, RawJSON, stream_json
+
+# Renderings compared for each payload. JSON columns arrive from the
+# database as text, so every variant but passthrough pays for decoding
+# them first (what JSONField.from_db_value does).
+VARIANTS = ('drf_json', 'orjson', 'orjson_passthrough', 'orjson_streamed')
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _metadata(rng, keys):
+    return {
+        f'key_{i}': rng.choice([
+            rng.random(), rng.randint(0, 10 ** 6), f'value-{rng.randint(0, 10 ** 6)}',
+            [rng.randint(0, 100) for _ in range(5)], {'nested': rng.random(), 'flag': rng.random() > 0.5},
+        ])
+        for i in range(keys)
+    }
+
+
+def component_page(rng, rows):
+    """An /api/assets/components/ page: rows with a metadata document."""
+    return [
+        {
+            'id': i, 'name': f'service-{i}', 'type': 'service', 'path': f'services/service-{i}',
+            'data_source': {'id': 1, 'name': 'acme/api', 'type': 'github'},
+            'security_score': rng.random() * 100, 'tags': ['backend', 'payments'],
+            'created_at': '2026-10-19T12:00:00.000000Z', 'metadata': json.dumps(_metadata(rng, 40)),
+        }
+        for i in range(rows)
+    ], ('metadata',)
+
+
+def compliance_page(rng, rows):
+    """An /api/policies/compliance-results/ page: rows with details."""
+    return [
+        {
+            'id': i, 'status': 'non_compliant', 'severity': 'high',
+            'component': {'id': i, 'name': f'service-{i}', 'type': 'service'},
+            'policy': {'id': 3, 'name': 'Baseline', 'policy_type': 'security'},
+            'checked_at': '2026-10-19T12:00:00.000000Z',
+            'details': json.dumps({
+                'rule': 'Encryption at rest',
+                'condition': {'all': [{'field': f'metadata.key_{j}', 'op': 'eq', 'value': j} for j in range(8)]},
+                'evidence': _metadata(rng, 20),
+            }),
+        }
+        for i in range(rows)
+    ], ('details',)
+
+
+def graph_page(rng, rows):
+    """A /api/visualization/graphs/ detail: one large graph_data document."""
+    nodes = [
+        {'id': f'n{i}', 'type': 'service', 'label': f'service-{i}', 'x': rng.random(), 'y': rng.random(),
+         'properties': _metadata(rng, 6)}
+        for i in range(rows * 10)
+    ]
+    edges = [
+        {'source': f'n{rng.randrange(len(nodes))}', 'target': f'n{rng.randrange(len(nodes))}', 'type': 'calls',
+         'weight': rng.random()}
+        for _ in range(rows * 25)
+    ]
+    return [{'id': 1, 'name': 'Acme', 'graph_data': json.dumps({'nodes': nodes, 'edges': edges})}], ('graph_data',)
+
+
+PAYLOADS = {
+    'components': component_page,
+    'compliance': compliance_page,
+    'graph': graph_page,
+}
+
+
+def _decoded(rows, columns):
+    return [{**row, **{column: json.loads(row[column]) for column in columns}} for row in rows]
+
+
+def _raw(rows, columns):
+    return [{**row, **{column: RawJSON(row[column]) for column in columns}} for row in rows]
+
+
+def _envelope(data):
+    return {'status': 'success', 'next': None, 'previous': None, 'data': data}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer with the orjson renderer, JSONB pass-through and streaming on "
+        "representative API payloads (component and compliance pages, a large graph)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--rows', type=int, default=200, help="Rows per page (graph size scales with it)")
+        parser.add_argument('--payload', choices=list(PAYLOADS), action='append',
+                            help="Only benchmark these payloads (repeatable)")
+        parser.add_argument('--json', action='store_true', help="Print a machine-readable report")
+
+    def _variants(self):
+        drf, fast = JSONRenderer(), ORJSONRenderer()
+        return {
+            'drf_json': lambda rows, columns: drf.render(_envelope(_decoded(rows, columns))),
+            'orjson': lambda rows, columns: fast.render(_envelope(_decoded(rows, columns))),
+            'orjson_passthrough': lambda rows, columns: fast.render(_envelope(_raw(rows, columns))),
+            'orjson_streamed': lambda rows, columns: b''.join(stream_json(
+                _envelope(None), 'data', rows,
+                lambda row: {**row, **{column: RawJSON(row[column]) for column in columns}},
+            )),
+        }
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stderr.write("orjson is not installed: the orjson variants measure the stdlib fallback")
+        rng = random.Random(42)
+        variants = self._variants()
+        results = {}
+        for name in options['payload'] or list(PAYLOADS):
+            rows, columns = PAYLOADS[name](rng, options['rows'])
+            results[name] = {}
+            for variant in VARIANTS:
+                render = variants[variant]
+                size = len(render(rows, columns))
+                samples = []
+                for _ in range(options['iterations']):
+                    started = time.perf_counter()
+                    render(rows, columns)
+                    samples.append((time.perf_counter() - started) * 1000)
+                results[name][variant] = {
+                    'bytes': size,
+                    'p50_ms': round(_percentile(samples, 0.50), 3),
+                    'p99_ms': round(_percentile(samples, 0.99), 3),
+                    'mean_ms': round(statistics.mean(samples), 3),
+                }
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'orjson': renderers.orjson is not None,
+                'rows': options['rows'],
+                'iterations': options['iterations'],
+                'results': results,
+            }, indent=2))
+            return
+
+        for name, by_variant in results.items():
+            baseline = by_variant['drf_json']['p50_ms']
+            for variant, result in by_variant.items():
+                speedup = baseline / result['p50_ms'] if result['p50_ms'] else float('inf')
+                self.stdout.write(
+                    f"{name:<11} {variant:<19} p50 {result['p50_ms']:>9.3f}ms  p99 {result['p99_ms']:>9.3f}ms  "
+                    f"{result['bytes']:>10} bytes  {speedup:>5.1f}x"
+                )
@@ -0,0 +1,111 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.assets.models.models import SoftwareComponent
+from apps.assets.serializers import SoftwareComponentListSerializer, SoftwareComponentSerializer
+from apps.integrations.models.models import DataSource, GitRepository
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-row CPU of the component list with the ModelSerializer (model instances from "
+        "select_related rows) and with the slim values_list() serializer. No database is needed: both "
+        "start from the row tuples a query would return."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help="Rows per page")
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--include-metadata', action='store_true', help="Also return the metadata column")
+        parser.add_argument('--json', action='store_true', help="Print a machine-readable report")
+
+    def _rows(self, count, names):
+        now = timezone.now()
+        metadata = json.dumps({f'key_{i}': i for i in range(20)})
+        values = {
+            'id': None, 'created_at': now, 'name': 'service', 'type': 'service', 'description': '',
+            'resource_id': None, 'path': 'services/service', 'discovery_method': 'scan', 'language': 'python',
+            'version': '1.0', 'last_updated_in_source': now, 'security_score': 72.5, 'tags': '["backend"]',
+            'is_active': True, 'is_ai_generated': False, 'updated_at': now, 'metadata': metadata,
+            'data_source__id': 1, 'data_source__name': 'acme/api', 'data_source__type': 'github',
+            'repository__id': 2, 'repository__full_name': 'acme/api', 'repository__provider': 'github',
+        }
+        compiled = SoftwareComponentListSerializer.compile(names)
+        slim_rows = []
+        for i in range(count):
+            values['id'] = i + 1
+            slim_rows.append(tuple(
+                values[column[:-len('_json')]] if column.endswith('_json') else values[column]
+                for column in compiled.columns
+            ))
+        return compiled, slim_rows, values
+
+    def _instances(self, slim_rows, values):
+        data_source = DataSource(id=1, name='acme/api', type='github')
+        repository = GitRepository(id=2, full_name='acme/api', provider='github')
+        instances = []
+        for row in slim_rows:
+            component = SoftwareComponent(
+                id=row[0], name=values['name'], type=values['type'], description='', resource_id=None,
+                path=values['path'], discovery_method='scan', language='python', version='1.0',
+                last_updated_in_source=values['last_updated_in_source'], security_score=72.5,
+                tags=json.loads(values['tags']), is_active=True, is_ai_generated=False,
+                metadata=json.loads(values['metadata']), data_source=data_source, repository=repository,
+                created_at=values['created_at'], updated_at=values['updated_at'],
+            )
+            instances.append(component)
+        return instances
+
+    def _measure(self, render, iterations):
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            render()
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
+
+    def handle(self, *args, **options):
+        names = SoftwareComponentListSerializer.default_fields()
+        if options['include_metadata']:
+            names = SoftwareComponentListSerializer.field_names()
+        compiled, slim_rows, values = self._rows(options['rows'], names)
+
+        def model_serializer():
+            # Row -> instance is part of the cost the slim path removes.
+            instances = self._instances(slim_rows, values)
+            return SoftwareComponentSerializer(instances, many=True, fields=names).data
+
+        def slim():
+            return [compiled.transform(row) for row in slim_rows]
+
+        results = {}
+        for name, render in (('model_serializer', model_serializer), ('slim', slim)):
+            render()
+            samples = self._measure(render, options['iterations'])
+            results[name] = {
+                'p50_ms': round(_percentile(samples, 0.50), 3),
+                'mean_ms': round(statistics.mean(samples), 3),
+                'per_row_us': round(statistics.median(samples) * 1000 / options['rows'], 2),
+            }
+        speedup = results['model_serializer']['p50_ms'] / max(results['slim']['p50_ms'], 1e-9)
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'rows': options['rows'], 'fields': names, 'results': results, 'speedup': round(speedup, 1),
+            }, indent=2))
+            return
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<17} p50 {result['p50_ms']:>8.3f}ms  mean {result['mean_ms']:>8.3f}ms  "
+                f"{result['per_row_us']:>7.2f}us/row"
+            )
+        self.stdout.write(f"slim is {speedup:.1f}x faster per page")
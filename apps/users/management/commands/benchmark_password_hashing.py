@@ -0,0 +1,105 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from apps.users.hashers import (
+    TunedArgon2PasswordHasher,
+    TunedPBKDF2PasswordHasher,
+    TunedScryptPasswordHasher,
+)
+
+# (profile, hasher class, PASSWORD_HASHING section, cost settings to try)
+CANDIDATES = [
+    ('argon2', TunedArgon2PasswordHasher, 'ARGON2', [
+        {'TIME_COST': 1, 'MEMORY_COST': 47104, 'PARALLELISM': 1},
+        {'TIME_COST': 2, 'MEMORY_COST': 19456, 'PARALLELISM': 1},
+        {'TIME_COST': 3, 'MEMORY_COST': 12288, 'PARALLELISM': 1},
+        {'TIME_COST': 2, 'MEMORY_COST': 102400, 'PARALLELISM': 8},
+    ]),
+    ('scrypt', TunedScryptPasswordHasher, 'SCRYPT', [
+        {'WORK_FACTOR': 2 ** 14, 'BLOCK_SIZE': 8, 'PARALLELISM': 1},
+        {'WORK_FACTOR': 2 ** 15, 'BLOCK_SIZE': 8, 'PARALLELISM': 1},
+        {'WORK_FACTOR': 2 ** 16, 'BLOCK_SIZE': 8, 'PARALLELISM': 1},
+    ]),
+    ('pbkdf2', TunedPBKDF2PasswordHasher, 'PBKDF2', [
+        {'ITERATIONS': 260000},
+        {'ITERATIONS': 600000},
+    ]),
+]
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _summary(samples):
+    return {
+        'p50_ms': round(_percentile(samples, 0.50), 2),
+        'p99_ms': round(_percentile(samples, 0.99), 2),
+        'mean_ms': round(statistics.mean(samples), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure register (hash) and login (verify) latency of each password hasher profile at several costs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--profile', choices=[name for name, _, _, _ in CANDIDATES], action='append',
+                            help="Only benchmark these profiles (repeatable)")
+        parser.add_argument('--json', action='store_true', help="Print a machine-readable report")
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        profiles = options['profile']
+        password = 'correct horse battery staple'
+        results = []
+
+        for profile, hasher_class, section, costs in CANDIDATES:
+            if profiles and profile not in profiles:
+                continue
+            for cost in costs:
+                with override_settings(PASSWORD_HASHING={section: cost}):
+                    hasher = hasher_class()
+                    try:
+                        encoded = hasher.encode(password, hasher.salt())
+                    except ValueError as e:
+                        # Missing optional library (argon2-cffi).
+                        self.stderr.write(f"{profile}: skipped ({e})")
+                        break
+
+                    register, login = [], []
+                    for _ in range(iterations):
+                        started = time.perf_counter()
+                        encoded = hasher.encode(password, hasher.salt())
+                        register.append((time.perf_counter() - started) * 1000)
+
+                        started = time.perf_counter()
+                        hasher.verify(password, encoded)
+                        login.append((time.perf_counter() - started) * 1000)
+
+                results.append({
+                    'profile': profile,
+                    'cost': cost,
+                    'register': _summary(register),
+                    'login': _summary(login),
+                    # Hashing is CPU-bound and single-threaded per call.
+                    'logins_per_core_per_sec': round(1000 / statistics.mean(login), 1),
+                })
+
+        if options['json']:
+            self.stdout.write(json.dumps({'iterations': iterations, 'results': results}, indent=2))
+            return
+
+        for result in results:
+            cost = ', '.join(f"{key.lower()}={value}" for key, value in result['cost'].items())
+            self.stdout.write(
+                f"{result['profile']:<7} {cost:<50} "
+                f"register p50 {result['register']['p50_ms']:>8.2f}ms p99 {result['register']['p99_ms']:>8.2f}ms  "
+                f"login p50 {result['login']['p50_ms']:>8.2f}ms p99 {result['login']['p99_ms']:>8.2f}ms  "
+                f"{result['logins_per_core_per_sec']:>7.1f} logins/s/core"
+            )
@@ -0,0 +1,101 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.policies import evaluation
+from apps.policies.engine import RuleSet
+from apps.policies.models.models import PolicyRule
+
+COMPONENT_TYPES = ('service', 'library', 'function', 'container', 'database', 'queue', 'bucket', 'gateway')
+
+
+def _rules(rng, count):
+    rules = []
+    for i in range(count):
+        condition = rng.choice([
+            {'field': 'security_score', 'op': 'lt', 'value': rng.randint(10, 90)},
+            {'field': 'metadata.encryption', 'op': 'eq', 'value': False},
+            {'all': [
+                {'field': 'language', 'op': 'in', 'value': ['php', 'perl']},
+                {'not': {'field': 'tags', 'op': 'contains', 'value': 'internal'}},
+            ]},
+            {'any': [
+                {'field': 'metadata.public', 'op': 'eq', 'value': True},
+                {'field': 'version', 'op': 'matches', 'value': r'^0\.'},
+            ]},
+        ])
+        rules.append(PolicyRule(
+            pk=i + 1, name=f'rule-{i}', rule_type='condition', condition=condition, severity='medium',
+            target_component_type=rng.choice(COMPONENT_TYPES + ('',)),
+            target_resource_pattern=rng.choice(['', '', 'services/*', '*-api']),
+        ))
+    return rules
+
+
+def _components(rng, count):
+    return [
+        {
+            'id': i, 'name': f'component-{i}' + rng.choice(['', '-api']), 'type': rng.choice(COMPONENT_TYPES),
+            'path': rng.choice([f'services/component-{i}', f'lib/component-{i}', None]),
+            'security_score': rng.randint(0, 100), 'language': rng.choice(['python', 'go', 'php']),
+            'version': rng.choice(['0.9.1', '1.2.0']), 'tags': rng.choice([[], ['internal']]),
+            'metadata': {'encryption': rng.random() < 0.5, 'public': rng.random() < 0.1},
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the interpreted rule evaluation with the compiled policy engine on synthetic rules and "
+        "components (no database). The interpreter runs on a sample and is extrapolated."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rules', type=int, default=500)
+        parser.add_argument('--components', type=int, default=200000)
+        parser.add_argument('--batch-size', type=int, default=500, help="Components per scan chunk")
+        parser.add_argument('--sample', type=int, default=5000, help="Components evaluated by the interpreter")
+        parser.add_argument('--json', action='store_true', help="Print a machine-readable report")
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        rules = _rules(rng, options['rules'])
+        components = _components(rng, options['components'])
+        batch_size = options['batch_size']
+
+        started = time.perf_counter()
+        rule_set = RuleSet(rules)
+        compile_s = time.perf_counter() - started
+        issues = 0
+        for i in range(0, len(components), batch_size):
+            issues += sum(1 for _ in rule_set.evaluate(components[i:i + batch_size]))
+        compiled_s = time.perf_counter() - started
+
+        sample = components[:options['sample']]
+        started = time.perf_counter()
+        for component in sample:
+            for rule in rules:
+                if evaluation.rule_applies(rule, component):
+                    evaluation.evaluate(rule, component)
+        interpreted_s = (time.perf_counter() - started) * len(components) / max(len(sample), 1)
+
+        report = {
+            'rules': len(rules),
+            'components': len(components),
+            'issues': issues,
+            'compile_ms': round(compile_s * 1000, 2),
+            'compiled_s': round(compiled_s, 2),
+            'interpreted_s_estimate': round(interpreted_s, 2),
+            'speedup': round(interpreted_s / compiled_s, 1) if compiled_s else None,
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"{report['rules']} rules x {report['components']} components: compiled {report['compiled_s']}s "
+            f"(compile {report['compile_ms']}ms, {report['issues']} issues), interpreted ~{report['interpreted_s_estimate']}s, "
+            f"{report['speedup']}x"
+        )
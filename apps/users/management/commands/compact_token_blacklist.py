@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.token_blacklist import compact
+
+
+class Command(BaseCommand):
+    help = "Bulk-delete expired outstanding and blacklisted refresh tokens"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        outstanding, blacklisted = compact(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {outstanding} expired outstanding tokens and {blacklisted} blacklist entries"
+        ))
@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.users.loadtest import SCENARIOS, AuthLoadTest
+
+
+class Command(BaseCommand):
+    help = "Load-test the auth endpoints against a throwaway test database and a local OAuth stub"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help="Requests per scenario")
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--scenario', choices=SCENARIOS, action='append',
+                            help="Only run these scenarios (repeatable)")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+        parser.add_argument('--keepdb', action='store_true', help="Reuse and keep the test database")
+
+    def handle(self, *args, **options):
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # The app server closes connections after every request, which
+            # would drop an in-memory database.
+            test_settings['NAME'] = os.path.join(tempfile.gettempdir(), 'loadtest_auth.sqlite3')
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            report = AuthLoadTest(
+                requests_per_scenario=options['requests'],
+                concurrency=options['concurrency'],
+                scenarios=options['scenario'] or SCENARIOS,
+            ).run()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
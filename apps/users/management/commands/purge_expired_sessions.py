@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from backend.sessions import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = "Bulk-delete expired sessions from the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_sessions(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired sessions"))
@@ -148,7 +148,10 @@ class User(AbstractBaseUser, PermissionsMixin):
         self.password = make_password(raw_password)
 
     def check_password(self, raw_password):
-        return check_password(raw_password, self.password)
+        from ..hashers import schedule_rehash
+
+        # Outdated hashes are upgraded off the request path.
+        return check_password(raw_password, self.password, lambda raw: schedule_rehash(self, raw))
 
     def is_business_user(self):
         """Check if this is a business user"""
@@ -1,5 +1,11 @@
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .authentication import add_principal_claims, get_cached_user
 from .models.models import User
+from .token_blacklist import FastBlacklistRefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -50,3 +56,29 @@ class GithubAuthSerializer(serializers.Serializer):
 
 class TokenSerializer(serializers.Serializer):
     token = serializers.CharField(max_length=255)
+
+
+class FastBlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer that re-reads the user: inactive users cannot
+    refresh, and the principal claims (active, staff, role, organization)
+    of the new tokens are re-stamped from the current row.
+    """
+    token_class = FastBlacklistRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = get_cached_user(refresh.payload.get(api_settings.USER_ID_CLAIM))
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        add_principal_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .models.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    # Drop now and again after commit so a concurrent read cannot re-cache
+    # the pre-save row.
+    invalidate_cached_user(instance)
+    transaction.on_commit(lambda: invalidate_cached_user(instance))
@@ -0,0 +1,23 @@
+import logging
+
+from celery import shared_task
+
+from backend import sessions
+
+from .token_blacklist import compact
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def compact_token_blacklist():
+    outstanding, blacklisted = compact()
+    logger.info(f"compact_token_blacklist: deleted {outstanding} outstanding, {blacklisted} blacklisted tokens")
+    return {'outstanding': outstanding, 'blacklisted': blacklisted}
+
+
+@shared_task
+def purge_expired_sessions():
+    deleted = sessions.purge_expired_sessions()
+    logger.info(f"purge_expired_sessions: deleted {deleted} sessions")
+    return deleted
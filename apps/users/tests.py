@@ -1,3 +1,792 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+import requests
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.products.models.models import ProductCatalog
+from apps.users.google_auth import (
+    GoogleAudienceError,
+    GoogleKeyCache,
+    GoogleTokenError,
+    verify_google_id_token,
+)
+from apps.users.hashers import TunedPBKDF2PasswordHasher
+from apps.users import hashers, health
+from apps.users.authentication import add_principal_claims
+from apps.users.http_client import AsyncOutboundHttpClient, CircuitOpenError, OutboundHttpClient
+from apps.users import token_blacklist as blacklist_module
+from apps.users.models.models import Organization, User
+from apps.users.serializers import FastBlacklistTokenRefreshSerializer
+from apps.users.token_blacklist import FastBlacklistRefreshToken, TokenBlacklist
+from apps.users.views import views as views_module
+from apps.users.views.views import GithubLoginView, HealthCheckView
+from backend.cache import bump_tags, cached, tenant_cache
+from backend.db.routers import ReplicaRouter, ReplicaRoutingMiddleware
+from backend import renderers
+from backend.async_views import AsyncAPIView
+from backend.invalidation import org_tag
+from backend.pagination import KeysetPagination
+from backend.renderers import ORJSONParser, ORJSONRenderer, RawJSON, stream_json
+from backend.sessions import SAVED_AT_KEY, SessionMiddleware, purge_expired_sessions
+
+CLIENT_ID = 'test-client.apps.googleusercontent.com'
+
+
+def make_id_token(private_key, kid='test-kid', **overrides):
+    now = int(time.time())
+    claims = {
+        'iss': 'https://accounts.google.com',
+        'aud': CLIENT_ID,
+        'sub': '1234567890',
+        'email': 'user@example.com',
+        'iat': now,
+        'exp': now + 3600,
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, private_key, algorithm='RS256', headers={'kid': kid})
+
+
+class GoogleIdTokenVerificationTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def setUp(self):
+        self.cache = GoogleKeyCache()
+        self.cache.set_keys({'test-kid': self.private_key.public_key()}, max_age=3600)
+
+    def test_valid_token_returns_claims(self):
+        claims = verify_google_id_token(make_id_token(self.private_key), CLIENT_ID, key_cache=self.cache)
+        self.assertEqual(claims['email'], 'user@example.com')
+        self.assertEqual(claims['sub'], '1234567890')
+
+    def test_rejects_wrong_audience(self):
+        token = make_id_token(self.private_key, aud='someone-else')
+        with self.assertRaises(GoogleAudienceError):
+            verify_google_id_token(token, CLIENT_ID, key_cache=self.cache)
+
+    def test_rejects_wrong_issuer(self):
+        token = make_id_token(self.private_key, iss='https://evil.example.com')
+        with self.assertRaises(GoogleTokenError):
+            verify_google_id_token(token, CLIENT_ID, key_cache=self.cache)
+
+    def test_rejects_expired_token(self):
+        past = int(time.time()) - 7200
+        token = make_id_token(self.private_key, iat=past - 3600, exp=past)
+        with self.assertRaises(GoogleTokenError):
+            verify_google_id_token(token, CLIENT_ID, key_cache=self.cache)
+
+    def test_rejects_bad_signature(self):
+        token = make_id_token(self.other_key)
+        with self.assertRaises(GoogleTokenError):
+            verify_google_id_token(token, CLIENT_ID, key_cache=self.cache)
+
+    def test_cached_keys_are_used_without_fetching(self):
+        with mock.patch.object(GoogleKeyCache, 'fetch') as fetch:
+            for _ in range(5):
+                verify_google_id_token(make_id_token(self.private_key), CLIENT_ID, key_cache=self.cache)
+        fetch.assert_not_called()
+
+    def test_unknown_kid_triggers_single_refresh(self):
+        rotated = {'new-kid': self.other_key.public_key()}
+        with mock.patch.object(GoogleKeyCache, 'fetch', return_value=(rotated, 3600)) as fetch:
+            claims = verify_google_id_token(
+                make_id_token(self.other_key, kid='new-kid'), CLIENT_ID, key_cache=self.cache
+            )
+            with self.assertRaises(GoogleTokenError):
+                verify_google_id_token(make_id_token(self.other_key, kid='unknown'), CLIENT_ID, key_cache=self.cache)
+        self.assertEqual(claims['email'], 'user@example.com')
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_cold_cache_fetches_keys(self):
+        cache = GoogleKeyCache()
+        keys = {'test-kid': self.private_key.public_key()}
+        with mock.patch.object(GoogleKeyCache, 'fetch', return_value=(keys, 600)) as fetch:
+            verify_google_id_token(make_id_token(self.private_key), CLIENT_ID, key_cache=cache)
+        fetch.assert_called_once()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Each path maps to the list of status codes returned on successive calls.
+    responses = {}
+    calls = {}
+
+    def _respond(self):
+        calls = self.calls.setdefault(self.path, 0)
+        self.calls[self.path] = calls + 1
+        statuses = self.responses.get(self.path, [200])
+        if statuses == 'slow':
+            time.sleep(0.5)
+            code = 200
+        else:
+            code = statuses[min(calls, len(statuses) - 1)]
+        body = b'{"ok": true}'
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(OUTBOUND_HTTP={
+    'BACKOFF_BASE': 0,
+    'BACKOFF_MAX': 0,
+    'BREAKER_FAILURE_THRESHOLD': 3,
+    'BREAKER_RESET_TIMEOUT': 60,
+})
+class StubServerTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubHandler.responses = {}
+        StubHandler.calls = {}
+        self.client = OutboundHttpClient()
+
+    def tearDown(self):
+        self.client.close()
+
+
+class OutboundHttpClientTests(StubServerTestCase):
+    def test_get_reuses_pooled_session(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(f'{self.base_url}/ok').status_code, 200)
+        metrics = self.client.metrics()[f'127.0.0.1:{self.server.server_port}']
+        self.assertEqual(metrics['calls'], 3)
+        self.assertEqual(len(self.client._sessions), 1)
+
+    def test_get_retries_transient_errors(self):
+        StubHandler.responses['/flaky'] = [503, 503, 200]
+        response = self.client.get(f'{self.base_url}/flaky')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StubHandler.calls['/flaky'], 3)
+
+    def test_post_is_not_retried_after_reaching_server(self):
+        StubHandler.responses['/token'] = [503, 200]
+        response = self.client.post(f'{self.base_url}/token', data={'code': 'abc'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(StubHandler.calls['/token'], 1)
+
+    def test_read_timeout_raises(self):
+        StubHandler.responses['/slow'] = 'slow'
+        with self.assertRaises(requests.exceptions.Timeout):
+            self.client.get(f'{self.base_url}/slow', timeout=(1, 0.1), max_retries=0)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        StubHandler.responses['/down'] = [500]
+        for _ in range(3):
+            self.client.get(f'{self.base_url}/down', max_retries=0)
+        with self.assertRaises(CircuitOpenError):
+            self.client.get(f'{self.base_url}/down')
+        self.assertEqual(StubHandler.calls['/down'], 3)
+
+
+class AsyncOutboundHttpClientTests(StubServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.async_client = AsyncOutboundHttpClient(self.client)
+
+    async def test_retries_and_metrics_are_shared_with_the_sync_client(self):
+        StubHandler.responses['/flaky'] = [503, 200]
+        response = await self.async_client.get(f'{self.base_url}/flaky')
+        await self.async_client.aclose()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'ok': True})
+        metrics = self.client.metrics()[f'127.0.0.1:{self.server.server_port}']
+        self.assertEqual((metrics['calls'], metrics['retries']), (2, 1))
+
+    async def test_post_is_not_retried_after_reaching_server(self):
+        StubHandler.responses['/token'] = [503, 200]
+        response = await self.async_client.post(f'{self.base_url}/token', data={'code': 'abc'})
+        await self.async_client.aclose()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(StubHandler.calls['/token'], 1)
+
+    async def test_timeout_raises_the_requests_exception(self):
+        StubHandler.responses['/slow'] = 'slow'
+        with self.assertRaises(requests.exceptions.Timeout):
+            await self.async_client.get(f'{self.base_url}/slow', timeout=(1, 0.1), max_retries=0)
+        await self.async_client.aclose()
+
+    async def test_open_circuit_short_circuits_async_calls(self):
+        StubHandler.responses['/down'] = [500]
+        for _ in range(3):
+            self.client.get(f'{self.base_url}/down', max_retries=0)
+        with self.assertRaises(CircuitOpenError):
+            await self.async_client.get(f'{self.base_url}/down')
+        self.assertEqual(StubHandler.calls['/down'], 3)
+
+    async def test_slow_calls_wait_concurrently(self):
+        StubHandler.responses['/slow'] = 'slow'
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(self.async_client.get(f'{self.base_url}/slow') for _ in range(8)))
+        await self.async_client.aclose()
+        self.assertEqual({response.status_code for response in responses}, {200})
+        # Eight 0.5s upstream calls, overlapped.
+        self.assertLess(time.perf_counter() - started, 2)
+
+    def test_wsgi_requests_close_their_loop_clients(self):
+        async_client = self.async_client
+        opened = []
+
+        class UpstreamView(AsyncAPIView):
+            permission_classes = [AllowAny]
+            authentication_classes = []
+            loop_resources = (async_client,)
+
+            async def get(view, request):
+                response = await async_client.get(f'{self.base_url}/ok')
+                opened.extend(async_client._loop_clients[asyncio.get_running_loop()].values())
+                return Response({'status': response.status_code})
+
+        response = async_to_sync(UpstreamView.as_view())(RequestFactory().get('/upstream/'))
+        self.assertEqual(response.data, {'status': 200})
+        self.assertEqual(len(opened), 1)
+        self.assertTrue(opened[0].is_closed)
+
+
+class HealthCheckTests(SimpleTestCase):
+    report = {'status': 'ok', 'checked_at': 0, 'checks': {'database': {'status': 'ok', 'connections': 12}}}
+
+    def get(self, report=None, user=None, **headers):
+        request = APIRequestFactory().get('/api/users/status/', **headers)
+        if user is not None:
+            force_authenticate(request, user=user)
+        with mock.patch.object(health.readiness, 'get', return_value=report or self.report):
+            return HealthCheckView.as_view()(request)
+
+    def test_anonymous_callers_only_get_the_status(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('data', response.data)
+        response = self.get(report={'status': 'down', 'checked_at': 0, 'checks': {}})
+        self.assertEqual(response.status_code, 503)
+        self.assertNotIn('data', response.data)
+
+    def test_staff_users_get_the_report(self):
+        self.assertEqual(self.get(user=User(email='ops@example.com', is_staff=True)).data['data'], self.report)
+        self.assertNotIn('data', self.get(user=User(email='dev@example.com')).data)
+
+    @override_settings(HEALTH_CHECK={'PROBE_TOKEN': 'probe-secret'})
+    def test_probe_token_gets_the_report(self):
+        self.assertEqual(self.get(HTTP_X_HEALTH_TOKEN='probe-secret').data['data'], self.report)
+        self.assertNotIn('data', self.get(HTTP_X_HEALTH_TOKEN='wrong').data)
+
+    def test_check_errors_do_not_leak_exception_text(self):
+        def failing():
+            raise RuntimeError('could not connect to postgres://admin:hunter2@db')
+
+        with mock.patch.dict(health.CHECKS, {'database': failing}, clear=True):
+            report = health.run_checks()
+        self.assertEqual(report['checks']['database'], {'status': 'down', 'error': 'RuntimeError'})
+
+
+TIERED_CACHES = {
+    'default': {
+        'BACKEND': 'backend.cache.TieredCache',
+        'LOCATION': 'tests',
+        'OPTIONS': {'L2': 'l2', 'L1_TIMEOUT': 60},
+    },
+    'l2': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-l2'},
+}
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TaggedCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_entry_is_served_until_a_tag_is_bumped(self):
+        compute = mock.Mock(side_effect=['v1', 'v2'])
+        self.assertEqual(cached('products', compute, tags=['org:1:products']), 'v1')
+        self.assertEqual(cached('products', compute, tags=['org:1:products']), 'v1')
+        bump_tags(['org:1:products'])
+        self.assertEqual(cached('products', compute, tags=['org:1:products']), 'v2')
+        self.assertEqual(compute.call_count, 2)
+
+    def test_unrelated_tag_keeps_entry(self):
+        compute = mock.Mock(side_effect=['v1', 'v2'])
+        cached('graph', compute, tags=['graph:17'])
+        bump_tags(['graph:18', 'org:1:products'])
+        self.assertEqual(cached('graph', compute, tags=['graph:17']), 'v1')
+
+    def test_change_during_compute_is_not_served_afterwards(self):
+        def compute_while_a_write_commits():
+            # The row changes after the value was read from the database.
+            bump_tags(['org:1:insights'])
+            return 'old'
+
+        self.assertEqual(cached('insights', compute_while_a_write_commits, tags=['org:1:insights']), 'old')
+        self.assertEqual(cached('insights', lambda: 'new', tags=['org:1:insights']), 'new')
+
+    def test_bump_from_another_process_is_seen_despite_l1(self):
+        cached('products', lambda: 'v1', tags=['org:1:products'])
+        # Another process bumps the tag in Redis; this process's L1 still
+        # holds the entry.
+        caches['l2'].incr('tag:org:1:products')
+        self.assertEqual(cached('products', lambda: 'v2', tags=['org:1:products']), 'v2')
+
+    def test_tenant_invalidation_orphans_all_entries(self):
+        tenant = tenant_cache(42)
+        tenant.set('settings', {'theme': 'dark'})
+        self.assertEqual(tenant.get('settings'), {'theme': 'dark'})
+        tenant.invalidate()
+        self.assertIsNone(tenant.get('settings'))
+        self.assertIsNone(tenant_cache(43).get('settings'))
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(1)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cached('rollup', compute, tags=['org:1:compliance'])))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 5)
+        self.assertEqual(len(calls), 1)
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class ModelInvalidationTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+
+    def product_names(self):
+        return cached(
+            f'products:{self.organization.pk}',
+            lambda: sorted(ProductCatalog.objects.filter(organization=self.organization).values_list('name', flat=True)),
+            tags=[org_tag(self.organization.pk, 'products')],
+        )
+
+    def test_save_invalidates_after_commit(self):
+        self.assertEqual(self.product_names(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductCatalog.objects.create(name='api', organization=self.organization)
+        self.assertEqual(self.product_names(), ['api'])
+
+    def test_delete_invalidates(self):
+        product = ProductCatalog.objects.create(name='api', organization=self.organization)
+        self.assertEqual(self.product_names(), ['api'])
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(self.product_names(), [])
+
+    def test_queryset_update_invalidates(self):
+        ProductCatalog.objects.create(name='api', organization=self.organization)
+        self.assertEqual(self.product_names(), ['api'])
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductCatalog.objects.filter(organization=self.organization).update(name='web')
+        self.assertEqual(self.product_names(), ['web'])
+
+    def test_bulk_create_and_bulk_update_invalidate(self):
+        self.assertEqual(self.product_names(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            products = ProductCatalog.objects.bulk_create([
+                ProductCatalog(name='a', organization=self.organization),
+                ProductCatalog(name='b', organization=self.organization),
+            ])
+        self.assertEqual(self.product_names(), ['a', 'b'])
+
+        for product in products:
+            product.name = product.name.upper()
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductCatalog.objects.bulk_update(products, ['name'])
+        self.assertEqual(self.product_names(), ['A', 'B'])
+
+    def test_tags_are_bumped_on_every_change_and_on_commit(self):
+        with mock.patch('backend.invalidation.bump_tags') as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                product = ProductCatalog.objects.create(name='api', organization=self.organization)
+                ProductCatalog.objects.filter(pk=product.pk).update(name='web')
+                product.save()
+        self.assertEqual(bump.call_count, 4)
+        self.assertEqual(bump.call_args_list[-1].args[0], bump.call_args_list[0].args[0])
+
+    def test_reads_inside_the_changing_transaction_are_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = ProductCatalog.objects.create(name='api', organization=self.organization)
+            self.assertEqual(self.product_names(), ['api'])
+            product.name = 'web'
+            product.save()
+            self.assertEqual(self.product_names(), ['web'])
+        self.assertFalse(caches['default'].get(f'products:{self.organization.pk}'))
+        self.assertEqual(self.product_names(), ['web'])
+
+    def test_other_organizations_keep_their_entries(self):
+        other = Organization.objects.create(name='Other', slug='other')
+        compute = mock.Mock(return_value=[])
+        key, tags = f'products:{other.pk}', [org_tag(other.pk, 'products')]
+        cached(key, compute, tags=tags)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductCatalog.objects.create(name='api', organization=self.organization)
+        cached(key, compute, tags=tags)
+        self.assertEqual(compute.call_count, 1)
+
+
+class JSONRenderingTests(SimpleTestCase):
+    payload = {
+        'status': 'success',
+        'data': [{'id': 1, 'metadata': RawJSON('{"a": [1, 2], "b": null}'), 'score': 0.5, 'name': 'caf\u00e9'}],
+    }
+    expected = {'status': 'success', 'data': [{'id': 1, 'metadata': {'a': [1, 2], 'b': None}, 'score': 0.5, 'name': 'caf\u00e9'}]}
+
+    def test_raw_json_is_embedded(self):
+        self.assertEqual(json.loads(ORJSONRenderer().render(self.payload)), self.expected)
+
+    def test_stdlib_fallback_renders_the_same_document(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(json.loads(ORJSONRenderer().render(self.payload)), self.expected)
+
+    def test_streamed_list_matches_the_rendered_document(self):
+        envelope = {'status': 'success', 'next': 'https://api.test/?cursor=x', 'data': None}
+        items = [{'id': i, 'metadata': RawJSON('{"i": %d}' % i)} for i in range(3)]
+        with mock.patch.object(renderers, 'STREAM_CHUNK_SIZE', 8):
+            chunks = list(stream_json(envelope, 'data', items, dict))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(b''.join(chunks)), {
+            'status': 'success', 'next': 'https://api.test/?cursor=x',
+            'data': [{'id': i, 'metadata': {'i': i}} for i in range(3)],
+        })
+
+    def test_datetimes_keep_the_drf_format(self):
+        data = {'at': datetime(2026, 10, 19, 8, 30, 15, 123456, tzinfo=dt_timezone.utc), 'on': date(2026, 10, 19)}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_small_pages_are_rendered_before_responding(self):
+        paginator = KeysetPagination()
+        paginator.next_position = paginator.previous_position = None
+
+        def serialize(item):
+            if item == 2:
+                raise ValueError('bad item')
+            return {'id': item}
+
+        response = paginator.get_streaming_response([0, 1], serialize)
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(json.loads(response.content)['data'], [{'id': 0}, {'id': 1}])
+        with self.assertRaises(ValueError):
+            paginator.get_streaming_response([0, 1, 2], serialize)
+        with mock.patch.object(renderers, 'STREAM_CHUNK_SIZE', 8):
+            response = paginator.get_streaming_response([0, 1], serialize)
+        self.assertIsInstance(response, StreamingHttpResponse)
+
+    def test_parser_round_trip_and_errors(self):
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO(b'{"a": [1, "\xc3\xa9"]}')), {'a': [1, '\u00e9']})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"a": '))
+
+
+@override_settings(CACHES=TIERED_CACHES, TOKEN_BLACKLIST={'REDIS_URL': None})
+class TokenBlacklistTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='dev@acme.test', password='pw')
+
+    def other_process(self):
+        # A fresh in-process store, as in another gunicorn or Celery worker.
+        return mock.patch.object(blacklist_module, 'token_blacklist', TokenBlacklist())
+
+    def test_blacklisting_in_one_process_is_seen_by_the_others(self):
+        refresh = FastBlacklistRefreshToken.for_user(self.user)
+        other = TokenBlacklist()
+        jti, exp = refresh['jti'], refresh['exp']
+        self.assertFalse(other.is_blacklisted(jti, exp))
+        refresh.blacklist()
+        self.assertTrue(other.is_blacklisted(jti, exp))
+
+    def test_rotated_refresh_token_cannot_be_reused_in_another_process(self):
+        refresh = str(FastBlacklistRefreshToken.for_user(self.user))
+        serializer = FastBlacklistTokenRefreshSerializer(data={'refresh': refresh})
+        self.assertTrue(serializer.is_valid())
+        self.assertIn('refresh', serializer.validated_data)
+        with self.other_process():
+            with self.assertRaises(TokenError):
+                FastBlacklistTokenRefreshSerializer(data={'refresh': refresh}).is_valid()
+
+
+@override_settings(CACHES=TIERED_CACHES, TOKEN_BLACKLIST={'REDIS_URL': None})
+class TokenRefreshClaimsTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(email='admin@acme.test', password='pw', is_staff=True)
+        self.refresh = str(add_principal_claims(FastBlacklistRefreshToken.for_user(self.user), self.user))
+
+    def refreshed(self):
+        serializer = FastBlacklistTokenRefreshSerializer(data={'refresh': self.refresh})
+        serializer.is_valid()
+        return serializer.validated_data
+
+    def test_deactivated_user_cannot_refresh(self):
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.refreshed()
+
+    def test_refreshed_tokens_carry_current_claims(self):
+        self.assertTrue(FastBlacklistRefreshToken(self.refresh)['is_staff'])
+        self.user.is_staff = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        data = self.refreshed()
+        self.assertFalse(AccessToken(data['access'])['is_staff'])
+        self.assertFalse(FastBlacklistRefreshToken(data['refresh'])['is_staff'])
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self.payload
+
+
+@override_settings(CACHES=TIERED_CACHES)
+@mock.patch.dict('os.environ', {'GITHUB_CLIENT_ID': 'id', 'GITHUB_CLIENT_SECRET': 'secret'})
+class GithubLoginTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+        token = FakeResponse({'access_token': 'gho_test'})
+        profile = FakeResponse({'id': 42, 'login': 'octocat'})
+        emails = FakeResponse([{'email': 'octocat@example.com', 'primary': True, 'verified': True}])
+        patches = [
+            mock.patch.object(views_module.async_http_client, 'post', mock.AsyncMock(return_value=token)),
+            mock.patch.object(views_module, 'afetch_profile', mock.AsyncMock(return_value=profile)),
+            mock.patch.object(views_module, 'afetch_emails', mock.AsyncMock(return_value=emails)),
+            mock.patch.object(GithubLoginView, 'complete_login', lambda view, email, data: Response({'email': email})),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def login(self):
+        request = APIRequestFactory().post('/api/users/login/github/', {'code': 'abc'}, format='json')
+        return async_to_sync(GithubLoginView.as_view())(request)
+
+    def test_profile_and_emails_are_fetched_concurrently(self):
+        in_flight, overlap = [], []
+
+        def upstream(response):
+            async def call(access_token):
+                in_flight.append(access_token)
+                await asyncio.sleep(0.01)
+                overlap.append(len(in_flight))
+                in_flight.remove(access_token)
+                return response
+            return call
+
+        views_module.afetch_profile.side_effect = upstream(views_module.afetch_profile.return_value)
+        views_module.afetch_emails.side_effect = upstream(views_module.afetch_emails.return_value)
+        self.assertEqual(self.login().data, {'email': 'octocat@example.com'})
+        self.assertEqual(max(overlap), 2)
+
+    def test_cached_identity_is_used_over_the_email_lookup(self):
+        self.assertEqual(self.login().data, {'email': 'octocat@example.com'})
+        views_module.afetch_emails.return_value = FakeResponse({'message': 'Server Error'}, status_code=500)
+        self.assertEqual(self.login().data, {'email': 'octocat@example.com'})
+
+    def test_failed_profile_call_fails_the_login(self):
+        views_module.afetch_profile.return_value = FakeResponse({'message': 'Bad credentials'}, status_code=401)
+        self.assertEqual(self.login().status_code, 400)
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.db', SESSION_SAVE_EVERY_REQUEST=False, SESSION_SAVE_INTERVAL=900,
+)
+class SessionMiddlewareTests(TestCase):
+    def respond(self, session_key):
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+        middleware = SessionMiddleware(lambda request: HttpResponse())
+        middleware.process_request(request)
+        with mock.patch.object(DBSessionStore, 'save', autospec=True, side_effect=DBSessionStore.save) as save:
+            middleware.process_response(request, HttpResponse())
+        return save.call_count
+
+    def session(self, saved_at):
+        store = DBSessionStore()
+        store.update({'user': 1, SAVED_AT_KEY: saved_at})
+        store.create()
+        return store.session_key
+
+    def test_recently_saved_session_is_not_written(self):
+        self.assertEqual(self.respond(self.session(int(time.time()))), 0)
+
+    def test_stale_session_is_written_to_slide_its_expiry(self):
+        key = self.session(int(time.time()) - 1000)
+        self.assertEqual(self.respond(key), 1)
+        self.assertGreater(DBSessionStore(key).load()[SAVED_AT_KEY], int(time.time()) - 10)
+
+    def test_unknown_session_is_not_created(self):
+        self.assertEqual(self.respond('x' * 32), 0)
+        self.assertFalse(Session.objects.exists())
+
+    def test_purge_deletes_expired_sessions_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f'expired-{i}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=now + timedelta(days=1))
+        self.assertEqual(purge_expired_sessions(batch_size=2, now=now), 5)
+        self.assertEqual(list(Session.objects.values_list('pk', flat=True)), ['live'])
+
+
+@override_settings(
+    PASSWORD_HASHERS=['apps.users.hashers.TunedPBKDF2PasswordHasher'],
+    PASSWORD_HASHING={'PBKDF2': {'ITERATIONS': 1000}, 'ASYNC_REHASH': False},
+)
+class PasswordRehashTests(TestCase):
+    def setUp(self):
+        self.hasher = TunedPBKDF2PasswordHasher()
+        self.user = User.objects.create_user(email='hash@acme.test', password='pw')
+        self.outdated = self.hasher.encode('pw', self.hasher.salt(), iterations=500)
+
+    def test_must_update_follows_the_configured_cost(self):
+        self.assertTrue(self.hasher.must_update(self.outdated))
+        self.assertFalse(self.hasher.must_update(self.user.password))
+
+    def test_login_upgrades_an_outdated_hash(self):
+        User.objects.filter(pk=self.user.pk).update(password=self.outdated)
+        self.user.refresh_from_db()
+
+        self.assertTrue(self.user.check_password('pw'))
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.hasher.must_update(self.user.password))
+        self.assertTrue(self.user.check_password('pw'))
+
+    def test_rehash_does_not_overwrite_a_changed_password(self):
+        User.objects.filter(pk=self.user.pk).update(password=self.outdated)
+        self.user.refresh_from_db()
+        User.objects.filter(pk=self.user.pk).update(password=make_password('new'))
+
+        self.user.check_password('pw')
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new'))
+
+    @override_settings(PASSWORD_HASHING={'ASYNC_REHASH': True, 'MAX_PENDING_REHASHES': 1})
+    def test_pending_rehashes_are_bounded(self):
+        with mock.patch.object(hashers, 'rehash_executor') as executor, \
+                mock.patch.object(hashers, '_pending_rehashes', 0):
+            hashers.schedule_rehash(self.user, 'pw')
+            hashers.schedule_rehash(self.user, 'pw')
+            self.assertEqual(executor.submit.call_count, 1)
+
+            hashers._rehash_done(executor.submit.return_value)
+            hashers.schedule_rehash(self.user, 'pw')
+            self.assertEqual(executor.submit.call_count, 2)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'routing'}},
+    DATABASE_ROUTING={'REPLICAS': ['replica1'], 'APPS': {'users': 'replica'}, 'STICKY_SECONDS': 10},
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        caches['default'].clear()
+
+    def route(self, request, write=False, user=None):
+        reads = []
+
+        def view(request):
+            if user is not None:
+                request.user = user
+            reads.append(self.router.db_for_read(User))
+            if write:
+                self.router.db_for_write(User)
+                reads.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return reads, response
+
+    def test_safe_requests_read_from_a_replica(self):
+        self.assertEqual(self.route(RequestFactory().get('/'))[0], ['replica1'])
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_unsafe_methods_are_pinned(self):
+        self.assertEqual(self.route(RequestFactory().post('/'))[0], ['default'])
+
+    def test_reads_after_a_write_are_pinned_and_set_the_sticky_cookie(self):
+        reads, response = self.route(RequestFactory().get('/'), write=True)
+        self.assertEqual(reads, ['replica1', 'default'])
+        self.assertGreater(int(response.cookies['db_pinned'].value), time.time())
+
+    def test_sticky_cookie_pins_the_next_request(self):
+        request = RequestFactory().get('/')
+        request.COOKIES['db_pinned'] = str(int(time.time()) + 10)
+        self.assertEqual(self.route(request)[0], ['default'])
+
+        request = RequestFactory().get('/')
+        request.COOKIES['db_pinned'] = str(int(time.time()) - 1)
+        self.assertEqual(self.route(request)[0], ['replica1'])
+
+    def test_a_write_pins_the_user_through_the_cache(self):
+        user = mock.Mock(pk=7, is_authenticated=True)
+        self.route(RequestFactory().get('/'), write=True, user=user)
+        self.assertEqual(self.route(RequestFactory().get('/'), user=user)[0], ['default'])
+        self.assertEqual(self.route(RequestFactory().get('/'), user=mock.Mock(pk=8, is_authenticated=True))[0],
+                         ['replica1'])
+
+    def test_open_transactions_read_from_the_primary(self):
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self.route(RequestFactory().get('/'))[0], ['default'])
@@ -0,0 +1,289 @@
+"""
+Fast refresh-token blacklist.
+
+simplejwt checks the blacklist with a join against OutstandingToken and
+BlacklistedToken on every refresh. Here blacklisted jtis are also kept in
+sets bucketed by token expiry (one per BUCKET_SECONDS), stored in Redis when
+TOKEN_BLACKLIST['REDIS_URL'] is set. Every bucket expires once all tokens in
+it have, so the sets never outgrow the live tokens.
+
+Without Redis the sets are in-process and only hold the tokens this process
+blacklisted, so they can only answer "blacklisted": a miss is confirmed with
+the database, which every process writes.
+
+Each bucket also has a bloom filter. Processes keep a copy of it, re-synced
+at most every SYNC_INTERVAL seconds, so the common case (the token is not
+blacklisted) is answered without a round trip. Tokens blacklisted by another
+process become visible within SYNC_INTERVAL, which is far below the access
+token lifetime that already bounds logout.
+
+The database rows stay the durable record: an empty store is warmed from
+them, Redis errors fall back to them, and compact() purges the expired ones
+in bulk.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'REDIS_URL': None,
+    'KEY_PREFIX': 'token_blacklist',
+    'BUCKET_SECONDS': 86400,
+    'BLOOM_CAPACITY': 20000,
+    'BLOOM_ERROR_RATE': 0.001,
+    'SYNC_INTERVAL': 2,
+    'COMPACT_BATCH_SIZE': 5000,
+}
+
+
+def _config(name):
+    return getattr(settings, 'TOKEN_BLACKLIST', {}).get(name, DEFAULTS[name])
+
+
+class BloomFilter:
+    """
+    Bit layout shared by the in-process copy and the Redis bitmap
+    (SETBIT numbers bits from the most significant bit of each byte).
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+
+    def positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def new_bits(self):
+        return bytearray((self.size + 7) // 8)
+
+    @staticmethod
+    def set_bit(bits, position):
+        bits[position >> 3] |= 0x80 >> (position & 7)
+
+    def add(self, bits, value):
+        for position in self.positions(value):
+            self.set_bit(bits, position)
+
+    def might_contain(self, bits, value):
+        for position in self.positions(value):
+            index = position >> 3
+            if index >= len(bits) or not bits[index] & (0x80 >> (position & 7)):
+                return False
+        return True
+
+
+class LocalBlacklistStore:
+    """
+    In-process sets of the tokens this process blacklisted. Other processes
+    do not see them, so a miss is not an answer (shared = False).
+    """
+    shared = False
+
+    def __init__(self, bloom):
+        self.bloom = bloom
+        self._sets = {}
+        self._expire_at = {}
+        self._lock = threading.Lock()
+
+    def add_many(self, entries):
+        with self._lock:
+            for jti, bucket, expire_at in entries:
+                self._sets.setdefault(bucket, set()).add(jti)
+                self._expire_at[bucket] = expire_at
+
+    def contains(self, jti, bucket):
+        return jti in self._sets.get(bucket, ())
+
+    def prune(self, now):
+        with self._lock:
+            for bucket, expire_at in list(self._expire_at.items()):
+                if expire_at <= now:
+                    self._sets.pop(bucket, None)
+                    del self._expire_at[bucket]
+
+
+class RedisBlacklistStore:
+    shared = True
+
+    def __init__(self, bloom, url, prefix):
+        self.bloom = bloom
+        self.prefix = prefix
+        self.redis = redis.Redis.from_url(url)
+
+    def _key(self, kind, bucket=None):
+        return f'{self.prefix}:{kind}' if bucket is None else f'{self.prefix}:{kind}:{bucket}'
+
+    def add_many(self, entries):
+        pipe = self.redis.pipeline(transaction=False)
+        for jti, bucket, expire_at in entries:
+            set_key, bloom_key, version_key = (
+                self._key('set', bucket), self._key('bloom', bucket), self._key('version', bucket)
+            )
+            pipe.sadd(set_key, jti)
+            for position in self.bloom.positions(jti):
+                pipe.setbit(bloom_key, position, 1)
+            pipe.incr(version_key)
+            for key in (set_key, bloom_key, version_key):
+                pipe.expireat(key, expire_at)
+        pipe.execute()
+
+    def contains(self, jti, bucket):
+        return bool(self.redis.sismember(self._key('set', bucket), jti))
+
+    def bloom_version(self, bucket):
+        return int(self.redis.get(self._key('version', bucket)) or 0)
+
+    def bloom_bits(self, bucket):
+        return bytearray(self.redis.get(self._key('bloom', bucket)) or b'')
+
+    def is_warm(self):
+        return bool(self.redis.exists(self._key('warm')))
+
+    def mark_warm(self):
+        self.redis.set(self._key('warm'), 1)
+
+    def prune(self, now):
+        # Keys expire on their own.
+        pass
+
+
+class TokenBlacklist:
+    def __init__(self):
+        self._store = None
+        self._bloom_cache = {}
+        self._warm_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    bloom = BloomFilter(_config('BLOOM_CAPACITY'), _config('BLOOM_ERROR_RATE'))
+                    url = _config('REDIS_URL')
+                    if url:
+                        self._store = RedisBlacklistStore(bloom, url, _config('KEY_PREFIX'))
+                    else:
+                        self._store = LocalBlacklistStore(bloom)
+        return self._store
+
+    def _entry(self, jti, exp):
+        bucket_seconds = _config('BUCKET_SECONDS')
+        bucket = int(exp) // bucket_seconds
+        return jti, bucket, (bucket + 1) * bucket_seconds
+
+    def _ensure_warm(self):
+        now = time.monotonic()
+        if now - self._warm_checked_at < _config('SYNC_INTERVAL'):
+            return
+        self._warm_checked_at = now
+        store = self.store
+        if store.is_warm():
+            return
+        rows = BlacklistedToken.objects.filter(
+            token__expires_at__gt=timezone.now()
+        ).values_list('token__jti', 'token__expires_at')
+        entries = [self._entry(jti, expires_at.timestamp()) for jti, expires_at in rows.iterator()]
+        if entries:
+            store.add_many(entries)
+        store.mark_warm()
+        logger.info(f"TokenBlacklist: warmed store with {len(entries)} blacklisted tokens")
+
+    def _bloom_bits(self, bucket):
+        cached = self._bloom_cache.get(bucket)
+        now = time.monotonic()
+        if cached is not None and now - cached[2] < _config('SYNC_INTERVAL'):
+            return cached[0]
+        version = self.store.bloom_version(bucket)
+        if cached is not None and cached[1] == version:
+            bits = cached[0]
+        else:
+            bits = self.store.bloom_bits(bucket)
+        self._bloom_cache[bucket] = (bits, version, now)
+        return bits
+
+    def add(self, jti, exp):
+        entry = self._entry(jti, exp)
+        self.store.add_many([entry])
+        cached = self._bloom_cache.get(entry[1])
+        if cached is not None:
+            # Make our own blacklisting visible here without waiting for a sync.
+            self.store.bloom.add(cached[0], jti)
+
+    def is_blacklisted(self, jti, exp):
+        jti, bucket, _ = self._entry(jti, exp)
+        store = self.store
+        if not store.shared:
+            return store.contains(jti, bucket) or BlacklistedToken.objects.filter(token__jti=jti).exists()
+        try:
+            self._ensure_warm()
+            if not store.bloom.might_contain(self._bloom_bits(bucket), jti):
+                return False
+            return store.contains(jti, bucket)
+        except redis.RedisError as e:
+            logger.error(f"TokenBlacklist: store unavailable, falling back to database: {str(e)}")
+            return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def prune(self):
+        now = time.time()
+        self.store.prune(now)
+        bucket_seconds = _config('BUCKET_SECONDS')
+        for bucket in list(self._bloom_cache):
+            if (bucket + 1) * bucket_seconds <= now:
+                self._bloom_cache.pop(bucket, None)
+
+
+token_blacklist = TokenBlacklist()
+
+
+class FastBlacklistRefreshToken(RefreshToken):
+    """
+    RefreshToken whose blacklist check goes through token_blacklist instead
+    of the database. Blacklisting still writes the database rows.
+    """
+
+    def check_blacklist(self):
+        if token_blacklist.is_blacklisted(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        result = super().blacklist()
+        token_blacklist.add(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        return result
+
+
+def compact(batch_size=None, now=None):
+    """
+    Bulk-delete expired outstanding tokens and their blacklist entries;
+    returns (outstanding_deleted, blacklisted_deleted).
+    """
+    batch_size = batch_size or _config('COMPACT_BATCH_SIZE')
+    now = now or timezone.now()
+    outstanding_deleted = blacklisted_deleted = 0
+    expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by('pk')
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            blacklisted_deleted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            outstanding_deleted += OutstandingToken.objects.filter(pk__in=ids).only('pk').delete()[0]
+    token_blacklist.prune()
+    return outstanding_deleted, blacklisted_deleted
@@ -12,7 +12,8 @@ from .views.views import (
     LogoutView,
     EmailLoginView,
     GitHubOAuthCallbackView,
-    GitHubAuthorizationView
+    GitHubAuthorizationView,
+    RequestStatsView
 )
 
 urlpatterns = [
@@ -33,4 +34,7 @@ urlpatterns = [
     
     # User profile
     path('profile/', UserProfileView.as_view(), name='user_profile'),
+
+    # Operations
+    path('metrics/requests/', RequestStatsView.as_view(), name='request_stats'),
 ]
@@ -4,18 +4,37 @@ from django.core.exceptions import ValidationError
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 import requests
+import asyncio
 import json
 import logging
 import os
 from django.conf import settings
 import urllib.parse
 
+from asgiref.sync import sync_to_async
+
+from backend.async_views import AsyncAPIView
+from backend.cache import cache_metrics
+from backend.db.metrics import connection_stats
+from backend.instrumentation import view_aggregates
+
+from ..authentication import StatelessJWTAuthentication, add_principal_claims
+from ..google_auth import (
+    GOOGLE_TOKEN_URL,
+    GoogleAudienceError,
+    GoogleKeysUnavailable,
+    GoogleTokenError,
+    verify_google_id_token
+)
+from .. import health
+from ..github_auth import acache_identity, afetch_emails, afetch_profile, aget_cached_identity, discard_task
+from ..http_client import async_http_client, http_client
+from ..token_blacklist import FastBlacklistRefreshToken
 from ..models.models import User
 from ..serializers import (
     UserRegistrationSerializer, 
@@ -28,7 +47,7 @@ logger = logging.getLogger(__name__)
 
 def get_tokens_for_user(user):
     try:
-        refresh = RefreshToken.for_user(user)
+        refresh = add_principal_claims(FastBlacklistRefreshToken.for_user(user), user)
         return {
             'refresh': str(refresh),
             'access': str(refresh.access_token),
@@ -39,10 +58,31 @@ def get_tokens_for_user(user):
 
 
 class HealthCheckView(APIView):
+    """
+    Liveness with ?probe=live, otherwise readiness: cached dependency
+    probes (see apps/users/health.py). 503 when a critical dependency is
+    down or too slow. The probe report is only included for staff users
+    and callers with the probe token.
+    """
     permission_classes = [AllowAny]
-    authentication_classes = []
+
     def get(self, request):
-        return Response({"status": "success", "message": "Service is running"}, status=status.HTTP_200_OK)
+        if request.query_params.get('probe') == 'live':
+            return Response({"status": "success", "message": "Service is running"}, status=status.HTTP_200_OK)
+
+        report = health.readiness.get()
+        if report['status'] == health.DOWN:
+            body = {"status": "failed", "message": "Service is not ready"}
+            response_status = status.HTTP_503_SERVICE_UNAVAILABLE
+        else:
+            body = {
+                "status": "success",
+                "message": "Service is running" if report['status'] == health.OK else "Service is running degraded",
+            }
+            response_status = status.HTTP_200_OK
+        if health.can_view_details(request):
+            body["data"] = report
+        return Response(body, status=response_status)
 
 
 class UserRegistrationView(APIView):
@@ -150,11 +190,12 @@ class EmailLoginView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class GoogleLoginView(APIView):
+class GoogleLoginView(AsyncAPIView):
     permission_classes = [AllowAny]
     authentication_classes = []
+    loop_resources = (async_http_client,)
     
-    def post(self, request):
+    async def post(self, request):
         try:
             # Log the request body to diagnose validation issues
             logger.debug(f"GoogleLoginView received data: {request.data}")
@@ -202,7 +243,7 @@ class GoogleLoginView(APIView):
                     
                     logger.debug(f"GoogleLoginView using redirect_uri: {redirect_uri}")
                     
-                    token_url = 'https://oauth2.googleapis.com/token'
+                    token_url = getattr(settings, 'GOOGLE_TOKEN_URL', GOOGLE_TOKEN_URL)
                     payload = {
                         'code': token,
                         'client_id': client_id,
@@ -213,7 +254,7 @@ class GoogleLoginView(APIView):
                     
                     logger.debug(f"GoogleLoginView token exchange payload: {payload}")
                     
-                    response = requests.post(token_url, data=payload)
+                    response = await async_http_client.post(token_url, data=payload)
                     
                     if response.status_code != 200:
                         logger.error(f"GoogleLoginView code exchange failed: {response.text}")
@@ -232,10 +273,7 @@ class GoogleLoginView(APIView):
                             "message": "Failed to authenticate with Google. No ID token received."
                         }, status=status.HTTP_400_BAD_REQUEST)
                     
-                    # Now verify the ID token
-                    response = requests.get(
-                        f'https://www.googleapis.com/oauth2/v3/tokeninfo?id_token={id_token}'
-                    )
+                    token = id_token
                     
                 except requests.exceptions.RequestException as e:
                     logger.error(f"Google API error during code exchange: {str(e)}")
@@ -243,31 +281,42 @@ class GoogleLoginView(APIView):
                         "status": "failed",
                         "message": "Could not connect to Google authentication service. Please try again later."
                     }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-            else:
-                # Original ID token flow
-                try:
-                    logger.debug(f"GoogleLoginView verifying ID token with Google API: {token[:10]}...")
-                    response = requests.get(
-                        f'https://www.googleapis.com/oauth2/v3/tokeninfo?id_token={token}'
-                    )
-                except requests.exceptions.RequestException as e:
-                    logger.error(f"Google API error: {str(e)}")
-                    return Response({
-                        "status": "failed",
-                        "message": "Could not connect to Google authentication service. Please try again later."
-                    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
             
-            logger.debug(f"GoogleLoginView Google API response status: {response.status_code}")
+            expected_client_id = os.environ.get('NEXT_PUBLIC_GOOGLE_CLIENT_ID')
+            if not expected_client_id:
+                logger.error("GoogleLoginView: NEXT_PUBLIC_GOOGLE_CLIENT_ID is not set")
+                return Response({
+                    "status": "failed",
+                    "message": "Google authentication is not properly configured on the server."
+                }, status=status.HTTP_501_NOT_IMPLEMENTED)
             
-            if response.status_code != 200:
-                logger.error(f"GoogleLoginView token validation failed: {response.text}")
+            # Verify the ID token locally against Google's cached signing keys
+            try:
+                logger.debug(f"GoogleLoginView verifying ID token: {token[:10]}...")
+                # Verification is local but fetches Google's keys on a cold cache.
+                google_data = await sync_to_async(verify_google_id_token, thread_sensitive=False)(
+                    token, audience=expected_client_id
+                )
+            except GoogleKeysUnavailable as e:
+                logger.error(f"Google signing keys unavailable: {str(e)}")
+                return Response({
+                    "status": "failed",
+                    "message": "Could not connect to Google authentication service. Please try again later."
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            except GoogleAudienceError as e:
+                logger.error(f"Token validation failed: audience mismatch - expected {expected_client_id}: {str(e)}")
+                return Response({
+                    "status": "failed", 
+                    "message": "Invalid client ID"
+                }, status=status.HTTP_400_BAD_REQUEST)
+            except GoogleTokenError as e:
+                logger.error(f"GoogleLoginView token validation failed: {str(e)}")
                 return Response({
                     "status": "failed",
                     "message": "Invalid Google token. Please try again."
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            google_data = response.json()
-            logger.debug(f"GoogleLoginView successful Google API response: {google_data}")
+            logger.debug(f"GoogleLoginView verified Google token claims: {google_data}")
             
             email = google_data.get('email')
             
@@ -278,75 +327,7 @@ class GoogleLoginView(APIView):
                     "message": "Email not found in Google data. Please ensure your Google account has an email."
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # For authorization code flow, we verify against the original client_id
-            if is_auth_code:
-                expected_client_id = os.environ.get('NEXT_PUBLIC_GOOGLE_CLIENT_ID')
-            else:
-                expected_client_id = os.environ.get('NEXT_PUBLIC_GOOGLE_CLIENT_ID')
-                
-            if google_data.get('aud') != expected_client_id:
-                logger.error(f"Token validation failed: audience mismatch - expected {expected_client_id}, got {google_data.get('aud')}")
-                return Response({
-                    "status": "failed", 
-                    "message": "Invalid client ID"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Check if user exists
-            try:
-                user = User.objects.get(email=email)
-                
-                logger.debug(f"GoogleLoginView: Found existing user with email {email}, auth_provider={user.auth_provider}, auth_id={'Set' if user.auth_id else 'None'}")
-                
-                # Always update to Google auth if not already
-                if not user.auth_provider or user.auth_provider not in ['google']:
-                    logger.info(f"GoogleLoginView: Updating user {email} auth provider to Google from {user.auth_provider}")
-                    user.auth_provider = 'google'
-                    user.auth_id = google_data.get('sub')
-                    user.save()
-                # Update auth_id if it doesn't match or is missing
-                elif user.auth_provider == 'google' and (not user.auth_id or user.auth_id != google_data.get('sub')):
-                    logger.info(f"GoogleLoginView: Updating Google auth_id for user {email}")
-                    user.auth_id = google_data.get('sub')
-                    user.save()
-                
-                if not user.is_active:
-                    logger.warning(f"GoogleLoginView: Deactivated account attempt for {email}")
-                    return Response({
-                        "status": "failed",
-                        "message": "This account has been deactivated."
-                    }, status=status.HTTP_401_UNAUTHORIZED)
-                
-                logger.info(f"GoogleLoginView: User {email} authentication successful")
-                
-            except User.DoesNotExist:
-                # Create new user
-                try:
-                    logger.info(f"GoogleLoginView: Creating new user with email {email}")
-                    user = User.objects.create_user(
-                        email=email,
-                        auth_id=google_data.get('sub'),
-                        auth_provider='google',
-                        first_name=google_data.get('given_name', ''),
-                        last_name=google_data.get('family_name', ''),
-                        password=None  # No password for social auth
-                    )
-                except Exception as e:
-                    logger.error(f"Error creating user from Google auth: {str(e)}")
-                    return Response({
-                        "status": "failed",
-                        "message": "Failed to create user account."
-                    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-            tokens = get_tokens_for_user(user)
-            logger.info(f"GoogleLoginView: Successful login for {email}")
-            return Response({
-                "status": "success",
-                "message": "Google login successful",
-                "data": {
-                    'user': UserSerializer(user).data,
-                    'tokens': tokens
-                }
-            })
+            return await sync_to_async(self.complete_login)(email, google_data)
         
         except Exception as e:
             logger.error(f"Google login error: {str(e)}")
@@ -355,6 +336,64 @@ class GoogleLoginView(APIView):
                 "message": "An unexpected error occurred during Google login."
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def complete_login(self, email, google_data):
+        # Check if user exists
+        try:
+            user = User.objects.get(email=email)
+            
+            logger.debug(f"GoogleLoginView: Found existing user with email {email}, auth_provider={user.auth_provider}, auth_id={'Set' if user.auth_id else 'None'}")
+            
+            # Always update to Google auth if not already
+            if not user.auth_provider or user.auth_provider not in ['google']:
+                logger.info(f"GoogleLoginView: Updating user {email} auth provider to Google from {user.auth_provider}")
+                user.auth_provider = 'google'
+                user.auth_id = google_data.get('sub')
+                user.save()
+            # Update auth_id if it doesn't match or is missing
+            elif user.auth_provider == 'google' and (not user.auth_id or user.auth_id != google_data.get('sub')):
+                logger.info(f"GoogleLoginView: Updating Google auth_id for user {email}")
+                user.auth_id = google_data.get('sub')
+                user.save()
+            
+            if not user.is_active:
+                logger.warning(f"GoogleLoginView: Deactivated account attempt for {email}")
+                return Response({
+                    "status": "failed",
+                    "message": "This account has been deactivated."
+                }, status=status.HTTP_401_UNAUTHORIZED)
+            
+            logger.info(f"GoogleLoginView: User {email} authentication successful")
+            
+        except User.DoesNotExist:
+            # Create new user
+            try:
+                logger.info(f"GoogleLoginView: Creating new user with email {email}")
+                user = User.objects.create_user(
+                    email=email,
+                    auth_id=google_data.get('sub'),
+                    auth_provider='google',
+                    first_name=google_data.get('given_name', ''),
+                    last_name=google_data.get('family_name', ''),
+                    password=None  # No password for social auth
+                )
+            except Exception as e:
+                logger.error(f"Error creating user from Google auth: {str(e)}")
+                return Response({
+                    "status": "failed",
+                    "message": "Failed to create user account."
+                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        tokens = get_tokens_for_user(user)
+        logger.info(f"GoogleLoginView: Successful login for {email}")
+        return Response({
+            "status": "success",
+            "message": "Google login successful",
+            "data": {
+                'user': UserSerializer(user).data,
+                'tokens': tokens
+            }
+        })
+
 
 class GitHubAuthorizationView(APIView):
     """
@@ -412,11 +451,12 @@ class GitHubAuthorizationView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class GithubLoginView(APIView):
+class GithubLoginView(AsyncAPIView):
     permission_classes = [AllowAny]
     authentication_classes = []
+    loop_resources = (async_http_client,)
     
-    def post(self, request):
+    async def post(self, request):
         try:
             # Log the request body to diagnose validation issues
             logger.debug(f"GithubLoginView received data: {request.data}")
@@ -455,11 +495,12 @@ class GithubLoginView(APIView):
             
             logger.debug(f"GitHub token exchange payload: {data}")
             
+            emails_task = None
             try:
                 # Exchange the code for an access token
                 logger.info(f"GithubLoginView: Exchanging authorization code for access token")
-                response = requests.post(
-                    'https://github.com/login/oauth/access_token',
+                response = await async_http_client.post(
+                    getattr(settings, 'GITHUB_TOKEN_URL', 'https://github.com/login/oauth/access_token'),
                     data=data,
                     headers={'Accept': 'application/json'}
                 )
@@ -488,14 +529,10 @@ class GithubLoginView(APIView):
                         "message": "No access token received from GitHub."
                     }, status=status.HTTP_400_BAD_REQUEST)
                 
-                # Get user info from GitHub API
-                response = requests.get(
-                    'https://api.github.com/user',
-                    headers={
-                        'Authorization': f'token {access_token}',
-                        'Accept': 'application/json'
-                    }
-                )
+                # /user/emails is only needed on an identity cache miss,
+                # which is known once /user answers: request both at once.
+                emails_task = asyncio.ensure_future(afetch_emails(access_token))
+                response = await afetch_profile(access_token)
                 
                 if response.status_code != 200:
                     logger.error(f"GitHub API error: {response.text}")
@@ -507,41 +544,43 @@ class GithubLoginView(APIView):
                 github_data = response.json()
                 logger.info(f"GitHub user data: {github_data}")
                 
-                # Get user's email (GitHub may not provide email in user data)
-                email_response = requests.get(
-                    'https://api.github.com/user/emails',
-                    headers={
-                        'Authorization': f'token {access_token}',
-                        'Accept': 'application/json'
-                    }
-                )
-                
-                if email_response.status_code != 200:
-                    logger.error(f"GitHub email API error: {email_response.text}")
-                    return Response({
-                        "status": "failed",
-                        "message": "Failed to get email from GitHub. Please ensure your GitHub account has a verified email."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                emails = email_response.json()
-                logger.info(f"GitHub emails: {emails}")
-                
-                if not emails or len(emails) == 0:
-                    return Response({
-                        "status": "failed",
-                        "message": "No emails found in your GitHub account. Please add a verified email to your GitHub account."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                primary_email = next((e['email'] for e in emails if e['primary']), None)
-                if not primary_email:
-                    # If no primary email, take the first verified email
-                    primary_email = next((e['email'] for e in emails if e['verified']), None)
-                
-                if not primary_email:
-                    return Response({
-                        "status": "failed",
-                        "message": "No verified email found in your GitHub account. Please verify your email in GitHub."
-                    }, status=status.HTTP_400_BAD_REQUEST)
+                # Reuse the email resolved on a recent login of the same GitHub identity
+                cached_identity = await aget_cached_identity(github_data.get('id'))
+                if cached_identity:
+                    primary_email = cached_identity['email']
+                    logger.debug(f"GithubLoginView: Using cached email for GitHub user {github_data.get('id')}")
+                else:
+                    # Get user's email (GitHub may not provide email in user data)
+                    email_response = await emails_task
+                    
+                    if email_response.status_code != 200:
+                        logger.error(f"GitHub email API error: {email_response.text}")
+                        return Response({
+                            "status": "failed",
+                            "message": "Failed to get email from GitHub. Please ensure your GitHub account has a verified email."
+                        }, status=status.HTTP_400_BAD_REQUEST)
+                    
+                    emails = email_response.json()
+                    logger.info(f"GitHub emails: {emails}")
+                    
+                    if not emails or len(emails) == 0:
+                        return Response({
+                            "status": "failed",
+                            "message": "No emails found in your GitHub account. Please add a verified email to your GitHub account."
+                        }, status=status.HTTP_400_BAD_REQUEST)
+                    
+                    primary_email = next((e['email'] for e in emails if e['primary']), None)
+                    if not primary_email:
+                        # If no primary email, take the first verified email
+                        primary_email = next((e['email'] for e in emails if e['verified']), None)
+                    
+                    if not primary_email:
+                        return Response({
+                            "status": "failed",
+                            "message": "No verified email found in your GitHub account. Please verify your email in GitHub."
+                        }, status=status.HTTP_400_BAD_REQUEST)
+                    
+                    await acache_identity(github_data.get('id'), primary_email)
                 
             except requests.exceptions.RequestException as e:
                 logger.error(f"GitHub API error: {str(e)}")
@@ -549,65 +588,11 @@ class GithubLoginView(APIView):
                     "status": "failed",
                     "message": "Could not connect to GitHub. Please try again later."
                 }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            finally:
+                if emails_task is not None:
+                    discard_task(emails_task)
             
-            # Check if user exists
-            try:
-                user = User.objects.get(email=primary_email)
-                
-                logger.debug(f"GithubLoginView: Found existing user with email {primary_email}, auth_provider={user.auth_provider}, auth_id={'Set' if user.auth_id else 'None'}")
-                
-                # Always update to GitHub auth if not already
-                if not user.auth_provider or user.auth_provider not in ['github']:
-                    logger.info(f"GithubLoginView: Updating user {primary_email} auth provider to GitHub from {user.auth_provider}")
-                    user.auth_provider = 'github'
-                    user.auth_id = str(github_data.get('id'))
-                    user.save()
-                # Update auth_id if it doesn't match or is missing
-                elif user.auth_provider == 'github' and (not user.auth_id or user.auth_id != str(github_data.get('id'))):
-                    logger.info(f"GithubLoginView: Updating GitHub auth_id for user {primary_email}")
-                    user.auth_id = str(github_data.get('id'))
-                    user.save()
-                
-                if not user.is_active:
-                    logger.warning(f"GithubLoginView: Deactivated account attempt for {primary_email}")
-                    return Response({
-                        "status": "failed",
-                        "message": "This account has been deactivated."
-                    }, status=status.HTTP_401_UNAUTHORIZED)
-                
-                logger.info(f"GithubLoginView: User {primary_email} authentication successful")
-                
-            except User.DoesNotExist:
-                # Create new user
-                try:
-                    name_parts = github_data.get('name', '').split(' ', 1)
-                    first_name = name_parts[0] if name_parts else ''
-                    last_name = name_parts[1] if len(name_parts) > 1 else ''
-                    
-                    user = User.objects.create_user(
-                        email=primary_email,
-                        auth_id=str(github_data.get('id')),
-                        auth_provider='github',
-                        first_name=first_name,
-                        last_name=last_name,
-                        password=None  # No password for social auth
-                    )
-                except Exception as e:
-                    logger.error(f"Error creating user from GitHub auth: {str(e)}")
-                    return Response({
-                        "status": "failed",
-                        "message": "Failed to create user account."
-                    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-            tokens = get_tokens_for_user(user)
-            return Response({
-                "status": "success",
-                "message": "GitHub login successful",
-                "data": {
-                    'user': UserSerializer(user).data,
-                    'tokens': tokens
-                }
-            })
+            return await sync_to_async(self.complete_login)(primary_email, github_data)
         
         except Exception as e:
             logger.error(f"GitHub login error: {str(e)}")
@@ -616,14 +601,75 @@ class GithubLoginView(APIView):
                 "message": "An unexpected error occurred during GitHub login."
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def complete_login(self, primary_email, github_data):
+        # Check if user exists
+        try:
+            user = User.objects.get(email=primary_email)
+            
+            logger.debug(f"GithubLoginView: Found existing user with email {primary_email}, auth_provider={user.auth_provider}, auth_id={'Set' if user.auth_id else 'None'}")
+            
+            # Always update to GitHub auth if not already
+            if not user.auth_provider or user.auth_provider not in ['github']:
+                logger.info(f"GithubLoginView: Updating user {primary_email} auth provider to GitHub from {user.auth_provider}")
+                user.auth_provider = 'github'
+                user.auth_id = str(github_data.get('id'))
+                user.save()
+            # Update auth_id if it doesn't match or is missing
+            elif user.auth_provider == 'github' and (not user.auth_id or user.auth_id != str(github_data.get('id'))):
+                logger.info(f"GithubLoginView: Updating GitHub auth_id for user {primary_email}")
+                user.auth_id = str(github_data.get('id'))
+                user.save()
+            
+            if not user.is_active:
+                logger.warning(f"GithubLoginView: Deactivated account attempt for {primary_email}")
+                return Response({
+                    "status": "failed",
+                    "message": "This account has been deactivated."
+                }, status=status.HTTP_401_UNAUTHORIZED)
+            
+            logger.info(f"GithubLoginView: User {primary_email} authentication successful")
+            
+        except User.DoesNotExist:
+            # Create new user
+            try:
+                name_parts = github_data.get('name', '').split(' ', 1)
+                first_name = name_parts[0] if name_parts else ''
+                last_name = name_parts[1] if len(name_parts) > 1 else ''
+                
+                user = User.objects.create_user(
+                    email=primary_email,
+                    auth_id=str(github_data.get('id')),
+                    auth_provider='github',
+                    first_name=first_name,
+                    last_name=last_name,
+                    password=None  # No password for social auth
+                )
+            except Exception as e:
+                logger.error(f"Error creating user from GitHub auth: {str(e)}")
+                return Response({
+                    "status": "failed",
+                    "message": "Failed to create user account."
+                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        tokens = get_tokens_for_user(user)
+        return Response({
+            "status": "success",
+            "message": "GitHub login successful",
+            "data": {
+                'user': UserSerializer(user).data,
+                'tokens': tokens
+            }
+        })
+
 
 class UserProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StatelessJWTAuthentication]
     
     def get(self, request):
         try:
-            serializer = UserSerializer(request.user)
+            # The profile needs the full row; it comes from the user cache.
+            serializer = UserSerializer(request.user.user)
             return Response({
                 "status": "success",
                 "message": "Profile retrieved successfully",
@@ -637,9 +683,31 @@ class UserProfileView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class RequestStatsView(APIView):
+    """
+    Rolling per-view request metrics, outbound HTTP, database connection
+    and cache metrics of this process, for staff users.
+    """
+    permission_classes = [IsAdminUser]
+    authentication_classes = [StatelessJWTAuthentication]
+
+    def get(self, request):
+        return Response({
+            "status": "success",
+            "message": "Request metrics retrieved successfully",
+            "data": {
+                "views": view_aggregates.snapshot(),
+                "outbound_http": http_client.metrics(),
+                "circuit_breakers": http_client.breaker_states(),
+                "database_connections": connection_stats(),
+                "cache": cache_metrics(),
+            }
+        })
+
+
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StatelessJWTAuthentication]
     
     def post(self, request):
         try:
@@ -653,7 +721,7 @@ class LogoutView(APIView):
             
             # Blacklist the refresh token
             try:
-                token = RefreshToken(refresh_token)
+                token = FastBlacklistRefreshToken(refresh_token)
                 token.blacklist()
                 return Response({
                     "status": "success",
@@ -673,15 +741,16 @@ class LogoutView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class GitHubOAuthCallbackView(APIView):
+class GitHubOAuthCallbackView(AsyncAPIView):
     """
     A dedicated view to handle GitHub OAuth redirect
     This is useful for frontend integration to simplify the flow
     """
     permission_classes = [AllowAny]
     authentication_classes = []
+    loop_resources = (async_http_client,)
     
-    def get(self, request):
+    async def get(self, request):
         # Extract the code from the query parameters
         code = request.GET.get('code')
         
@@ -696,4 +765,4 @@ class GitHubOAuthCallbackView(APIView):
         
         # Forward to the existing GitHub login view
         github_view = GithubLoginView()
-        return github_view.post(mock_request)
+        return await github_view.post(mock_request)
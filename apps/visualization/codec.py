@@ -0,0 +1,373 @@
+"""
+Compact columnar encoding for graph_data blobs.
+
+Graph.graph_data and KnowledgeGraph.graph_data hold whole graph structures of
+the form {"nodes": [{"id": ..., "type": ..., ...}], "edges": [{"source": ...,
+"target": ..., "type": ...}], ...}. Stored as JSON they are re-parsed in full
+on every read. This module packs them into a versioned binary layout:
+
+    header      magic, version, flags and section sizes
+    columns     little-endian uint32 arrays: node id, node type, edge source,
+                edge target and edge type, plus the string table offsets
+    strings     interned UTF-8 string table (ids, types)
+    attributes  zlib-compressed JSON with every remaining node/edge property
+
+Node ids are replaced by their position so edges become two index arrays.
+The columns are decoded without copying (memoryviews, or NumPy arrays when
+NumPy is installed) and the JSON view is rebuilt lazily for callers that
+still expect the original dict.
+
+Decoding gives back the dict that was encoded, including nodes or edges
+that were absent or null (recorded in the attributes). Node ids are stored as text
+and flagged when they were all integers; ids of mixed or other scalar
+types are stored as JSON. Only string types go to the string table, other
+type values (including null) stay with the attributes. Edge endpoints must
+match a node id exactly, type included. Graphs the format cannot hold
+(nodes or edges that are not lists, non-scalar or duplicate ids,
+dangling edges) raise GraphCodecError, and
+CompactGraphDataMixin keeps them as JSON.
+"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, columns fall back to memoryviews
+    np = None
+
+
+MAGIC = b"KKG"
+FORMAT_VERSION = 2
+# Version 1 blobs only lack FLAG_JSON_NODE_IDS and read the same.
+READABLE_VERSIONS = (1, 2)
+
+# magic, version, flags, node_count, edge_count, string_count, strings_nbytes, attrs_nbytes
+HEADER = struct.Struct("<3sBIIIIII")
+
+FLAG_INT_NODE_IDS = 0x1
+FLAG_LINKS_KEY = 0x2
+FLAG_JSON_NODE_IDS = 0x4
+
+MISSING = 0xFFFFFFFF
+
+NODE_KEYS = ("id", "type")
+EDGE_KEYS = ("source", "target", "type")
+
+
+class GraphCodecError(ValueError):
+    pass
+
+
+def _pad(n):
+    return (-n) % 8
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _id_key(value):
+    # 1, 1.0, True and "1" are different ids.
+    return (type(value), value)
+
+
+def encode(graph_data):
+    """
+    Encode a graph_data dict into the compact binary format.
+    """
+    if graph_data is None:
+        graph_data = {}
+    if not isinstance(graph_data, dict):
+        raise GraphCodecError("graph_data must be a JSON object")
+
+    edges_key = "links" if "links" in graph_data and "edges" not in graph_data else "edges"
+    for key in ("nodes", edges_key):
+        if not isinstance(graph_data.get(key), (list, type(None))):
+            raise GraphCodecError(f"{key} is not a list")
+    nodes = graph_data.get("nodes") or []
+    edges = graph_data.get(edges_key) or []
+
+    strings = []
+    interned = {}
+
+    def intern(value):
+        if value is None:
+            return MISSING
+        index = interned.get(value)
+        if index is None:
+            index = interned[value] = len(strings)
+            strings.append(value)
+        return index
+
+    def typed(item, keys):
+        # A non-string type is kept with the attributes.
+        item_type = item.get("type")
+        if isinstance(item_type, str):
+            return intern(item_type), {k: v for k, v in item.items() if k not in keys}
+        return MISSING, {k: v for k, v in item.items() if k not in keys or k == "type"}
+
+    for i, node in enumerate(nodes):
+        if not isinstance(node, dict) or "id" not in node:
+            raise GraphCodecError(f"node {i} has no id")
+        if isinstance(node["id"], (list, dict)):
+            raise GraphCodecError(f"node {i} id is not a scalar")
+
+    flags = 0
+    if edges_key == "links":
+        flags |= FLAG_LINKS_KEY
+    if nodes and all(_is_int(node["id"]) for node in nodes):
+        flags |= FLAG_INT_NODE_IDS
+    elif not all(isinstance(node["id"], str) for node in nodes):
+        flags |= FLAG_JSON_NODE_IDS
+
+    node_ids = array("I")
+    node_types = array("I")
+    node_attrs = []
+    position = {}
+    for i, node in enumerate(nodes):
+        key = _id_key(node["id"])
+        if key in position:
+            raise GraphCodecError(f"duplicate node id {node['id']!r}")
+        position[key] = i
+        if flags & FLAG_JSON_NODE_IDS:
+            node_ids.append(intern(json.dumps(node["id"])))
+        else:
+            node_ids.append(intern(str(node["id"])))
+        node_type, extra = typed(node, NODE_KEYS)
+        node_types.append(node_type)
+        node_attrs.append(extra or None)
+
+    edge_sources = array("I")
+    edge_targets = array("I")
+    edge_types = array("I")
+    edge_attrs = []
+    for i, edge in enumerate(edges):
+        if not isinstance(edge, dict):
+            raise GraphCodecError(f"edge {i} is not an object")
+        for end in ("source", "target"):
+            if end not in edge or isinstance(edge[end], (list, dict)) or _id_key(edge[end]) not in position:
+                raise GraphCodecError(f"edge {i} references unknown node {edge.get(end)!r}")
+        edge_sources.append(position[_id_key(edge["source"])])
+        edge_targets.append(position[_id_key(edge["target"])])
+        edge_type, extra = typed(edge, EDGE_KEYS)
+        edge_types.append(edge_type)
+        edge_attrs.append(extra or None)
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("I", [0])
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    string_blob = b"".join(encoded)
+
+    attrs = {
+        # Null nodes or edges stay here, as they were.
+        "extra": {k: v for k, v in graph_data.items() if k not in ("nodes", edges_key) or v is None},
+    }
+    absent = [key for key in ("nodes", edges_key) if key not in graph_data]
+    if absent:
+        attrs["absent"] = absent
+    if any(node_attrs):
+        attrs["nodes"] = node_attrs
+    if any(edge_attrs):
+        attrs["edges"] = edge_attrs
+    attrs_blob = zlib.compress(json.dumps(attrs, separators=(",", ":")).encode("utf-8"))
+
+    columns = [node_ids, node_types, edge_sources, edge_targets, edge_types, offsets]
+    if sys.byteorder != "little":
+        for column in columns:
+            column.byteswap()
+
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, flags, len(nodes), len(edges), len(strings),
+                         len(string_blob), len(attrs_blob))]
+    for column in columns:
+        parts.append(column.tobytes())
+    parts.append(string_blob)
+    parts.append(b"\0" * _pad(len(string_blob)))
+    parts.append(attrs_blob)
+    return b"".join(parts)
+
+
+def is_compact(blob):
+    return blob is not None and bytes(blob[:3]) == MAGIC
+
+
+def decode(blob):
+    """
+    Decode a compact blob into a CompactGraph without copying the columns.
+    """
+    return CompactGraph(blob)
+
+
+class CompactGraph:
+    """
+    Read-only view over an encoded graph.
+
+    Column attributes (node_ids, node_types, edge_sources, edge_targets,
+    edge_types) are uint32 sequences indexing the string table or the node
+    positions; MISSING marks an absent type.
+    """
+
+    def __init__(self, blob):
+        buffer = memoryview(blob)
+        if buffer.ndim != 1 or buffer.itemsize != 1:
+            buffer = buffer.cast("B")
+        if len(buffer) < HEADER.size or not is_compact(buffer):
+            raise GraphCodecError("not a compact graph blob")
+
+        (_, version, flags, node_count, edge_count, string_count,
+         strings_nbytes, attrs_nbytes) = HEADER.unpack_from(buffer)
+        if version not in READABLE_VERSIONS:
+            raise GraphCodecError(f"unsupported graph format version {version}")
+
+        self.version = version
+        self.flags = flags
+        self.node_count = node_count
+        self.edge_count = edge_count
+        self._buffer = buffer
+
+        offset = HEADER.size
+        lengths = [node_count, node_count, edge_count, edge_count, edge_count, string_count + 1]
+        columns = []
+        for length in lengths:
+            columns.append(self._column(offset, length))
+            offset += length * 4
+        (self.node_ids, self.node_types, self.edge_sources,
+         self.edge_targets, self.edge_types, self._offsets) = columns
+
+        self._strings_start = offset
+        offset += strings_nbytes + _pad(strings_nbytes)
+        if offset + attrs_nbytes > len(buffer):
+            raise GraphCodecError("truncated graph blob")
+        self._attrs_slice = (offset, offset + attrs_nbytes)
+        self._strings = None
+        self._attrs = None
+
+    def _column(self, offset, length):
+        end = offset + length * 4
+        if end > len(self._buffer):
+            raise GraphCodecError("truncated graph blob")
+        if np is not None:
+            return np.frombuffer(self._buffer, dtype="<u4", count=length, offset=offset)
+        view = self._buffer[offset:end]
+        if sys.byteorder == "little":
+            return view.cast("I")
+        column = array("I", view.tobytes())
+        column.byteswap()
+        return column
+
+    @property
+    def strings(self):
+        if self._strings is None:
+            start = self._strings_start
+            offsets = self._offsets
+            raw = self._buffer
+            self._strings = [
+                str(raw[start + offsets[i]:start + offsets[i + 1]], "utf-8")
+                for i in range(len(offsets) - 1)
+            ]
+        return self._strings
+
+    @property
+    def attributes(self):
+        if self._attrs is None:
+            start, end = self._attrs_slice
+            self._attrs = json.loads(zlib.decompress(self._buffer[start:end]))
+        return self._attrs
+
+    def string(self, index):
+        return None if index == MISSING else self.strings[index]
+
+    def node_id(self, position):
+        value = self.strings[self.node_ids[position]]
+        if self.flags & FLAG_INT_NODE_IDS:
+            return int(value)
+        if self.flags & FLAG_JSON_NODE_IDS:
+            return json.loads(value)
+        return value
+
+    def to_json(self):
+        """
+        Rebuild the original graph_data dict.
+        """
+        attrs = self.attributes
+        node_attrs = attrs.get("nodes")
+        edge_attrs = attrs.get("edges")
+
+        ids = [self.node_id(i) for i in range(self.node_count)]
+        nodes = []
+        for i in range(self.node_count):
+            node = {"id": ids[i]}
+            node_type = self.string(self.node_types[i])
+            if node_type is not None:
+                node["type"] = node_type
+            if node_attrs and node_attrs[i]:
+                node.update(node_attrs[i])
+            nodes.append(node)
+
+        edges = []
+        for i in range(self.edge_count):
+            edge = {"source": ids[self.edge_sources[i]], "target": ids[self.edge_targets[i]]}
+            edge_type = self.string(self.edge_types[i])
+            if edge_type is not None:
+                edge["type"] = edge_type
+            if edge_attrs and edge_attrs[i]:
+                edge.update(edge_attrs[i])
+            edges.append(edge)
+
+        data = dict(attrs.get("extra", {}))
+        absent = attrs.get("absent", ())
+        for key, items in (("nodes", nodes), ("links" if self.flags & FLAG_LINKS_KEY else "edges", edges)):
+            if key not in data and key not in absent:
+                data[key] = items
+        return data
+
+
+class CompactGraphDataMixin:
+    """
+    Model mixin for models storing a graph as graph_data (JSON) and
+    graph_blob (compact encoding). Once a blob is written the JSON copy is
+    dropped; graph_json keeps the old dict shape available to callers.
+    Graphs the compact format cannot hold are stored as JSON. Models with
+    a last_updated field have it set to the time of the change.
+    """
+
+    def set_graph_data(self, graph_data, compact=True):
+        blob = None
+        if compact:
+            try:
+                blob = encode(graph_data)
+            except GraphCodecError:
+                pass
+        if blob is not None:
+            self.graph_blob = blob
+            self.graph_data = None
+        else:
+            self.graph_data = graph_data
+            self.graph_blob = None
+        if hasattr(self, "last_updated"):
+            self.last_updated = timezone.now()
+        if not isinstance(graph_data, dict):
+            graph_data = {}
+        if hasattr(self, "node_count"):
+            self.node_count = len(graph_data.get("nodes") or [])
+        if hasattr(self, "edge_count"):
+            self.edge_count = len(graph_data.get("edges") or graph_data.get("links") or [])
+
+    def load_graph(self):
+        """
+        Return the graph as a CompactGraph, encoding legacy JSON on the fly.
+        """
+        if self.graph_blob:
+            return decode(self.graph_blob)
+        return decode(encode(self.graph_data))
+
+    @property
+    def graph_json(self):
+        if self.graph_blob:
+            return decode(self.graph_blob).to_json()
+        return self.graph_data
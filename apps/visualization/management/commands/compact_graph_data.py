@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from apps.insights.models.models import KnowledgeGraph
+from apps.visualization.models.models import Graph
+
+
+class Command(BaseCommand):
+    help = "Re-encode JSON graph_data of Graph and KnowledgeGraph rows into the compact graph_blob format"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model in (Graph, KnowledgeGraph):
+            converted = skipped = 0
+            pks = list(
+                model.objects.filter(graph_blob__isnull=True, graph_data__isnull=False)
+                .order_by('pk').values_list('pk', flat=True)
+            )
+            for start in range(0, len(pks), batch_size):
+                for instance in model.objects.filter(pk__in=pks[start:start + batch_size]):
+                    instance.set_graph_data(instance.graph_data)
+                    if instance.graph_blob is None:
+                        # Kept as JSON: the compact format cannot hold it exactly.
+                        skipped += 1
+                        self.stderr.write(f"{model.__name__} {instance.pk}: kept as JSON")
+                        continue
+                    instance.save(update_fields=['graph_data', 'graph_blob', 'node_count', 'edge_count'])
+                    converted += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"{model.__name__}: {converted} converted, {skipped} skipped"
+            ))
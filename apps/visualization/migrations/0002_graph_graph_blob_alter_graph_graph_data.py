@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("visualization", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="graph",
+            name="graph_blob",
+            field=models.BinaryField(
+                blank=True,
+                editable=False,
+                help_text="Compact columnar encoding of graph_data",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="graph",
+            name="graph_data",
+            field=models.JSONField(
+                blank=True,
+                help_text="Graph structure and visualization data",
+                null=True,
+            ),
+        ),
+    ]
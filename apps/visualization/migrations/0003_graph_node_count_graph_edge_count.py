@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("visualization", "0002_graph_graph_blob_alter_graph_graph_data"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="graph",
+            name="node_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="graph",
+            name="edge_count",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -4,8 +4,10 @@ from apps.products.models.models import ProductCatalog
 from apps.assets.models.models import SoftwareComponent
 from apps.integrations.models.models import GitRepository, CloudResource
 from apps.policies.models.models import SecurityPolicy
+from apps.visualization.codec import CompactGraphDataMixin
+from backend.invalidation import InvalidatingQuerySet
 
-class Graph(models.Model):
+class Graph(CompactGraphDataMixin, models.Model):
     """
     Graph visualization for software assets and dependencies.
     Provides visual representation of product components and relationships.
@@ -32,8 +34,12 @@ class Graph(models.Model):
     product = models.ForeignKey(ProductCatalog, on_delete=models.CASCADE, null=True, blank=True, 
                              related_name="graphs")
     repositories = models.ManyToManyField(GitRepository, blank=True, related_name="visualizations")
-    graph_data = models.JSONField(help_text="Graph structure and visualization data")
+    graph_data = models.JSONField(null=True, blank=True, help_text="Graph structure and visualization data")
+    graph_blob = models.BinaryField(null=True, blank=True, editable=False,
+                                 help_text="Compact columnar encoding of graph_data")
     layout_algorithm = models.CharField(max_length=100, default="force-directed")
+    node_count = models.IntegerField(default=0)
+    edge_count = models.IntegerField(default=0)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="created_visualizations")
     last_generated = models.DateTimeField(auto_now=True, help_text="When the graph was last generated")
     visibility = models.CharField(max_length=20, choices=VISIBILITY_CHOICES, default="organization")
@@ -43,6 +49,8 @@ class Graph(models.Model):
     tags = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = InvalidatingQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.name} ({self.graph_type})"
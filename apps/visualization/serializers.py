@@ -0,0 +1,19 @@
+from rest_framework import serializers
+
+from apps.products.serializers import ProductSummarySerializer
+from backend.api import SparseFieldsModelSerializer
+from .models.models import Graph
+
+
+class GraphSerializer(SparseFieldsModelSerializer):
+    product = ProductSummarySerializer(read_only=True)
+    # Decoded from graph_blob when the graph is stored compactly.
+    graph_data = serializers.JSONField(source='graph_json', read_only=True)
+
+    class Meta:
+        model = Graph
+        fields = [
+            'id', 'name', 'description', 'graph_type', 'product', 'repositories', 'graph_data',
+            'layout_algorithm', 'node_count', 'edge_count', 'created_by', 'last_generated', 'visibility',
+            'is_snapshot', 'snapshot_timestamp', 'metadata', 'tags', 'created_at', 'updated_at',
+        ]
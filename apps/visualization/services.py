@@ -0,0 +1,423 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.assets.models.models import ProductComponent, SoftwareComponent, Dependency
+from apps.insights.models.models import Insight
+from apps.integrations.models.models import CloudResource
+from apps.visualization.models.models import Graph, GraphNode, GraphEdge
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+OPEN_INSIGHT_STATUSES = ("open", "in_progress")
+
+COMPONENT_NODE_TYPES = {
+    "service": "service",
+    "database": "database",
+    "function": "function",
+    "ai_model": "ai_model",
+}
+
+RESOURCE_NODE_TYPES = {
+    "compute": "compute",
+    "container": "compute",
+    "storage": "storage",
+    "database": "database",
+    "serverless": "function",
+    "ai": "ai_model",
+}
+
+DEPENDENCY_EDGE_TYPES = {
+    "imports": "depends",
+    "requires": "depends",
+    "calls": "calls",
+    "consumes": "accesses",
+    "uses": "accesses",
+    "connects": "accesses",
+    "generates": "generates",
+    "deploys": "deploys",
+}
+
+CRITICALITY_WEIGHTS = {"low": 0.5, "medium": 1.0, "high": 2.0, "critical": 3.0}
+
+NODE_FIELDS = ("name", "display_name", "node_type", "status", "has_issues", "properties")
+EDGE_FIELDS = ("edge_type", "label", "weight", "security_status", "properties")
+
+
+def _status_from_severities(severities):
+    if not severities:
+        return "normal"
+    if "critical" in severities:
+        return "critical"
+    if "high" in severities or "medium" in severities:
+        return "warning"
+    return "normal"
+
+
+class GraphMaterializer:
+    """
+    Syncs discovered assets into a Graph's GraphNode/GraphEdge rows.
+
+    SoftwareComponent and CloudResource rows become nodes, Dependency rows
+    between materialized components become edges. The current rows are
+    diffed against what the assets describe and only the inserts, updates
+    and deletes are written. Nodes and edges that were not materialized (no
+    component/resource link, no dependency_id) are left untouched.
+
+    A sync only reads the assets changed since the previous one: components
+    and resources whose row, open insights, dependencies or product link
+    were saved since then (SYNC_OVERLAP earlier, for transactions that
+    committed late), and the nodes and edges of those assets. Its cost
+    follows the size of the change, not of the graph. Changes that leave no
+    timestamp behind (queryset updates, deleted dependencies or product
+    links) are picked up by the full sync, which runs when there is no
+    previous sync and then every FULL_SYNC_INTERVAL. The sync times are
+    kept in Graph.metadata under SYNC_STATE_KEY.
+    """
+
+    SYNC_STATE_KEY = "materializer"
+    SYNC_OVERLAP = timedelta(minutes=5)
+    FULL_SYNC_INTERVAL = timedelta(hours=24)
+
+    def __init__(self, graph):
+        if graph.is_snapshot:
+            raise ValueError("Snapshot graphs are immutable and cannot be materialized")
+        self.graph = graph
+
+    def component_queryset(self):
+        graph = self.graph
+        queryset = SoftwareComponent.objects.filter(
+            data_source__organization_id=graph.organization_id, is_active=True
+        )
+        if graph.product_id:
+            queryset = queryset.filter(products__product_id=graph.product_id)
+        repository_ids = list(graph.repositories.values_list("id", flat=True))
+        if repository_ids:
+            queryset = queryset.filter(repository_id__in=repository_ids)
+        return queryset.distinct()
+
+    def resource_queryset(self):
+        graph = self.graph
+        if graph.product_id:
+            return CloudResource.objects.none()
+        return CloudResource.objects.filter(data_source__organization_id=graph.organization_id)
+
+    def changed_assets(self, since):
+        """
+        Return (component ids, resource ids) of the assets whose node or
+        edges may have changed since the given time.
+        """
+        organization_id = self.graph.organization_id
+        component_ids = set(SoftwareComponent.objects.filter(
+            data_source__organization_id=organization_id, updated_at__gte=since
+        ).values_list("id", flat=True))
+        resource_ids = set(CloudResource.objects.filter(
+            data_source__organization_id=organization_id, updated_at__gte=since
+        ).values_list("id", flat=True))
+
+        insights = Insight.objects.filter(organization_id=organization_id, updated_at__gte=since)
+        component_ids.update(insights.filter(component_id__isnull=False).values_list("component_id", flat=True))
+        resource_ids.update(insights.filter(cloud_resource_id__isnull=False).values_list("cloud_resource_id", flat=True))
+
+        for source_id, target_id in Dependency.objects.filter(
+            source_component__data_source__organization_id=organization_id, updated_at__gte=since
+        ).values_list("source_component_id", "target_component_id"):
+            component_ids.update((source_id, target_id))
+
+        if self.graph.product_id:
+            component_ids.update(ProductComponent.objects.filter(
+                product_id=self.graph.product_id, updated_at__gte=since
+            ).values_list("component_id", flat=True))
+        return component_ids, resource_ids
+
+    def _open_insights(self, field, ids):
+        severities = {}
+        rows = Insight.objects.filter(
+            organization_id=self.graph.organization_id,
+            status__in=OPEN_INSIGHT_STATUSES,
+            **{f"{field}__in": ids},
+        ).values_list(field, "severity")
+        for object_id, severity in rows:
+            severities.setdefault(object_id, set()).add(severity)
+        return severities
+
+    def desired_nodes(self, scope=None):
+        """
+        Map ("component"|"cloud_resource", id) to the node fields the assets
+        describe, for every asset or only those in scope (component ids,
+        resource ids).
+        """
+        desired = {}
+
+        components = self.component_queryset()
+        resources = self.resource_queryset()
+        if scope is not None:
+            components = components.filter(id__in=scope[0])
+            resources = resources.filter(id__in=scope[1])
+
+        components = list(components.values(
+            "id", "name", "type", "path", "language", "version", "security_score"
+        ))
+        issues = self._open_insights("component_id", [c["id"] for c in components])
+        for component in components:
+            severities = issues.get(component["id"], ())
+            desired[("component", component["id"])] = {
+                "name": component["name"][:255],
+                "display_name": component["name"][:255],
+                "node_type": COMPONENT_NODE_TYPES.get(component["type"], "component"),
+                "status": _status_from_severities(severities),
+                "has_issues": bool(severities),
+                "properties": {
+                    "component_type": component["type"],
+                    "path": component["path"],
+                    "language": component["language"],
+                    "version": component["version"],
+                    "security_score": component["security_score"],
+                },
+            }
+
+        resources = list(resources.values(
+            "id", "name", "type", "specific_type", "cloud_provider", "location", "status", "resource_id"
+        ))
+        issues = self._open_insights("cloud_resource_id", [r["id"] for r in resources])
+        for resource in resources:
+            severities = issues.get(resource["id"], ())
+            status = _status_from_severities(severities)
+            if status == "normal" and resource["status"] != "active":
+                status = "inactive"
+            desired[("cloud_resource", resource["id"])] = {
+                "name": resource["name"][:255],
+                "display_name": resource["name"][:255],
+                "node_type": RESOURCE_NODE_TYPES.get(resource["type"], "custom"),
+                "status": status,
+                "has_issues": bool(severities),
+                "properties": {
+                    "resource_type": resource["type"],
+                    "specific_type": resource["specific_type"],
+                    "cloud_provider": resource["cloud_provider"],
+                    "location": resource["location"],
+                    "resource_id": resource["resource_id"],
+                },
+            }
+
+        return desired
+
+    def desired_edges(self, dependencies, node_status):
+        """
+        Map dependency id to the edge fields, keyed on the component pair it
+        links. node_status maps component id to the status of its node.
+        """
+        desired = {}
+        for dependency in dependencies.values(
+            "id", "source_component_id", "target_component_id", "dependency_type", "criticality", "is_direct"
+        ):
+            target_status = node_status.get(dependency["target_component_id"])
+            if target_status == "critical":
+                security_status = "vulnerable"
+            elif target_status == "warning":
+                security_status = "warning"
+            else:
+                security_status = "secure"
+            desired[dependency["id"]] = {
+                "source_component_id": dependency["source_component_id"],
+                "target_component_id": dependency["target_component_id"],
+                "edge_type": DEPENDENCY_EDGE_TYPES.get(dependency["dependency_type"], "custom"),
+                "label": dependency["dependency_type"],
+                "weight": CRITICALITY_WEIGHTS.get(dependency["criticality"], 1.0),
+                "security_status": security_status,
+                "properties": {
+                    "dependency_id": dependency["id"],
+                    "criticality": dependency["criticality"],
+                    "is_direct": dependency["is_direct"],
+                },
+            }
+        return desired
+
+    def _sync_state(self, locked, now):
+        """
+        Return the assets to diff, or None for all of them, and the sync
+        state to store.
+        """
+        state = (locked.metadata or {}).get(self.SYNC_STATE_KEY) or {}
+        synced_at = parse_datetime(state.get("synced_at") or "")
+        full_synced_at = parse_datetime(state.get("full_synced_at") or "")
+        if synced_at is None or full_synced_at is None or now - full_synced_at >= self.FULL_SYNC_INTERVAL:
+            return None, {"synced_at": now.isoformat(), "full_synced_at": now.isoformat()}
+        scope = self.changed_assets(synced_at - self.SYNC_OVERLAP)
+        return scope, {"synced_at": now.isoformat(), "full_synced_at": state["full_synced_at"]}
+
+    def sync(self, full=False):
+        """
+        Apply the diff between the assets and the graph; returns change
+        counts. full=True diffs every asset, not only the changed ones.
+        """
+        stats = {
+            "nodes_created": 0, "nodes_updated": 0, "nodes_deleted": 0,
+            "edges_created": 0, "edges_updated": 0, "edges_deleted": 0,
+        }
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Serialize concurrent refreshes of the same graph.
+            locked = Graph.objects.select_for_update().only("pk", "metadata").get(pk=self.graph.pk)
+            scope, state = self._sync_state(locked, now)
+            if full:
+                scope = None
+                state["full_synced_at"] = now.isoformat()
+
+            desired = self.desired_nodes(scope)
+
+            nodes = GraphNode.objects.filter(graph=self.graph)
+            if scope is not None:
+                nodes = nodes.filter(Q(component_id__in=scope[0]) | Q(cloud_resource_id__in=scope[1]))
+            existing = {}
+            duplicate_ids = []
+            unmanaged_nodes = 0
+            for node in nodes.values("id", "component_id", "cloud_resource_id", *NODE_FIELDS):
+                if node["component_id"]:
+                    key = ("component", node["component_id"])
+                elif node["cloud_resource_id"]:
+                    key = ("cloud_resource", node["cloud_resource_id"])
+                else:
+                    unmanaged_nodes += 1
+                    continue
+                if key in existing:
+                    # Duplicate materialization of the same asset; keep the first.
+                    duplicate_ids.append(node["id"])
+                    continue
+                existing[key] = node
+
+            to_create, to_update = [], []
+            for key, fields in desired.items():
+                current = existing.pop(key, None)
+                if current is None:
+                    kind, object_id = key
+                    to_create.append(GraphNode(
+                        graph=self.graph,
+                        component_id=object_id if kind == "component" else None,
+                        cloud_resource_id=object_id if kind == "cloud_resource" else None,
+                        **fields,
+                    ))
+                elif any(current[name] != fields[name] for name in NODE_FIELDS):
+                    to_update.append(GraphNode(id=current["id"], updated_at=now, **fields))
+
+            stale_node_ids = [node["id"] for node in existing.values()] + duplicate_ids
+            cascaded_edges = 0
+            if stale_node_ids:
+                if scope is not None:
+                    # A scoped sync adjusts edge_count by every edge it removes.
+                    cascaded_edges = GraphEdge.objects.filter(
+                        Q(source_id__in=stale_node_ids) | Q(target_id__in=stale_node_ids)
+                    ).count()
+                # Edges on deleted nodes go with them through the cascade.
+                GraphNode.objects.filter(id__in=stale_node_ids).delete()
+            if to_create:
+                GraphNode.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+            if to_update:
+                GraphNode.objects.bulk_update(to_update, NODE_FIELDS + ("updated_at",), batch_size=BATCH_SIZE)
+
+            stats["nodes_created"] = len(to_create)
+            stats["nodes_updated"] = len(to_update)
+            stats["nodes_deleted"] = len(stale_node_ids)
+
+            # Edges: every dependency between materialized components, or
+            # only those touching a changed component.
+            dependencies = Dependency.objects.all()
+            edges = GraphEdge.objects.filter(graph=self.graph)
+            if scope is not None:
+                dependencies = dependencies.filter(
+                    Q(source_component_id__in=scope[0]) | Q(target_component_id__in=scope[0])
+                )
+                edges = edges.filter(
+                    Q(source__component_id__in=scope[0]) | Q(target__component_id__in=scope[0])
+                )
+            component_nodes = GraphNode.objects.filter(graph=self.graph, component_id__isnull=False)
+            if scope is not None:
+                endpoints = set(scope[0])
+                for pair in dependencies.values_list("source_component_id", "target_component_id"):
+                    endpoints.update(pair)
+                component_nodes = component_nodes.filter(component_id__in=endpoints)
+            node_ids, node_status = {}, {}
+            for component_id, node_id, node_status_value in component_nodes.values_list("component_id", "id", "status"):
+                node_ids.setdefault(component_id, node_id)
+                node_status.setdefault(component_id, node_status_value)
+            dependencies = dependencies.filter(
+                source_component_id__in=list(node_ids), target_component_id__in=list(node_ids)
+            )
+            desired_edges = self.desired_edges(dependencies, node_status)
+
+            existing_edges = {}
+            unmanaged_edges = 0
+            stale_edge_ids = []
+            for edge in edges.values("id", "source_id", "target_id", *EDGE_FIELDS):
+                dependency_id = (edge["properties"] or {}).get("dependency_id")
+                if dependency_id is None:
+                    unmanaged_edges += 1
+                elif dependency_id in existing_edges:
+                    stale_edge_ids.append(edge["id"])
+                else:
+                    existing_edges[dependency_id] = edge
+
+            edges_to_create, edges_to_update = [], []
+            for dependency_id, fields in desired_edges.items():
+                fields = dict(fields)
+                source_id = node_ids[fields.pop("source_component_id")]
+                target_id = node_ids[fields.pop("target_component_id")]
+                current = existing_edges.pop(dependency_id, None)
+                if current is None:
+                    edges_to_create.append(GraphEdge(graph=self.graph, source_id=source_id, target_id=target_id, **fields))
+                elif (current["source_id"], current["target_id"]) != (source_id, target_id) or any(
+                    current[name] != fields[name] for name in EDGE_FIELDS
+                ):
+                    edges_to_update.append(GraphEdge(
+                        id=current["id"], source_id=source_id, target_id=target_id, updated_at=now, **fields
+                    ))
+
+            stale_edge_ids += [edge["id"] for edge in existing_edges.values()]
+            if stale_edge_ids:
+                GraphEdge.objects.filter(id__in=stale_edge_ids).delete()
+            if edges_to_create:
+                GraphEdge.objects.bulk_create(edges_to_create, batch_size=BATCH_SIZE)
+            if edges_to_update:
+                GraphEdge.objects.bulk_update(
+                    edges_to_update, EDGE_FIELDS + ("source", "target", "updated_at"), batch_size=BATCH_SIZE
+                )
+
+            stats["edges_created"] = len(edges_to_create)
+            stats["edges_updated"] = len(edges_to_update)
+            stats["edges_deleted"] = len(stale_edge_ids)
+
+            if scope is None:
+                node_count = len(desired) + unmanaged_nodes
+                edge_count = len(desired_edges) + unmanaged_edges
+            else:
+                node_count = F("node_count") + len(to_create) - len(stale_node_ids)
+                edge_count = F("edge_count") + len(edges_to_create) - len(stale_edge_ids) - cascaded_edges
+            metadata = dict(locked.metadata or {}, **{self.SYNC_STATE_KEY: state})
+            Graph.objects.filter(pk=self.graph.pk).update(
+                node_count=node_count, edge_count=edge_count, metadata=metadata, last_generated=now, updated_at=now
+            )
+            self.graph.refresh_from_db(fields=["node_count", "edge_count", "metadata", "last_generated"])
+
+        logger.info(f"GraphMaterializer: graph {self.graph.pk} synced {stats}")
+        return stats
+
+
+def materialize_graph(graph):
+    return GraphMaterializer(graph).sync()
+
+
+def refresh_organization_graphs(organization_id):
+    """
+    Re-sync every live (non-snapshot) graph of an organization, e.g. after a scan.
+    """
+    results = {}
+    for graph in Graph.objects.filter(organization_id=organization_id, is_snapshot=False):
+        results[graph.pk] = GraphMaterializer(graph).sync()
+    return results
@@ -1,3 +1,139 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.assets.models.models import Dependency, SoftwareComponent
+from apps.integrations.models.models import DataSource
+from apps.users.models.models import Organization, User
+from apps.visualization import codec
+from apps.visualization.models.models import Graph, GraphEdge, GraphNode
+from apps.visualization.services import GraphMaterializer
+
+
+class GraphCodecTests(SimpleTestCase):
+    def round_trip(self, graph_data):
+        return codec.decode(codec.encode(graph_data)).to_json()
+
+    def test_round_trips_string_and_int_ids(self):
+        for graph_data in (
+            {'nodes': [{'id': 'a', 'type': 'service'}, {'id': 'b'}], 'edges': [{'source': 'a', 'target': 'b', 'type': 'calls'}]},
+            {'nodes': [{'id': 1, 'type': 'service', 'score': 0.5}, {'id': 2}], 'links': [{'source': 2, 'target': 1}],
+             'directed': True},
+        ):
+            self.assertEqual(self.round_trip(graph_data), graph_data)
+
+    def test_round_trips_mixed_ids_and_non_string_types(self):
+        graph_data = {
+            'nodes': [{'id': 1, 'type': None}, {'id': '1', 'type': 7}, {'id': 2.5, 'owner': None}, {'id': True}],
+            'edges': [{'source': 1, 'target': '1', 'type': None}, {'source': '1', 'target': True, 'type': 3}],
+        }
+        decoded = self.round_trip(graph_data)
+        self.assertEqual(decoded, graph_data)
+        self.assertEqual([type(node['id']) for node in decoded['nodes']], [int, str, float, bool])
+        self.assertEqual([type(edge['source']) for edge in decoded['edges']], [int, str])
+
+    def test_round_trips_absent_and_null_nodes_and_edges(self):
+        for graph_data in (
+            {},
+            {'nodes': None, 'edges': None},
+            {'nodes': [{'id': 'a'}]},
+            {'edges': [], 'directed': True},
+            {'nodes': None, 'links': []},
+        ):
+            self.assertEqual(self.round_trip(graph_data), graph_data)
+
+    def test_edges_match_ids_of_the_same_type_only(self):
+        with self.assertRaises(codec.GraphCodecError):
+            codec.encode({'nodes': [{'id': 1}], 'edges': [{'source': '1', 'target': 1}]})
+
+    def test_graphs_the_format_cannot_hold_are_stored_as_json(self):
+        graph_data = {'nodes': [{'id': 'a'}, {'id': 'a'}], 'edges': [{'source': 'a', 'target': 'b'}]}
+        graph = Graph()
+        graph.set_graph_data(graph_data)
+        self.assertIsNone(graph.graph_blob)
+        self.assertEqual(graph.graph_json, graph_data)
+        self.assertEqual((graph.node_count, graph.edge_count), (2, 1))
+
+        graph.set_graph_data({'nodes': [{'id': 1}], 'edges': []})
+        self.assertIsNone(graph.graph_data)
+        self.assertEqual(graph.graph_json, {'nodes': [{'id': 1}], 'edges': []})
+
+
+class GraphMaterializerTests(TestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+        self.data_source = DataSource.objects.create(
+            name='acme/api', type='github', credentials='-', organization=self.organization,
+            connection_status='active',
+        )
+        self.a, self.b, self.c = (self.component(name) for name in 'abc')
+        self.a_b = self.dependency(self.a, self.b)
+        self.b_c = self.dependency(self.b, self.c)
+        user = User.objects.create_user(email='owner@acme.test', password='pw')
+        self.graph = Graph.objects.create(name='Acme', organization=self.organization, created_by=user)
+        self.materializer = GraphMaterializer(self.graph)
+
+    def component(self, name):
+        return SoftwareComponent.objects.create(
+            name=name, type='service', path=f'services/{name}', data_source=self.data_source, metadata={},
+        )
+
+    def dependency(self, source, target, **kwargs):
+        return Dependency.objects.create(source_component=source, target_component=target, dependency_type='calls', **kwargs)
+
+    def edges(self):
+        return set(GraphEdge.objects.filter(graph=self.graph).values_list('source__name', 'target__name', 'weight'))
+
+    def test_first_sync_creates_nodes_and_edges(self):
+        stats = self.materializer.sync()
+        self.assertEqual((stats['nodes_created'], stats['edges_created']), (3, 2))
+        self.assertEqual(self.edges(), {('a', 'b', 1.0), ('b', 'c', 1.0)})
+        self.assertEqual((self.graph.node_count, self.graph.edge_count), (3, 2))
+
+    def test_sync_applies_creates_updates_and_deletes(self):
+        self.materializer.sync()
+        self.b.name = 'b2'
+        self.b.save()
+        self.c.is_active = False
+        self.c.save()
+        d = self.component('d')
+        self.dependency(self.a, d)
+        self.a_b.criticality = 'critical'
+        self.a_b.save()
+
+        stats = self.materializer.sync()
+
+        self.assertEqual(
+            (stats['nodes_created'], stats['nodes_updated'], stats['nodes_deleted']), (1, 1, 1)
+        )
+        self.assertEqual((stats['edges_created'], stats['edges_updated']), (1, 1))
+        self.assertEqual(set(GraphNode.objects.filter(graph=self.graph).values_list('name', flat=True)), {'a', 'b2', 'd'})
+        self.assertEqual(self.edges(), {('a', 'b2', 3.0), ('a', 'd', 1.0)})
+        self.assertEqual((self.graph.node_count, self.graph.edge_count), (3, 2))
+
+    def test_sync_only_reads_the_changed_assets(self):
+        self.materializer.sync()
+        long_ago = timezone.now() - timedelta(days=1)
+        SoftwareComponent.objects.update(updated_at=long_ago)
+        Dependency.objects.update(updated_at=long_ago)
+        self.b.name = 'b2'
+        self.b.save()
+
+        with mock.patch.object(
+            GraphMaterializer, 'desired_nodes', autospec=True, side_effect=GraphMaterializer.desired_nodes
+        ) as desired_nodes:
+            stats = self.materializer.sync()
+
+        self.assertEqual(desired_nodes.call_args.args[1], ({self.b.pk}, set()))
+        self.assertEqual((stats['nodes_updated'], stats['edges_updated']), (1, 0))
+        self.assertEqual((self.graph.node_count, self.graph.edge_count), (3, 2))
+
+    def test_full_sync_removes_edges_of_deleted_dependencies(self):
+        self.materializer.sync()
+        self.b_c.delete()
+        stats = self.materializer.sync(full=True)
+        self.assertEqual(stats['edges_deleted'], 1)
+        self.assertEqual(self.edges(), {('a', 'b', 1.0)})
+        self.assertEqual(self.graph.edge_count, 1)
@@ -0,0 +1,8 @@
+from rest_framework.routers import SimpleRouter
+
+from .views.views import GraphViewSet
+
+router = SimpleRouter()
+router.register('graphs', GraphViewSet, basename='graph')
+
+urlpatterns = router.urls
@@ -1,27 +1,17 @@
-from django.shortcuts import render
-from django.contrib.auth import authenticate
-from django.core.exceptions import ValidationError
-from rest_framework import status, permissions
-from rest_framework.response import Response
-from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
-from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-import requests
-import json
-import logging
-import os
-from django.conf import settings
-import urllib.parse
+from backend.api import OrganizationScopedViewSet
 
-from ..models.models import User
-from ..serializers import (
-    UserRegistrationSerializer, 
-    UserSerializer,
-    GoogleAuthSerializer,
-    GithubAuthSerializer
-)
+from ..models.models import Graph
+from ..serializers import GraphSerializer
 
-logger = logging.getLogger(__name__)
+
+class GraphViewSet(OrganizationScopedViewSet):
+    queryset = Graph.objects.all()
+    serializer_class = GraphSerializer
+    raw_json_fields = ('metadata',)
+    select_related_fields = {'product': ['product']}
+    prefetch_related_fields = {'repositories': ['repositories']}
+    filters = {
+        'graph_type': ('graph_type', str),     # (organization, graph_type)
+        'product': ('product_id', int),        # (product)
+        'created_by': ('created_by_id', int),  # (created_by)
+    }
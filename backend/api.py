@@ -0,0 +1,152 @@
+"""
+Shared pieces of the organization-scoped REST API (assets, integrations,
+policies, insights, products, visualization).
+
+OrganizationScopedViewSet gives each list endpoint:
+- rows limited to the caller's organization (organization_lookup)
+- keyset pagination on (created_at, id), see backend/pagination.py
+- sparse fieldsets: ?fields=id,name,data_source returns only those fields
+- slim list path: with a slim_serializer_class, lists are read with one
+  values_list() query and rendered as plain dicts (backend/slim.py); its
+  heavy JSON fields are only returned when named in ?fields= or ?include=
+- query presets: select_related/prefetch_related per serializer field,
+  applied only when the field is in the response, so nested objects cost
+  one join or one extra query per page instead of one query per row
+- JSONB pass-through: raw_json_fields are selected as JSON text and
+  rendered without a decode and re-encode (see backend/renderers.py)
+- streamed list responses when the JSON renderer was negotiated
+- filters declared per view as query parameter -> (lookup, type). Only
+  columns an index serves are exposed: a ForeignKey, or a composite index
+  together with the filter on its leading column (noted next to each
+  filter). Comma-separated values become an __in lookup.
+"""
+from rest_framework import serializers, viewsets
+from rest_framework.exceptions import ValidationError
+
+from .pagination import KeysetPagination
+from .renderers import ORJSONRenderer, RawJSONField, raw_json
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+def parse_bool(value):
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(value)
+
+
+def requested_fields(request, param='fields'):
+    """
+    The ?fields= sparse fieldset as a set, or None for all fields.
+    """
+    fields = request.query_params.get(param) if request is not None else None
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(',') if field.strip()}
+
+
+class SparseFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer taking fields=... to serialize a subset of Meta.fields,
+    and raw_json=... to read those JSON fields from their raw_json()
+    annotation (<name>_json).
+    """
+
+    def __init__(self, *args, fields=None, raw_json=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in raw_json:
+            self.fields[name] = RawJSONField(source=f'{name}_json')
+
+
+class OrganizationScopedViewSet(viewsets.ReadOnlyModelViewSet):
+    organization_lookup = 'organization'
+    pagination_class = KeysetPagination
+    select_related_fields = {}
+    prefetch_related_fields = {}
+    raw_json_fields = ()
+    slim_serializer_class = None
+    filters = {}
+
+    def slim(self):
+        return self.slim_serializer_class is not None and self.action == 'list'
+
+    def fields(self):
+        if self.slim():
+            available = self.slim_serializer_class.field_names()
+            default = self.slim_serializer_class.default_fields()
+        else:
+            available = default = list(self.get_serializer_class().Meta.fields)
+        fields = requested_fields(self.request)
+        if fields is None:
+            fields = set(default) | (requested_fields(self.request, 'include') or set())
+        unknown = fields - set(available)
+        if unknown:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}"})
+        return [field for field in available if field in fields]
+
+    def raw_json(self):
+        return [field for field in self.raw_json_fields if field in self.fields()]
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.fields())
+        kwargs.setdefault('raw_json', self.raw_json())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        organization_id = getattr(self.request.user, 'organization_id', None)
+        queryset = super().get_queryset()
+        if organization_id is None:
+            return queryset.none()
+        queryset = queryset.filter(**{self.organization_lookup: organization_id})
+        if self.slim():
+            # Joins and JSON columns come from the compiled values_list().
+            return queryset
+
+        fields = self.fields()
+        select_related = [path for field in fields for path in self.select_related_fields.get(field, ())]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        prefetch_related = [path for field in fields for path in self.prefetch_related_fields.get(field, ())]
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        raw = self.raw_json()
+        if raw:
+            queryset = queryset.defer(*raw).annotate(**{f'{field}_json': raw_json(field) for field in raw})
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        streaming = isinstance(getattr(request, 'accepted_renderer', None), ORJSONRenderer)
+        if self.slim():
+            compiled = self.slim_serializer_class.compile(self.fields())
+            page = self.paginate_queryset(compiled.query(self.filter_queryset(self.get_queryset())))
+            if streaming:
+                return self.paginator.get_streaming_response(page, compiled.transform)
+            return self.get_paginated_response([compiled.transform(row) for row in page])
+        if not streaming:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_streaming_response(page, serializer.child.to_representation)
+
+    def filter_queryset(self, queryset):
+        lookups = {}
+        for param, (lookup, cast) in self.filters.items():
+            value = self.request.query_params.get(param)
+            if value is None or value == '':
+                continue
+            try:
+                values = [cast(part) for part in value.split(',')]
+            except ValueError:
+                raise ValidationError({param: f"Invalid value {value!r}"})
+            if len(values) == 1:
+                lookups[lookup] = values[0]
+            else:
+                lookups[f'{lookup}__in'] = values
+        return queryset.filter(**lookups) if lookups else queryset
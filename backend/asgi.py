@@ -0,0 +1,25 @@
+"""
+ASGI config for backend project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Run it with uvicorn workers under gunicorn (see gunicorn.conf.py):
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py backend.asgi
+
+Async views (backend/async_views.py) then wait on upstream APIs on the
+event loop. Sync views and ORM calls run in worker threads, one per
+request, so use a connection pool (DB_POOL=psycopg or pgbouncer) rather
+than persistent per-thread connections.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings.base")
+
+application = get_asgi_application()
@@ -0,0 +1,61 @@
+"""
+Async DRF views for I/O-bound endpoints.
+
+DRF's APIView.dispatch is synchronous. AsyncAPIView lets handlers be
+coroutines (async def get/post/...): Django then treats the view as
+async, and under ASGI (backend/asgi.py) a request waiting on an upstream
+API holds no thread, so one process serves many slow upstream calls at
+once. Under WSGI Django runs the view with async_to_sync, as before.
+
+The ORM is synchronous: async handlers reach it through sync_to_async,
+ideally one call for all their database work. Authentication, permission
+and throttle checks may query the database too, so they run the same way.
+Sync handlers (e.g. DRF's options) still work on an async view.
+
+Under WSGI the event loop async_to_sync creates is discarded with the
+request, and anything bound to it (e.g. httpx connection pools) leaks
+unless closed. Views list such objects in loop_resources; their aclose()
+is awaited when a request that did not come through ASGI ends.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    loop_resources = ()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await self._dispatch(request, *args, **kwargs)
+        finally:
+            if not isinstance(request, ASGIRequest):
+                for resource in self.loop_resources:
+                    await resource.aclose()
+
+    async def _dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,441 @@
+"""
+Two-tier cache with tenant namespaces.
+
+TieredCache is a cache backend: a process-local LRU (L1) in front of
+another configured cache alias (L2, Redis through django-redis). Reads try
+L1, then L2, and fill L1 on an L2 hit; writes and deletes go to both.
+Another process's writes become visible here when the L1 entry expires,
+so L1_TIMEOUT bounds cross-process staleness. Entries are pickled in L1
+like LocMemCache, so callers never share mutable objects across threads.
+
+TenantCache scopes keys to an Organization.id and versions them: the key
+of "graphs" for organization 42 is "t:42:v<version>:graphs", and
+invalidate() moves the tenant to a new version, which orphans every
+entry at once (they expire from Redis on their own). Entries can also
+carry dependency tags (cached(), bump_tags()) and are only served while
+none of their tags has moved on; backend/invalidation.py bumps tags when
+models change. Tenant and tag versions are always read from L2, so an
+invalidation is seen by every process immediately.
+
+get_or_set() and cached() are single-flight: concurrent misses for one
+key in this process wait on one lock and, across processes, on a short
+Redis lock, so only one caller computes an expensive value.
+
+Hit and miss counts per tier are kept per process; see cache_metrics().
+"""
+import logging
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import redis
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+DEFAULT_L1_MAX_ENTRIES = 1000
+DEFAULT_L1_TIMEOUT = 5
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+
+
+def _count(name, n=1):
+    with _metrics_lock:
+        _metrics[name] += n
+
+
+def cache_metrics():
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    lookups = metrics.get('l1_hits', 0) + metrics.get('l2_hits', 0) + metrics.get('misses', 0)
+    metrics['hit_ratio'] = round((lookups - metrics.get('misses', 0)) / lookups, 4) if lookups else None
+    return metrics
+
+
+def reset_cache_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU of pickled values with per-entry expiry.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires, pickled = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._data[key] = (expires, pickled)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                _count('l1_evictions')
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_l1_stores = {}
+_l1_stores_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    """
+    CACHES entry:
+        'BACKEND': 'backend.cache.TieredCache',
+        'OPTIONS': {'L2': '<alias>', 'L1_MAX_ENTRIES': 1000, 'L1_TIMEOUT': 5},
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__({**params, 'OPTIONS': {}})
+        self._l2_alias = options['L2']
+        self._l1_timeout = options.get('L1_TIMEOUT', DEFAULT_L1_TIMEOUT)
+        # django.core.cache builds one backend instance per thread; the L1
+        # store is shared by all of them.
+        with _l1_stores_lock:
+            self._l1 = _l1_stores.get(location or self._l2_alias)
+            if self._l1 is None:
+                self._l1 = _l1_stores[location or self._l2_alias] = LRUCache(
+                    options.get('L1_MAX_ENTRIES', DEFAULT_L1_MAX_ENTRIES)
+                )
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def _l1_timeout_for(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self._l1_timeout
+        return min(self._l1_timeout, max(0, timeout - time.time()))
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._l1.get(key)
+        if value is not _MISSING:
+            _count('l1_hits')
+            return value
+        value = self.l2.get(key, _MISSING)
+        if value is _MISSING:
+            _count('misses')
+            return default
+        _count('l2_hits')
+        self._l1.set(key, value, self._l1_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, pending = {}, {}
+        for key in keys:
+            made = self.make_and_validate_key(key, version=version)
+            value = self._l1.get(made)
+            if value is _MISSING:
+                pending[made] = key
+            else:
+                found[key] = value
+        _count('l1_hits', len(found))
+        if pending:
+            fetched = self.l2.get_many(list(pending))
+            for made, value in fetched.items():
+                self._l1.set(made, value, self._l1_timeout)
+                found[pending[made]] = value
+            _count('l2_hits', len(fetched))
+            _count('misses', len(pending) - len(fetched))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.l2.set(key, value, timeout)
+        self._l1.set(key, value, self._l1_timeout_for(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        added = self.l2.add(key, value, timeout)
+        if added:
+            self._l1.set(key, value, self._l1_timeout_for(timeout))
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.l2.touch(key, timeout)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._l1.delete(key)
+        return self.l2.delete(key)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._l1.delete(key)
+        return self.l2.incr(key, delta)
+
+    def clear(self):
+        self._l1.clear()
+        self.l2.clear()
+
+    def clear_local(self):
+        self._l1.clear()
+
+
+def _counter_cache(cache):
+    # Versions decide whether an entry is current, so every process must
+    # see a bump at once: read and write them on L2, never through L1.
+    return cache.l2 if isinstance(cache, TieredCache) else cache
+
+
+def _initial_version():
+    # Not 1: a version key evicted from Redis and recreated must never
+    # repeat a version an orphaned entry was stored under.
+    return time.time_ns()
+
+
+def _read_versions(cache, keys):
+    counters = _counter_cache(cache)
+    versions = counters.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # add() so concurrent first readers agree on the version.
+            counters.add(key, _initial_version(), None)
+            versions[key] = counters.get(key, 0)
+    return versions
+
+
+def _bump(cache, key):
+    counters = _counter_cache(cache)
+    try:
+        if counters.incr(key) is not None:
+            return
+    except ValueError:
+        pass
+    if not counters.add(key, _initial_version(), None):
+        counters.incr(key)
+
+
+class TenantCache:
+    """
+    Cache namespace of one organization. Use tenant_cache(organization_id).
+    """
+
+    def __init__(self, organization_id, alias='default'):
+        self.organization_id = organization_id
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_key(self):
+        return f't:{self.organization_id}:version'
+
+    def version(self):
+        return _read_versions(self.cache, [self._version_key()])[self._version_key()]
+
+    def key(self, name):
+        return f't:{self.organization_id}:v{self.version()}:{name}'
+
+    def get(self, name, default=None):
+        return self.cache.get(self.key(name), default)
+
+    def set(self, name, value, timeout=DEFAULT_TIMEOUT):
+        self.cache.set(self.key(name), value, timeout)
+
+    def delete(self, name):
+        self.cache.delete(self.key(name))
+
+    def get_or_set(self, name, compute, timeout=DEFAULT_TIMEOUT, tags=()):
+        """
+        Return the cached value of name, computing and storing it with
+        compute() on a miss. Only one caller computes at a time. With tags,
+        the entry also goes stale when any of them is bumped (read such
+        entries through get_or_set only).
+        """
+        if tags:
+            return cached(self.key(name), compute, tags=tags, timeout=timeout, alias=self.alias)
+        return single_flight(self.cache, self.key(name), compute, timeout)
+
+    def invalidate(self):
+        """
+        Orphan every entry of this tenant by moving to a new version.
+        """
+        _bump(self.cache, self._version_key())
+        _count('tenant_invalidations')
+
+
+def tenant_cache(organization_id, alias='default'):
+    return TenantCache(organization_id, alias=alias)
+
+
+def _tag_key(tag):
+    return f'tag:{tag}'
+
+
+def tag_versions(tags, alias='default'):
+    keys = [_tag_key(tag) for tag in tags]
+    versions = _read_versions(caches[alias], keys)
+    return {tag: versions[key] for tag, key in zip(tags, keys)}
+
+
+def _bump_many(cache, keys):
+    counters = _counter_cache(cache)
+    client = getattr(getattr(counters, 'client', None), 'get_client', None)
+    if client is None:
+        for key in keys:
+            _bump(cache, key)
+        return
+    # django-redis: one pipeline for all of them. A missing key starts at
+    # _initial_version(), as in _bump().
+    try:
+        pipe = client(write=True).pipeline(transaction=False)
+        for key in keys:
+            key = counters.make_and_validate_key(key)
+            pipe.set(key, _initial_version(), nx=True)
+            pipe.incr(key)
+        pipe.execute()
+    except redis.RedisError as e:
+        if not getattr(counters, '_ignore_exceptions', False):
+            raise
+        logger.error(f"Cache: tag bump failed: {str(e)}")
+        _count('tag_bump_errors')
+
+
+def bump_tags(tags, alias='default'):
+    """
+    Make every entry cached with any of these tags stale.
+    """
+    tags = set(tags)
+    if not tags:
+        return
+    _bump_many(caches[alias], [_tag_key(tag) for tag in tags])
+    _count('tag_bumps', len(tags))
+
+
+def cached(key, compute, tags=(), timeout=DEFAULT_TIMEOUT, alias='default'):
+    """
+    Single-flight get_or_set for key whose entry is only served while none
+    of its tags (e.g. "org:42:products", "graph:17") has been bumped since
+    it was computed.
+
+    Tag versions are read before compute() runs, so a change committed
+    while the value is being computed leaves it stale rather than current.
+    Inside a transaction that changed one of the tags the value is
+    computed but not cached, as it may include uncommitted rows.
+    """
+    from backend.invalidation import changed_in_transaction
+
+    tags = sorted(set(tags))
+    if tags and changed_in_transaction(tags):
+        _count('uncached')
+        return compute()
+    versions = tag_versions(tags, alias) if tags else {}
+
+    def is_fresh(entry):
+        if entry['tags'] == versions:
+            return True
+        _count('stale')
+        return False
+
+    entry = single_flight(
+        caches[alias], key, lambda: {'tags': versions, 'value': compute()}, timeout, is_fresh=is_fresh,
+    )
+    return entry['value']
+
+
+_local_locks = {}
+_local_locks_lock = threading.Lock()
+
+
+def _local_lock(key):
+    with _local_locks_lock:
+        entry = _local_locks.get(key)
+        if entry is None:
+            entry = _local_locks[key] = [threading.Lock(), 0]
+        entry[1] += 1
+        return entry
+
+
+def _release_local_lock(key, entry):
+    with _local_locks_lock:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _local_locks.pop(key, None)
+
+
+def single_flight(cache, key, compute, timeout=DEFAULT_TIMEOUT, is_fresh=None):
+    def lookup():
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING and is_fresh is not None and not is_fresh(value):
+            return _MISSING
+        return value
+
+    value = lookup()
+    if value is not _MISSING:
+        return value
+
+    entry = _local_lock(key)
+    try:
+        with entry[0]:
+            value = lookup()
+            if value is not _MISSING:
+                _count('coalesced')
+                return value
+
+            lock_key = f'lock:{key}'
+            deadline = time.monotonic() + LOCK_WAIT
+            # add() returns None rather than False when django-redis ignored
+            # a Redis error: compute without the cross-process lock then.
+            acquired = cache.add(lock_key, 1, LOCK_TIMEOUT)
+            while acquired is False:
+                # Another process is computing it.
+                if time.monotonic() >= deadline:
+                    _count('lock_timeouts')
+                    return compute()
+                time.sleep(LOCK_POLL_INTERVAL)
+                value = lookup()
+                if value is not _MISSING:
+                    _count('coalesced')
+                    return value
+                acquired = cache.add(lock_key, 1, LOCK_TIMEOUT)
+            try:
+                value = compute()
+                cache.set(key, value, timeout)
+                _count('computed')
+                return value
+            finally:
+                if acquired:
+                    cache.delete(lock_key)
+    finally:
+        _release_local_lock(key, entry)
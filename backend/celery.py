@@ -0,0 +1,22 @@
+"""
+Celery application.
+
+Start workers per queue so scans cannot starve interactive work:
+    celery -A backend worker -Q interactive -c 4
+    celery -A backend worker -Q scan,ingest -c 8
+    celery -A backend worker -Q analytics -c 2
+    celery -A backend beat
+
+Queues, routes and priorities are in settings (CELERY_TASK_QUEUES,
+CELERY_TASK_ROUTES). With CELERY_TASK_ALWAYS_EAGER (tests, local
+development) tasks run inline and no broker is needed.
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings.base")
+
+app = Celery("backend")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
@@ -0,0 +1,85 @@
+"""
+Connection management settings for the default database.
+
+DB_POOL selects how connections are reused:
+- "persistent" (default): Django keeps each thread's connection open for
+  CONN_MAX_AGE seconds and health-checks it before reuse.
+- "psycopg": connections come from a per-process psycopg 3 pool
+  (backend.db.postgresql_pool); CONN_MAX_AGE is forced to 0.
+- "pgbouncer": connections go through PgBouncer in transaction mode, which
+  rules out server-side cursors and prepared statements.
+
+Pool sizes follow the gunicorn topology: every worker process serves up to
+GUNICORN_THREADS requests at once, so it needs that many connections plus
+a little headroom for background threads, and all workers together must fit
+in DB_MAX_CONNECTIONS.
+"""
+
+POOL_MODES = ('persistent', 'psycopg', 'pgbouncer')
+# Connections for threads outside the request cycle (health probes,
+# password rehash, GitHub helpers).
+BACKGROUND_CONNECTIONS = 2
+
+
+def pool_size(workers, threads, max_connections):
+    per_worker = threads + BACKGROUND_CONNECTIONS
+    return max(1, min(per_worker, max_connections // max(1, workers)))
+
+
+def configure_database(database, mode='persistent', workers=1, threads=1, max_connections=100,
+                       conn_max_age=60, pgbouncer_host=None, pgbouncer_port=None, pool_timeout=10):
+    """
+    Return a copy of a DATABASES entry with connection reuse configured
+    for the given mode.
+    """
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_POOL must be one of {', '.join(POOL_MODES)}, got {mode!r}")
+
+    database = {**database, 'OPTIONS': dict(database.get('OPTIONS', {}))}
+    database['CONN_HEALTH_CHECKS'] = True
+
+    if mode == 'psycopg':
+        size = pool_size(workers, threads, max_connections)
+        database['ENGINE'] = 'backend.db.postgresql_pool'
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': min(size, max(1, threads // 2)),
+            'max_size': size,
+            'timeout': pool_timeout,
+            'max_idle': 300,
+            'max_lifetime': 1800,
+        }
+    elif mode == 'pgbouncer':
+        if pgbouncer_host:
+            database['HOST'] = pgbouncer_host
+        if pgbouncer_port:
+            database['PORT'] = pgbouncer_port
+        database['CONN_MAX_AGE'] = conn_max_age
+        # Transaction pooling hands each transaction to any server
+        # connection, so nothing may outlive a transaction.
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+    else:
+        database['CONN_MAX_AGE'] = conn_max_age
+    return database
+
+
+def add_replicas(databases, hosts, alias_prefix='replica'):
+    """
+    Add one read replica alias per host, configured like the default
+    database, and return the aliases. Tests mirror the default database
+    instead of creating replica test databases.
+    """
+    aliases = []
+    for i, host in enumerate(hosts, start=1):
+        host, _, port = host.strip().partition(':')
+        if not host:
+            continue
+        alias = f'{alias_prefix}_{i}'
+        replica = {**databases['default'], 'OPTIONS': dict(databases['default'].get('OPTIONS', {}))}
+        replica['HOST'] = host
+        if port:
+            replica['PORT'] = port
+        replica['TEST'] = {'MIRROR': 'default'}
+        databases[alias] = replica
+        aliases.append(alias)
+    return aliases
@@ -0,0 +1,47 @@
+"""
+Connection metrics for this process: how many physical connections each
+alias has opened (counted through connection_created; with reuse working
+this stays close to the number of threads) and, for aliases on the pooled
+backend, psycopg's pool statistics (size, available, requests_waiting,
+usage and wait times).
+"""
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+POOL_ENGINE = 'backend.db.postgresql_pool'
+
+_opened = Counter()
+_lock = threading.Lock()
+
+
+@receiver(connection_created)
+def _count_connection(sender, connection, **kwargs):
+    with _lock:
+        _opened[connection.alias] += 1
+
+
+def pool_stats(alias):
+    if settings.DATABASES[alias]['ENGINE'] != POOL_ENGINE:
+        return None
+    from .postgresql_pool.base import get_pools
+
+    pool = get_pools().get(alias)
+    return pool.get_stats() if pool is not None else None
+
+
+def connection_stats():
+    with _lock:
+        opened = dict(_opened)
+    stats = {}
+    for alias, database in settings.DATABASES.items():
+        stats[alias] = {
+            'engine': database['ENGINE'],
+            'conn_max_age': database.get('CONN_MAX_AGE', 0),
+            'connections_opened': opened.get(alias, 0),
+            'pool': pool_stats(alias),
+        }
+    return stats
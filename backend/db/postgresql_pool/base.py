@@ -0,0 +1,96 @@
+"""
+PostgreSQL backend that takes connections from a psycopg 3 ConnectionPool.
+
+Django 4.2 has no built-in pooling (it arrives in 5.1 with the same
+OPTIONS["pool"] shape used here). Each process keeps one pool per database
+alias, created lazily so gunicorn workers never share a pool inherited from
+the master. Connections go back to the pool when Django closes them, so
+CONN_MAX_AGE must be 0.
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql.base import Cursor, ServerBindingCursor
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pools():
+    return dict(_pools)
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    def _pool_options(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if options is True:
+            return {}
+        return dict(options or {})
+
+    @property
+    def pool(self):
+        pool = _pools.get(self.alias)
+        if pool is not None:
+            return pool
+        with _pools_lock:
+            pool = _pools.get(self.alias)
+            if pool is None:
+                pool = _pools[self.alias] = self._create_pool()
+        return pool
+
+    def _create_pool(self):
+        if not is_psycopg3:
+            raise ImproperlyConfigured("Connection pooling requires psycopg >= 3")
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured("Pooled connections require CONN_MAX_AGE = 0")
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as e:
+            raise ImproperlyConfigured("Connection pooling requires the psycopg-pool package") from e
+
+        connect_kwargs = self.get_connection_params()
+        # Django sets autocommit itself once it has the connection.
+        connect_kwargs['autocommit'] = True
+        check = ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+        options = {'name': self.alias, **self._pool_options()}
+        pool = ConnectionPool(kwargs=connect_kwargs, open=False, check=check, **options)
+        pool.open()
+        return pool
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict['OPTIONS']
+        isolation_level = options.get('isolation_level')
+        if isolation_level is None:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+        else:
+            try:
+                self.isolation_level = IsolationLevel(isolation_level)
+            except ValueError:
+                raise ImproperlyConfigured(
+                    f"Invalid transaction isolation level {isolation_level} specified."
+                )
+        connection = self.pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        connection.cursor_factory = ServerBindingCursor if options.get('server_side_binding') is True else Cursor
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.connection._pool.putconn(self.connection)
+                self.connection = None
+
+    @classmethod
+    def close_pool(cls, alias):
+        with _pools_lock:
+            pool = _pools.pop(alias, None)
+        if pool is not None:
+            pool.close()
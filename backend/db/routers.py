@@ -0,0 +1,218 @@
+"""
+Read-replica routing.
+
+ReplicaRouter sends reads to a replica only inside a request handled by
+ReplicaRoutingMiddleware; Celery tasks, management commands and the
+shell always use the primary, so scan ingestion never reads its own
+writes from a lagging replica.
+
+Whether a read goes to a replica depends on DATABASE_ROUTING:
+- VIEWS, or a ``db_routing`` attribute on the view (function or class, see
+  read_from_replica / read_from_primary), decides for every read of that
+  view: "replica" or "primary".
+- otherwise MODELS ("app_label.modelname") and then APPS decide per model.
+- anything not listed reads from the primary.
+
+Read-your-writes: a request is pinned to the primary
+- for its whole duration if it is not a safe method (POST, PUT, ...)
+- from the first write on
+- while a transaction is open on the primary
+- for STICKY_SECONDS after one of its writes, through a cookie (browser
+  sessions) and a per-user cache key (token clients, which send no
+  cookies).
+One replica is chosen per request so a request never mixes replicas.
+
+The routing state lives in a context variable, so it follows a request
+into the worker threads of sync_to_async under ASGI.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject, empty
+
+DEFAULTS = {
+    'REPLICAS': [],
+    'APPS': {},
+    'MODELS': {},
+    'VIEWS': {},
+    'STICKY_SECONDS': 10,
+    'COOKIE_NAME': 'db_pinned',
+}
+
+REPLICA = 'replica'
+PRIMARY = 'primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = ContextVar('db_routing', default=None)
+
+
+def _config(name):
+    return getattr(settings, 'DATABASE_ROUTING', {}).get(name, DEFAULTS[name])
+
+
+def _user_pin_key(user_id):
+    return f'db:pinned:{user_id}'
+
+
+class RoutingState:
+    def __init__(self, request=None, pinned=False, mode=None):
+        self.request = request
+        self.pinned = pinned
+        self.mode = mode
+        self.wrote = False
+        self.replica = None
+        self._user_checked = False
+
+    def is_pinned(self):
+        if self.pinned:
+            return True
+        if not self._user_checked and self.request is not None:
+            # Token authentication runs inside the view, so the user is only
+            # known after some reads have been routed. Never resolve a lazy
+            # user from here: that lookup is itself a routed read.
+            user = self.request.__dict__.get('user')
+            if user is None or (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+                return False
+            self._user_checked = True
+            if user.is_authenticated:
+                self.pinned = bool(cache.get(_user_pin_key(user.pk)))
+        return self.pinned
+
+    def choose_replica(self):
+        if self.replica is None:
+            replicas = _config('REPLICAS')
+            self.replica = random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+        return self.replica
+
+
+@contextmanager
+def read_from(mode, request=None, pinned=False):
+    """
+    Route reads in this block as a request with the given view mode would
+    (None: per-model configuration).
+    """
+    token = _state.set(RoutingState(request=request, pinned=pinned, mode=mode))
+    try:
+        yield _state.get()
+    finally:
+        _state.reset(token)
+
+
+def _with_routing(mode):
+    def decorator(view):
+        view.db_routing = mode
+        return view
+    return decorator
+
+
+read_from_replica = _with_routing(REPLICA)
+read_from_primary = _with_routing(PRIMARY)
+
+
+class ReplicaRouter:
+    def _model_mode(self, model):
+        meta = model._meta
+        models = _config('MODELS')
+        if meta.label_lower in models:
+            return models[meta.label_lower]
+        return _config('APPS').get(meta.app_label)
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.is_pinned() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        mode = state.mode or self._model_mode(model)
+        if mode == REPLICA:
+            return state.choose_replica()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *_config('REPLICAS')}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in _config('REPLICAS'):
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _routing(self, request):
+        cookie = request.COOKIES.get(_config('COOKIE_NAME'))
+        pinned = request.method not in SAFE_METHODS or _pinned_until(cookie) > time.time()
+        return read_from(None, request=request, pinned=pinned)
+
+    def _pin(self, request, response):
+        """
+        Set the sticky cookie after a write; returns the user to pin, if any.
+        """
+        sticky_seconds = _config('STICKY_SECONDS')
+        response.set_cookie(_config('COOKIE_NAME'), str(int(time.time() + sticky_seconds)),
+                            max_age=sticky_seconds, httponly=True, samesite='Lax')
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self._routing(request) as state:
+            request.db_routing = state
+            response = self.get_response(request)
+
+        if state.wrote:
+            user = self._pin(request, response)
+            if user is not None:
+                cache.set(_user_pin_key(user.pk), 1, _config('STICKY_SECONDS'))
+        return response
+
+    async def __acall__(self, request):
+        with self._routing(request) as state:
+            request.db_routing = state
+            response = await self.get_response(request)
+
+        if state.wrote:
+            # request.user may still be lazy, and resolving it queries the database.
+            user = await sync_to_async(self._pin)(request, response)
+            if user is not None:
+                await cache.aset(_user_pin_key(user.pk), 1, _config('STICKY_SECONDS'))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mode = getattr(view_func, 'db_routing', None)
+        if mode is None:
+            mode = getattr(getattr(view_func, 'cls', None), 'db_routing', None)
+        if mode is None and request.resolver_match is not None:
+            mode = _config('VIEWS').get(request.resolver_match.view_name)
+        request.db_routing.mode = mode
+        return None
+
+
+def _pinned_until(value):
+    try:
+        return int(value or 0)
+    except ValueError:
+        return 0
@@ -0,0 +1,270 @@
+"""
+Per-request performance instrumentation.
+
+RequestInstrumentationMiddleware samples a fraction of requests
+(INSTRUMENTATION['SAMPLE_RATE']). For a sampled request it records:
+- SQL query count and total SQL time, through a database execute wrapper
+- outbound HTTP time and call count, through an http_client listener
+- total wall time
+Repeated normalized SQL statements (N_PLUS_ONE_THRESHOLD or more of the
+same shape) are flagged as likely N+1 patterns. Each sampled request emits
+one structured log line on the "backend.instrumentation" logger and is
+folded into rolling per-view aggregates, which RequestStatsView exposes to
+staff users.
+
+Unsampled requests cost one random() call. Aggregates are per process.
+
+Under ASGI the middleware runs on the event loop. The ORM work of the
+request (sync views, sync_to_async calls of async views) runs on the
+request's thread-sensitive worker thread, so the query recorder is
+installed on that thread's connections.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from apps.users.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 1.0,
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'SLOW_REQUEST_MS': 1000,
+    'WINDOW': 500,
+}
+
+_current = ContextVar('request_stats', default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _config(name):
+    return getattr(settings, 'INSTRUMENTATION', {}).get(name, DEFAULTS[name])
+
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape: literals and IN lists become
+    placeholders so the same query with different parameters compares equal.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.http_calls = 0
+        self.http_ms = 0.0
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    def record_query(self, sql, elapsed_ms):
+        self.queries += 1
+        self.sql_ms += elapsed_ms
+        self.statements[sql] += 1
+
+    def record_http(self, elapsed_ms):
+        # Outbound calls may run on worker threads (sync_to_async).
+        with self._lock:
+            self.http_calls += 1
+            self.http_ms += elapsed_ms
+
+    def repeated_statements(self, threshold):
+        repeated = Counter()
+        for sql, count in self.statements.items():
+            repeated[normalize_sql(sql)] += count
+        return [(sql, count) for sql, count in repeated.most_common() if count >= threshold]
+
+
+def _query_recorder(stats):
+    def record(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats.record_query(sql, (time.perf_counter() - started) * 1000)
+    return record
+
+
+def _record_outbound(host, method, elapsed_ms, error):
+    stats = _current.get()
+    if stats is not None:
+        stats.record_http(elapsed_ms)
+
+
+http_client.add_listener(_record_outbound)
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else None
+
+
+class ViewAggregates:
+    """
+    Rolling window of the last WINDOW sampled requests per view.
+    """
+
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, view, sample):
+        with self._lock:
+            window = self._samples.get(view)
+            if window is None:
+                window = self._samples[view] = deque(maxlen=_config('WINDOW'))
+            window.append(sample)
+
+    def snapshot(self):
+        with self._lock:
+            samples = {view: list(window) for view, window in self._samples.items()}
+        result = {}
+        for view, window in samples.items():
+            count = len(window)
+            wall = sorted(s['wall_ms'] for s in window)
+            result[view] = {
+                'samples': count,
+                'wall_ms_p50': round(_percentile(wall, 0.50), 2),
+                'wall_ms_p95': round(_percentile(wall, 0.95), 2),
+                'wall_ms_max': round(wall[-1], 2),
+                'queries_avg': round(sum(s['queries'] for s in window) / count, 2),
+                'queries_max': max(s['queries'] for s in window),
+                'sql_ms_avg': round(sum(s['sql_ms'] for s in window) / count, 2),
+                'http_ms_avg': round(sum(s['http_ms'] for s in window) / count, 2),
+                'n_plus_one': sum(1 for s in window if s['n_plus_one']),
+                'errors': sum(1 for s in window if s['status'] >= 500),
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+view_aggregates = ViewAggregates()
+
+
+def _record_queries(stats):
+    stack = ExitStack()
+    recorder = _query_recorder(stats)
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+    return stack
+
+
+def _sampled():
+    return _config('ENABLED') and random.random() < _config('SAMPLE_RATE')
+
+
+class RequestInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not _sampled():
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with _record_queries(stats):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, stats, started)
+        return response
+
+    async def __acall__(self, request):
+        if not _sampled():
+            return await self.get_response(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            stack = await sync_to_async(_record_queries)(stats)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _current.reset(token)
+        self._finish(request, response, stats, started)
+        return response
+
+    def _finish(self, request, response, stats, started):
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        repeated = stats.repeated_statements(_config('N_PLUS_ONE_THRESHOLD'))
+        sample = {
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            'wall_ms': round(wall_ms, 2),
+            'queries': stats.queries,
+            'sql_ms': round(stats.sql_ms, 2),
+            'http_calls': stats.http_calls,
+            'http_ms': round(stats.http_ms, 2),
+            'n_plus_one': [{'sql': sql[:300], 'count': count} for sql, count in repeated[:3]],
+        }
+        view_aggregates.add(view, sample)
+
+        if repeated or wall_ms >= _config('SLOW_REQUEST_MS'):
+            logger.warning(json.dumps(sample))
+        else:
+            logger.info(json.dumps(sample))
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line. Messages that are already JSON objects are
+    merged into the record instead of being nested as a string.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+        }
+        message = record.getMessage()
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            entry.update(payload)
+        else:
+            entry['message'] = message
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
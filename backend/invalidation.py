@@ -0,0 +1,271 @@
+"""
+Model-change driven cache invalidation.
+
+Cached entries depend on tags (see backend.cache.cached): an
+organization-wide tag per model, e.g. "org:42:products", and object tags,
+e.g. "product:7" or "graph:17". High-volume models (components,
+dependencies, compliance results) only have group tags ("org:42:compliance",
+"scan_job:9"), so a scan touching 200k rows bumps a handful of tags, not
+one per row. When a tracked row changes, its tags are bumped:
+- on save and delete, through model signals
+- on QuerySet.update(), delete(), bulk_create() and bulk_update(), which
+  send no signals, through InvalidatingQuerySet (the tracked models'
+  manager), from one grouped read of the affected rows
+
+Compliance results have no delete signal, so deleting them stays a single
+DELETE rather than a fetch and a signal per row. Deleting a component also
+bumps the tags of the rows that cascade with it.
+
+Tags are bumped on every change and again once the transaction commits,
+in one Redis round trip per change. The first bump makes readers
+recompute instead of serving the old entry during the transaction;
+readers in other connections may still cache old committed rows, which
+the commit bump discards. A read inside the transaction that depends on
+a tag the transaction changed (changed_in_transaction()) is computed but
+not cached: it may see uncommitted rows, which a rollback would leave in
+the cache.
+
+A read caches its entry under the tags it depends on, e.g. a product
+graph under ("graph:17", "org:42:components", "org:42:insights").
+"""
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+
+from backend.cache import bump_tags
+
+
+def org_tag(organization_id, name):
+    return f'org:{organization_id}:{name}'
+
+
+def _organizations_of(label, field):
+    """
+    Map rows to the organization_id of the label model row each refers to
+    through field, in one query.
+    """
+    def organizations(rows):
+        ids = {row[field] for row in rows if row[field] is not None}
+        if not ids:
+            return set()
+        return set(
+            apps.get_model(label).objects.filter(pk__in=ids)
+            .values_list('organization_id', flat=True).distinct()
+        )
+    return organizations
+
+
+class TagSpec:
+    """
+    How to tag one model: ``fields`` are read from each changed row (an
+    instance or a values() dict), ``organizations`` maps the rows to their
+    Organization ids, ``objects`` lists a row's object tags and ``cascades``
+    names the organization tags of rows deleted along with one. Models
+    with ``signal_deletes=False`` are only invalidated on QuerySet.delete().
+    """
+
+    def __init__(self, name, fields, organizations, objects=None, cascades=(), signal_deletes=True):
+        self.name = name
+        self.fields = fields
+        self.organizations = organizations
+        self.objects = objects
+        self.cascades = cascades
+        self.signal_deletes = signal_deletes
+
+    def tags(self, rows, deleted=False):
+        tags = set()
+        if self.objects is not None:
+            for row in rows:
+                tags.update(tag for tag in self.objects(row) if not tag.endswith(':None'))
+        for organization_id in self.organizations(rows):
+            if organization_id is not None:
+                tags.add(org_tag(organization_id, self.name))
+                if deleted:
+                    tags.update(org_tag(organization_id, name) for name in self.cascades)
+        return tags
+
+
+def _each(organization):
+    return lambda rows: {organization(row) for row in rows}
+
+
+def _component_organizations(rows):
+    SoftwareComponent = apps.get_model('assets', 'SoftwareComponent')
+    component_ids = {row['source_component_id'] for row in rows}
+    return set(
+        SoftwareComponent.objects.filter(pk__in=component_ids)
+        .values_list('data_source__organization_id', flat=True).distinct()
+    )
+
+
+SPECS = {
+    'assets.softwarecomponent': TagSpec(
+        'components', ('data_source_id',),
+        _organizations_of('integrations.DataSource', 'data_source_id'),
+        cascades=('compliance', 'dependencies', 'insights'),
+    ),
+    'assets.dependency': TagSpec(
+        'dependencies', ('source_component_id',), _component_organizations,
+    ),
+    'insights.insight': TagSpec(
+        'insights', ('pk', 'organization_id', 'product_id'),
+        _each(lambda row: row['organization_id']),
+        lambda row: [f"insight:{row['pk']}", f"product:{row['product_id']}"],
+    ),
+    'policies.complianceresult': TagSpec(
+        'compliance', ('policy_id', 'product_id', 'scan_job_id'),
+        _organizations_of('policies.SecurityPolicy', 'policy_id'),
+        lambda row: [f"policy:{row['policy_id']}", f"product:{row['product_id']}", f"scan_job:{row['scan_job_id']}"],
+        signal_deletes=False,
+    ),
+    'visualization.graph': TagSpec(
+        'graphs', ('pk', 'organization_id', 'product_id'),
+        _each(lambda row: row['organization_id']),
+        lambda row: [f"graph:{row['pk']}", f"product:{row['product_id']}"],
+    ),
+    'products.productcatalog': TagSpec(
+        'products', ('pk', 'organization_id', 'parent_id'),
+        _each(lambda row: row['organization_id']),
+        lambda row: [f"product:{row['pk']}", f"product:{row['parent_id']}"],
+    ),
+}
+
+
+def _row(row, fields):
+    if isinstance(row, models.Model):
+        return {field: row.pk if field == 'pk' else getattr(row, field) for field in fields}
+    return row
+
+
+def tags_for(model, rows, deleted=False):
+    spec = SPECS[model._meta.label_lower]
+    # Rows that differ only in untagged fields have the same tags.
+    distinct = {tuple(_row(row, spec.fields)[field] for field in spec.fields) for row in rows}
+    return spec.tags([dict(zip(spec.fields, values)) for values in distinct], deleted=deleted)
+
+
+class _PendingTags:
+    """
+    The tags changed in the current transaction, bumped again on commit.
+    """
+
+    def __init__(self):
+        self.tags = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        bump_tags(self.tags)
+
+
+def _pending(connection):
+    pending = getattr(connection, '_pending_invalidation', None)
+    # A rolled back transaction or savepoint drops the callback with it.
+    if pending is None or pending.done or not any(
+        callback is pending for _, callback, _ in connection.run_on_commit
+    ):
+        return None
+    return pending
+
+
+def changed_in_transaction(tags, using=None):
+    """
+    Whether the open transaction changed rows tagged with any of tags.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return False
+    pending = _pending(connection)
+    return pending is not None and not pending.tags.isdisjoint(tags)
+
+
+def invalidate(model, rows, using=None, deleted=False):
+    """
+    Bump the tags of changed rows (instances or values() dicts) now and
+    after the current transaction commits.
+    """
+    tags = tags_for(model, rows, deleted=deleted)
+    if not tags:
+        return
+    bump_tags(tags)
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return
+    pending = _pending(connection)
+    if pending is None:
+        pending = connection._pending_invalidation = _PendingTags()
+        transaction.on_commit(pending, using=using)
+    pending.tags |= tags
+
+
+class InvalidatingQuerySet(models.QuerySet):
+    @property
+    def _spec(self):
+        return SPECS[self.model._meta.label_lower]
+
+    def _changed_rows(self):
+        return list(self.values(*self._spec.fields).distinct().order_by())
+
+    def _assigned(self, kwargs):
+        assigned = {}
+        for name, value in kwargs.items():
+            attname = self.model._meta.get_field(name).attname
+            if attname in self._spec.fields:
+                assigned[attname] = value.pk if isinstance(value, models.Model) else value
+        return assigned
+
+    def update(self, **kwargs):
+        # Rows are read before the update so a changed foreign key still
+        # invalidates the organization the row belonged to.
+        rows = self._changed_rows()
+        updated = super().update(**kwargs)
+        if not updated:
+            return updated
+        # And, if the update moved them, for the one they belong to now.
+        assigned = self._assigned(kwargs)
+        if assigned and 'pk' in self._spec.fields:
+            rows += list(
+                self.model._base_manager.using(self.db).filter(pk__in=[row['pk'] for row in rows])
+                .values(*self._spec.fields)
+            )
+        elif assigned:
+            values = {field: value for field, value in assigned.items() if not hasattr(value, 'resolve_expression')}
+            rows += [{**row, **values} for row in rows]
+        invalidate(self.model, rows, using=self.db)
+        return updated
+
+    def delete(self):
+        rows = self._changed_rows()
+        deleted = super().delete()
+        if deleted[0]:
+            invalidate(self.model, rows, using=self.db, deleted=True)
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        invalidate(self.model, created, using=self.db)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        invalidate(self.model, objs, using=self.db)
+        return updated
+
+
+def _invalidate_instance(sender, instance, using=None, **kwargs):
+    invalidate(sender, [instance], using=using)
+
+
+def _invalidate_deleted_instance(sender, instance, using=None, **kwargs):
+    invalidate(sender, [instance], using=using, deleted=True)
+
+
+def connect_signals():
+    for label, spec in SPECS.items():
+        model = apps.get_model(label)
+        post_save.connect(_invalidate_instance, sender=model, dispatch_uid=f'invalidation:{label}')
+        if spec.signal_deletes:
+            post_delete.connect(_invalidate_deleted_instance, sender=model, dispatch_uid=f'invalidation:{label}')
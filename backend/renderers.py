@@ -0,0 +1,167 @@
+"""
+Fast JSON rendering and parsing for the REST API.
+
+ORJSONRenderer and ORJSONParser are drop-in replacements for DRF's
+JSONRenderer and JSONParser. They use orjson when it is installed and the
+stdlib json module (with DRF's encoder) otherwise, with the same output
+apart from whitespace. Anything orjson refuses, e.g. integers beyond 64
+bits, is rendered by the stdlib path. Dates and times are passed through
+to DRF's encoder on both paths, so they keep DRF's format (isoformat(),
+"Z" for UTC) rather than orjson's.
+
+JSONB pass-through: a JSON column selected as text (raw_json(), or
+OrganizationScopedViewSet.raw_json_fields) reaches the serializer as the
+string Postgres produced. RawJSONField wraps it in RawJSON, and orjson
+embeds it verbatim (orjson.Fragment) instead of json.loads() in
+JSONField.from_db_value followed by a re-encode. On the stdlib path it is
+decoded once.
+
+Streaming: stream_json() yields the response in chunks of about
+STREAM_CHUNK_SIZE bytes, serializing one list item at a time, so a page
+of large graph or compliance payloads starts going out before the last
+item is rendered and is never held in memory as one bytes object. The
+status line goes out with the first chunk, so an item failing after it
+can only cut the response short: KeysetPagination.get_streaming_response
+renders the first chunk before responding and only streams pages larger
+than that.
+"""
+import json
+
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, rendering falls back to the stdlib
+    orjson = None
+
+# orjson.Fragment (orjson >= 3.9) embeds pre-serialized JSON.
+_Fragment = getattr(orjson, 'Fragment', None)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_encoder = JSONEncoder()
+
+
+class RawJSON:
+    """
+    Already-serialized JSON text, embedded in the output as is.
+    """
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return f'RawJSON({self.text!r})'
+
+
+def raw_json(field_name):
+    """
+    Select a JSONField as the JSON text the database stores, skipping the
+    decode in JSONField.from_db_value.
+    """
+    return Cast(field_name, output_field=TextField())
+
+
+class RawJSONField(serializers.Field):
+    """
+    Read-only serializer field for a column selected with raw_json().
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if isinstance(value, str):
+            return RawJSON(value)
+        return value
+
+
+def _orjson_default(obj):
+    if isinstance(obj, RawJSON):
+        return _Fragment(obj.text) if _Fragment is not None else orjson.loads(obj.text)
+    return _encoder.default(obj)
+
+
+def _stdlib_default(obj):
+    if isinstance(obj, RawJSON):
+        return json.loads(obj.text)
+    return _encoder.default(obj)
+
+
+def _stdlib_dumps(data, indent=None):
+    separators = (', ', ': ') if indent else (',', ':')
+    return json.dumps(
+        data, default=_stdlib_default, indent=indent, separators=separators,
+        ensure_ascii=not api_settings.UNICODE_JSON, allow_nan=not api_settings.STRICT_JSON,
+    ).encode('utf-8')
+
+
+def dumps(data, indent=None):
+    """
+    Serialize data to UTF-8 JSON bytes.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, default=_orjson_default, option=option)
+        except orjson.JSONEncodeError:
+            pass
+    return _stdlib_dumps(data, indent)
+
+
+def loads(content):
+    if orjson is not None:
+        return orjson.loads(content)
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    return json.loads(content)
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type or '', renderer_context or {})
+        return dumps(data, indent=indent)
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+def stream_json(envelope, key, items, serialize):
+    """
+    Yield the JSON for ``envelope`` with ``envelope[key]`` replaced by the
+    list of serialize(item) for items, in chunks.
+    """
+    head = dumps({**envelope, key: []})
+    # The list is the last member of the envelope: split at its "[]".
+    marker = dumps(key) + b':[]'
+    split = head.rindex(marker) + len(marker) - 1
+    buffer = bytearray(head[:split])
+    for index, item in enumerate(items):
+        if index:
+            buffer += b','
+        buffer += dumps(serialize(item))
+        if len(buffer) >= STREAM_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += head[split:]
+    yield bytes(buffer)
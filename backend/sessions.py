@@ -0,0 +1,52 @@
+"""
+Session middleware with write-behind expiry refresh.
+
+SESSION_SAVE_EVERY_REQUEST keeps expiry sliding by re-saving the session on
+every request. With SESSION_SAVE_EVERY_REQUEST = False this middleware saves
+when the session data changed and, for sliding expiry, when the last save
+is more than SESSION_SAVE_INTERVAL seconds old. An active session thus
+expires between SESSION_COOKIE_AGE - SESSION_SAVE_INTERVAL and
+SESSION_COOKIE_AGE after its last request, without a write per request.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware as DjangoSessionMiddleware
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+SAVED_AT_KEY = '_session_saved_at'
+
+
+class SessionMiddleware(DjangoSessionMiddleware):
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if session is not None and not settings.SESSION_SAVE_EVERY_REQUEST and response.status_code < 500:
+            now = int(time.time())
+            if session.modified:
+                if not session.is_empty():
+                    session[SAVED_AT_KEY] = now
+            elif session.session_key is not None:
+                saved_at = session.get(SAVED_AT_KEY, 0)
+                # is_empty() is checked after the read: loading a session
+                # that no longer exists clears its key, and saving it
+                # would create it again.
+                stale = now - saved_at >= getattr(settings, 'SESSION_SAVE_INTERVAL', 900)
+                if stale and not session.is_empty():
+                    session[SAVED_AT_KEY] = now
+        return super().process_response(request, response)
+
+
+def purge_expired_sessions(batch_size=5000, now=None):
+    """
+    Delete expired django_session rows in primary-key batches so a large
+    backlog never holds one long-running DELETE.
+    """
+    now = now or timezone.now()
+    expired = Session.objects.filter(expire_date__lt=now).order_by('pk')
+    deleted = 0
+    while True:
+        keys = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        deleted += Session.objects.filter(pk__in=keys).delete()[0]
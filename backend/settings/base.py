@@ -15,6 +15,9 @@ import sys
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv, dotenv_values
+from celery.schedules import crontab
+
+from backend.db.config import add_replicas, configure_database
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -78,7 +81,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "backend.instrumentation.RequestInstrumentationMiddleware",
+    "backend.sessions.SessionMiddleware",
+    "backend.db.routers.ReplicaRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -87,6 +92,50 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Caches. Sessions use a dedicated Redis-backed alias (cached_db engine);
+# errors are ignored so a Redis outage falls back to the database (or, for
+# the default cache, to a miss).
+CACHES = {
+    # Process-local LRU in front of Redis; see backend/cache.py.
+    'default': {
+        'BACKEND': 'backend.cache.TieredCache',
+        'OPTIONS': {
+            'L2': 'redis',
+            'L1_MAX_ENTRIES': int(os.environ.get('CACHE_L1_MAX_ENTRIES', 1000)),
+            # Upper bound on how long another process's write can go unseen.
+            'L1_TIMEOUT': int(os.environ.get('CACHE_L1_TIMEOUT', 5)),
+        },
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        # Redis db 0 is the Celery broker, 1 its result backend, 2 sessions.
+        'LOCATION': os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/3'),
+        'KEY_PREFIX': 'kodkarta',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'IGNORE_EXCEPTIONS': True,
+            'SOCKET_CONNECT_TIMEOUT': 1,
+            'SOCKET_TIMEOUT': 1,
+        },
+    },
+    'sessions': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get('SESSION_REDIS_URL', 'redis://localhost:6379/2'),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'IGNORE_EXCEPTIONS': True,
+            'SOCKET_CONNECT_TIMEOUT': 1,
+            'SOCKET_TIMEOUT': 1,
+        },
+    },
+}
+
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = 'sessions'
+# Sessions are saved when they change; sliding expiry is persisted at most
+# this often (seconds), see backend/sessions.py
+SESSION_SAVE_INTERVAL = 900
+
 ROOT_URLCONF = "backend.urls"
 
 TEMPLATES = [
@@ -106,6 +155,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "backend.wsgi.application"
+ASGI_APPLICATION = "backend.asgi.application"
 
 
 # Database
@@ -125,6 +175,52 @@ DATABASES = {
     }
 }
 
+# Connection reuse for the default database (see backend/db/config.py).
+# DB_POOL: "persistent" (default), "psycopg" (in-process psycopg 3 pool) or
+# "pgbouncer" (transaction pooling through PgBouncer). Pool sizes are derived
+# from the gunicorn topology, which gunicorn.conf.py reads from the same
+# variables.
+GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 3))
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))
+DATABASES['default'] = configure_database(
+    DATABASES['default'],
+    mode=os.environ.get('DB_POOL', 'persistent'),
+    workers=GUNICORN_WORKERS,
+    threads=GUNICORN_THREADS,
+    # Supabase's direct connection limit is shared with other clients.
+    max_connections=int(os.environ.get('DB_MAX_CONNECTIONS', 60)),
+    conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+    pgbouncer_host=os.environ.get('PGBOUNCER_HOST'),
+    pgbouncer_port=os.environ.get('PGBOUNCER_PORT'),
+    pool_timeout=float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+)
+
+# Read replicas (comma-separated host[:port], same credentials as the
+# primary). Reads of the analytics apps go to them during requests; see
+# backend/db/routers.py.
+DATABASE_REPLICAS = add_replicas(DATABASES, os.environ.get('DB_REPLICA_HOSTS', '').split(','))
+DATABASE_ROUTERS = ['backend.db.routers.ReplicaRouter']
+DATABASE_ROUTING = {
+    'REPLICAS': DATABASE_REPLICAS,
+    'APPS': {
+        'insights': 'replica',
+        'visualization': 'replica',
+        'assets': 'replica',
+    },
+    # Policy definitions and compliance reports; scan jobs stay on the
+    # primary, their progress is polled right after ingestion writes it.
+    'MODELS': {
+        'policies.securitypolicy': 'replica',
+        'policies.policyrule': 'replica',
+        'policies.complianceresult': 'replica',
+    },
+    # URL names or dotted view names mapped to "replica" or "primary".
+    'VIEWS': {
+        'organisation_list': 'replica',
+    },
+    'STICKY_SECONDS': int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 10)),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -144,6 +240,50 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing. PASSWORD_HASHER_PROFILE picks the hasher for new
+# passwords; the others stay listed so existing hashes keep verifying and
+# are upgraded in the background on login (apps/users/hashers.py). Costs
+# are tuned with the benchmark_password_hashing management command.
+PASSWORD_HASHING = {
+    'ARGON2': {
+        'TIME_COST': int(os.environ.get('ARGON2_TIME_COST', 2)),
+        'MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', 19456)),  # KiB
+        'PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', 1)),
+    },
+    'SCRYPT': {
+        'WORK_FACTOR': int(os.environ.get('SCRYPT_WORK_FACTOR', 2 ** 15)),
+        'BLOCK_SIZE': 8,
+        'PARALLELISM': 1,
+    },
+    'PBKDF2': {
+        'ITERATIONS': int(os.environ.get('PBKDF2_ITERATIONS', 600000)),
+    },
+    'ASYNC_REHASH': True,
+    'MAX_PENDING_REHASHES': 100,
+}
+
+PASSWORD_HASHER_PROFILES = {
+    'argon2': [
+        'apps.users.hashers.TunedArgon2PasswordHasher',
+        'apps.users.hashers.TunedScryptPasswordHasher',
+        'apps.users.hashers.TunedPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ],
+    'scrypt': [
+        'apps.users.hashers.TunedScryptPasswordHasher',
+        'apps.users.hashers.TunedArgon2PasswordHasher',
+        'apps.users.hashers.TunedPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ],
+    'pbkdf2': [
+        'apps.users.hashers.TunedPBKDF2PasswordHasher',
+        'apps.users.hashers.TunedArgon2PasswordHasher',
+        'apps.users.hashers.TunedScryptPasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ],
+}
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[os.environ.get('PASSWORD_HASHER_PROFILE', 'argon2')]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.1/topics/i18n/
@@ -173,16 +313,17 @@ AUTH_USER_MODEL = 'users.User'
 # Rest Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson when installed, stdlib json otherwise; see backend/renderers.py
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'backend.renderers.ORJSONRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
-        'rest_framework.parsers.JSONParser',
+        'backend.renderers.ORJSONParser',
     ),
 }
 
@@ -200,6 +341,7 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.serializers.FastBlacklistTokenRefreshSerializer',
 }
 
 # CORS settings
@@ -247,6 +389,126 @@ GITHUB_API_URL = 'https://api.github.com'
 # user:email is required to fetch user's email address
 GITHUB_SCOPES = ['user:email'] 
 
+# Seconds the full User row is cached for stateless JWT principals,
+# see apps/users/authentication.py
+USER_CACHE_TTL = 60
+
+# Seconds a resolved GitHub identity (id -> primary email) is reused across logins
+GITHUB_IDENTITY_CACHE_TTL = 300
+
+# Outbound HTTP (OAuth providers): pooled sessions, timeouts, retries and
+# circuit breaking, see apps/users/http_client.py
+OUTBOUND_HTTP = {
+    'CONNECT_TIMEOUT': float(os.environ.get('OUTBOUND_HTTP_CONNECT_TIMEOUT', 3.05)),
+    'READ_TIMEOUT': float(os.environ.get('OUTBOUND_HTTP_READ_TIMEOUT', 10)),
+    'POOL_MAXSIZE': int(os.environ.get('OUTBOUND_HTTP_POOL_MAXSIZE', 20)),
+    'MAX_RETRIES': 2,
+    'BREAKER_FAILURE_THRESHOLD': 5,
+    'BREAKER_RESET_TIMEOUT': 30,
+}
+
+# Per-request query/latency instrumentation, see backend/instrumentation.py
+INSTRUMENTATION = {
+    'ENABLED': True,
+    'SAMPLE_RATE': float(os.environ.get('INSTRUMENTATION_SAMPLE_RATE', 0.05)),
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'SLOW_REQUEST_MS': 1000,
+    'WINDOW': 500,
+}
+
+# Readiness probes behind /api/users/status/, see apps/users/health.py
+HEALTH_CHECK = {
+    'CACHE_SECONDS': 5,
+    'PROBE_TIMEOUT': 2.0,
+    'DB_LATENCY_WARN_MS': 100,
+    'DB_LATENCY_FAIL_MS': 500,
+    'DB_SATURATION_FAIL': 0.95,
+    'CELERY_QUEUES': ['interactive', 'scan', 'ingest', 'analytics'],
+    # Internal probes send this in X-Health-Token to get the full report.
+    'PROBE_TOKEN': os.environ.get('HEALTH_CHECK_TOKEN'),
+}
+
+# Celery, see backend/celery.py. Chords (scan fan-in) need the result
+# backend. With the Redis transport a lower priority number runs first.
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/1')
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_RESULT_EXPIRES = 6 * 3600
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER') == '1'
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_QUEUES = {
+    'interactive': {'routing_key': 'interactive'},
+    'scan': {'routing_key': 'scan'},
+    'ingest': {'routing_key': 'ingest'},
+    'analytics': {'routing_key': 'analytics'},
+}
+CELERY_TASK_DEFAULT_QUEUE = 'interactive'
+CELERY_TASK_ROUTES = {
+    'apps.policies.tasks.scan_organization': {'queue': 'scan'},
+    'apps.policies.tasks.scan_data_source': {'queue': 'scan'},
+    'apps.policies.tasks.scan_chunk': {'queue': 'ingest'},
+    'apps.policies.tasks.scan_pushdown': {'queue': 'ingest'},
+    'apps.policies.tasks.finalize_scans': {'queue': 'analytics'},
+    'apps.policies.tasks.fail_scans': {'queue': 'analytics'},
+    'apps.policies.tasks.schedule_scans': {'queue': 'scan'},
+    'apps.policies.tasks.check_data_source_connection': {'queue': 'scan'},
+    'apps.users.tasks.*': {'queue': 'analytics'},
+}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+    'visibility_timeout': 3600,
+}
+# Scan tasks are idempotent, so a task whose worker died is redelivered
+# rather than lost; without prefetching, priorities apply per task.
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BEAT_SCHEDULE = {
+    'compact-token-blacklist-hourly': {
+        'task': 'apps.users.tasks.compact_token_blacklist',
+        'schedule': crontab(minute=15),
+    },
+    'purge-expired-sessions-daily': {
+        'task': 'apps.users.tasks.purge_expired_sessions',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'schedule-scans': {
+        'task': 'apps.policies.tasks.schedule_scans',
+        'schedule': crontab(minute='*/5'),
+        'options': {'expires': 240},
+    },
+}
+
+# Organization scans: components per scan_chunk task.
+SCAN_CHUNK_SIZE = int(os.environ.get('SCAN_CHUNK_SIZE', 500))
+# Evaluate simple rule conditions in PostgreSQL, see apps/policies/pushdown.py.
+SCAN_SQL_PUSHDOWN = os.environ.get('SCAN_SQL_PUSHDOWN', '1') == '1'
+
+# Periodic scans by DataSource.scan_frequency, see apps/policies/scheduling.py.
+# DISPATCH_SPREAD_SECONDS stays below the schedule-scans beat interval.
+SCAN_SCHEDULER = {
+    'BATCH_SIZE': 200,
+    'MAX_CONCURRENT_SCANS': int(os.environ.get('MAX_CONCURRENT_SCANS', 20)),
+    'MAX_CONCURRENT_SCANS_PER_ORGANIZATION': 3,
+    'JITTER': 0.1,
+    'DISPATCH_SPREAD_SECONDS': 240,
+    'BACKOFF_BASE_HOURS': 1,
+    'BACKOFF_MAX_HOURS': 48,
+    'STALE_SCAN_HOURS': 6,
+}
+
+# Refresh-token blacklist lookups, see apps/users/token_blacklist.py.
+# Without REDIS_URL the blacklist sets are kept in-process.
+TOKEN_BLACKLIST = {
+    'REDIS_URL': os.environ.get('TOKEN_BLACKLIST_REDIS_URL'),
+    'SYNC_INTERVAL': 2,
+    'COMPACT_BATCH_SIZE': 5000,
+}
+
 
 STATIC_URL = '/static/'
 
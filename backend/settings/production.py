@@ -43,6 +43,19 @@ DATABASES = {
         },
     },
 }
+DATABASES['default'] = configure_database(
+    DATABASES['default'],
+    mode=os.environ.get('DB_POOL', 'persistent'),
+    workers=GUNICORN_WORKERS,
+    threads=GUNICORN_THREADS,
+    max_connections=int(os.environ.get('DB_MAX_CONNECTIONS', 100)),
+    conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+    pgbouncer_host=os.environ.get('PGBOUNCER_HOST'),
+    pgbouncer_port=os.environ.get('PGBOUNCER_PORT'),
+    pool_timeout=float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+)
+DATABASE_REPLICAS = add_replicas(DATABASES, os.environ.get('DB_REPLICA_HOSTS', '').split(','))
+DATABASE_ROUTING['REPLICAS'] = DATABASE_REPLICAS
 import os
 
 SWAGGER_USERNAME = os.getenv("SWAGGER_USERNAME")
@@ -189,7 +202,9 @@ SWAGGER_API_KEY = os.getenv("mindpys_docs")
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "backend.instrumentation.RequestInstrumentationMiddleware",
+    "backend.sessions.SessionMiddleware",
+    "backend.db.routers.ReplicaRoutingMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -280,13 +295,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "mindPsy.wsgi.application"
 
-# Standard Django session engine
-SESSION_ENGINE = "django.contrib.sessions.backends.db"
 SESSION_COOKIE_AGE = 86400  # 24 hours in seconds
 SESSION_COOKIE_NAME = 'mindpsy_sessionid'
 SESSION_COOKIE_SAMESITE = 'Lax'
 SESSION_COOKIE_HTTPONLY = True
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SAVE_EVERY_REQUEST = False
 
 
 # Password validation
@@ -363,6 +376,9 @@ LOGGING = {
             "format": "[{asctime}] {levelname} {name} {message}",
             "style": "{",
         },
+        "json": {
+            "()": "backend.instrumentation.JsonFormatter",
+        },
     },
     "handlers": {
         "console": {
@@ -376,6 +392,12 @@ LOGGING = {
             "formatter": "verbose",
             "level": "INFO"
         },
+        "instrumentation_file": {
+            "class": "logging.FileHandler",
+            "filename": os.path.join(LOG_DIR, "requests.jsonl"),
+            "formatter": "json",
+            "level": "INFO"
+        },
         "celery_file": {  # Add a specific handler for Celery
             "class": "logging.FileHandler",
             "filename": os.path.join(LOG_DIR, "celery.log"),
@@ -388,6 +410,11 @@ LOGGING = {
         "level": "INFO",
     },
     "loggers": {  
+        "backend.instrumentation": {
+            "handlers": ["instrumentation_file"],
+            "level": "INFO",
+            "propagate": False,
+        },
         "celery": {
             "handlers": ["celery_file", "console"],
             "level": "INFO",
@@ -412,19 +439,3 @@ from celery.signals import setup_logging
 def config_loggers(*args, **kwargs):
     from logging.config import dictConfig
     dictConfig(LOGGING)
-
-from celery.schedules import crontab
-
-CELERY_BEAT_SCHEDULE = {
-    'centroid-every-10-minutes': {
-        'task': 'apps.user_modelling.tasks.process_centroid_batch',
-        'schedule': crontab(minute='*/10'),
-    },
-    'daily-pipeline-5pm': {
-        'task': 'apps.user_modelling.tasks.run_daily_pipeline',
-        'schedule': crontab(hour=17, minute=0),
-    },
-}
-
-
-
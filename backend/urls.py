@@ -20,4 +20,10 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("organisation/", include("apps.cloud_app.urls")),
     path("api/users/", include("apps.users.urls")),
+    path("api/assets/", include("apps.assets.urls")),
+    path("api/integrations/", include("apps.integrations.urls")),
+    path("api/policies/", include("apps.policies.urls")),
+    path("api/insights/", include("apps.insights.urls")),
+    path("api/products/", include("apps.products.urls")),
+    path("api/visualization/", include("apps.visualization.urls")),
 ]
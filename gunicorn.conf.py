@@ -0,0 +1,37 @@
+"""
+gunicorn settings: gunicorn -c gunicorn.conf.py backend.wsgi
+
+ASGI (async views on an event loop, see backend/asgi.py):
+GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py backend.asgi
+
+Workers and threads come from the same GUNICORN_WORKERS/GUNICORN_THREADS
+variables the settings use to size database connection pools, so one
+process never runs more request threads than it has connections for.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+# Recycle workers now and then; persistent and pooled connections are
+# closed with them.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+# Pools are created lazily per worker, never in the master, so
+# preloading the app is safe.
+preload_app = True
+
+
+def worker_exit(server, worker):
+    from django.conf import settings
+
+    from backend.db.metrics import POOL_ENGINE
+
+    for alias, database in settings.DATABASES.items():
+        if database['ENGINE'] == POOL_ENGINE:
+            from backend.db.postgresql_pool.base import DatabaseWrapper
+
+            DatabaseWrapper.close_pool(alias)